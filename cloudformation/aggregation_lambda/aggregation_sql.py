@@ -0,0 +1,709 @@
+"""
+Aggregation SQL of the usage report Lambda. The local aggregation harness in
+report_generation reads this file too, so both run the same queries.
+"""
+from datetime import timedelta
+from enum import Enum
+
+# Database reference in the templates, filled in with the stack's database
+DATABASE_PLACEHOLDER = '{database}'
+
+# Raw tables whose partitions are registered each run, and whether they
+# are partitioned by cluster below the hour
+RAW_TABLES = {
+    'clusterqueue': True,
+    'workload': True,
+    'pod': True,
+    'heartdub': False
+}
+
+class QueryType(Enum):
+    CRESCENDO_SUMMARY = "crescendo_summary"
+    CRESCENDO_DETAILED = "crescendo_detailed"
+    NON_CRESCENDO_SUMMARY = "non_crescendo_summary"
+    NON_CRESCENDO_DETAILED = "non_crescendo_detailed"
+
+
+class QueryTemplates:
+    CRESCENDO_SUMMARY = """
+      INSERT into "{database}".summary_report
+      WITH latest_version_resource_states AS (
+        SELECT * FROM (
+          SELECT *, ROW_NUMBER() OVER (
+              PARTITION BY instance_type, timestamp, namespace, team
+              ORDER BY CAST(resource_version AS bigint) DESC
+            ) AS row_num
+          FROM (
+            SELECT instance_type, timestamp, namespace, resource_version, team, gpu_total,
+                gpu_borrowed, cpu_total, cpu_borrowed, neuron_core_total, neuron_core_borrowed,
+                year, month, day, cluster
+            FROM "{database}".clusterqueue
+            WHERE year = '{year}' AND month = '{month}' AND day = '{day}'
+            UNION ALL
+            -- States still open at the end of the previous day, carried in at midnight
+            SELECT instance_type, TIMESTAMP '{year}-{month}-{day} 00:00:00', namespace,
+                resource_version, team, gpu_total, gpu_borrowed, cpu_total, cpu_borrowed,
+                neuron_core_total, neuron_core_borrowed, '{year}', '{month}', '{day}', cluster
+            FROM "{database}".clusterqueue_checkpoint
+            WHERE year = '{prev_year}' AND month = '{prev_month}' AND day = '{prev_day}'
+          ) day_states
+        ) ranked
+        WHERE row_num = 1 AND year = '{year}' AND month = '{month}' AND day = '{day}'
+      ),
+      resource_periods AS (
+          SELECT DISTINCT
+              timestamp as period_start,
+              CASE
+                  WHEN LEAD(timestamp) OVER(
+                      PARTITION BY namespace, team, instance_type, year, month, day
+                      ORDER BY timestamp
+                  ) IS NULL 
+                  THEN DATE_ADD('DAY', 1, DATE_TRUNC('DAY', timestamp))
+                  ELSE LEAD(timestamp) OVER(
+                      PARTITION BY namespace, team, instance_type, year, month, day
+                      ORDER BY timestamp
+                  )
+              END as period_end, namespace, team, instance_type, gpu_total, gpu_borrowed,
+              cpu_total, cpu_borrowed, neuron_core_total, neuron_core_borrowed, cluster
+          FROM latest_version_resource_states
+      ),
+      consolidated_periods AS (
+          SELECT 
+              DATE(period_start) as report_date, namespace, team, instance_type, gpu_total, gpu_borrowed,
+              cpu_total, cpu_borrowed, neuron_core_total, neuron_core_borrowed, period_start, period_end,
+              -- Calculate utilization hours for each resource type
+              (CAST(DATE_DIFF('second', period_start, period_end) AS DOUBLE) / 3600) * gpu_total as total_gpu_hours,
+              (CAST(DATE_DIFF('second', period_start, period_end) AS DOUBLE) / 3600) * (gpu_total - gpu_borrowed) as allocated_gpu_hours,
+              (CAST(DATE_DIFF('second', period_start, period_end) AS DOUBLE) / 3600) * gpu_borrowed as borrowed_gpu_hours,
+              (CAST(DATE_DIFF('second', period_start, period_end) AS DOUBLE) / 3600) * cpu_total as total_cpu_hours,
+              (CAST(DATE_DIFF('second', period_start, period_end) AS DOUBLE) / 3600) * (cpu_total - cpu_borrowed) as allocated_cpu_hours,
+              (CAST(DATE_DIFF('second', period_start, period_end) AS DOUBLE) / 3600) * cpu_borrowed as borrowed_cpu_hours,
+              (CAST(DATE_DIFF('second', period_start, period_end) AS DOUBLE) / 3600) * neuron_core_total as total_neuron_hours,
+              (CAST(DATE_DIFF('second', period_start, period_end) AS DOUBLE) / 3600) * (neuron_core_total - neuron_core_borrowed) as allocated_neuron_hours,
+              (CAST(DATE_DIFF('second', period_start, period_end) AS DOUBLE) / 3600) * neuron_core_borrowed as borrowed_neuron_hours,
+              cluster
+          FROM resource_periods
+          WHERE period_end IS NOT NULL
+      ),
+      daily_summary AS (
+          SELECT report_date, namespace, team, instance_type,
+              SUM(total_neuron_hours) as total_neuron_core_utilization_hours,
+              SUM(allocated_neuron_hours) as allocated_neuron_core_utilization_hours,
+              SUM(borrowed_neuron_hours) as borrowed_neuron_core_utilization_hours,
+              SUM(total_gpu_hours) as total_gpu_utilization_hours,
+              SUM(allocated_gpu_hours) as allocated_gpu_utilization_hours,
+              SUM(borrowed_gpu_hours) as borrowed_gpu_utilization_hours,
+              SUM(total_cpu_hours) as total_vcpu_utilization_hours,
+              SUM(allocated_cpu_hours) as allocated_vcpu_utilization_hours,
+              SUM(borrowed_cpu_hours) as borrowed_vcpu_utilization_hours,
+              CAST(YEAR(report_date) AS VARCHAR) as year,
+              LPAD(CAST(MONTH(report_date) AS VARCHAR), 2, '0') as month,
+              LPAD(CAST(DAY(report_date) AS VARCHAR), 2, '0') as day,
+              cluster
+          FROM consolidated_periods
+          GROUP BY 
+              report_date, namespace, team, instance_type, cluster
+      )
+      SELECT
+          report_date, namespace, team, instance_type,
+          total_neuron_core_utilization_hours,
+          allocated_neuron_core_utilization_hours,
+          borrowed_neuron_core_utilization_hours,
+          total_gpu_utilization_hours,
+          allocated_gpu_utilization_hours,
+          borrowed_gpu_utilization_hours,
+          total_vcpu_utilization_hours,
+          allocated_vcpu_utilization_hours,
+          borrowed_vcpu_utilization_hours,
+          year, month, day, cluster
+      FROM daily_summary;
+    """
+
+    CRESCENDO_DETAILED = """
+        Insert into "{database}".detailed_report
+        WITH latest_version_workload AS (
+          SELECT * FROM (
+            SELECT *, ROW_NUMBER() OVER (
+                PARTITION BY workload_name, timestamp, namespace, team, instance_type
+                ORDER BY CAST(resource_version AS bigint) DESC
+              ) AS row_num
+            FROM (
+              SELECT workload_name, timestamp, namespace, resource_version, team, status,
+                  task_priority_class, instance_type, CPU, GPU, neuron_core, admitted, finished,
+                  year, month, day, cluster
+              FROM "{database}".workload
+              WHERE year = '{year}' AND month = '{month}' AND day = '{day}'
+              UNION ALL
+              -- States still open at the end of the previous day, carried in at midnight
+              SELECT workload_name, TIMESTAMP '{year}-{month}-{day} 00:00:00', namespace,
+                  resource_version, team, status, task_priority_class, instance_type, CPU, GPU,
+                  neuron_core, admitted, finished, '{year}', '{month}', '{day}', cluster
+              FROM "{database}".workload_checkpoint
+              WHERE year = '{prev_year}' AND month = '{prev_month}' AND day = '{prev_day}'
+            ) day_states
+          ) ranked
+          WHERE row_num = 1
+        ),
+        workload_state_changes AS (
+            SELECT DISTINCT
+                workload_name, timestamp, namespace, team, status, instance_type, task_priority_class,
+                CPU, GPU, neuron_core, admitted, finished, year, month, day, cluster
+            FROM latest_version_workload
+            WHERE year = '{year}' AND month = '{month}' AND day = '{day}'
+        ),
+
+        running_periods AS (
+            SELECT 
+                workload_name, timestamp as period_start,
+                CASE 
+                  WHEN LEAD(timestamp) OVER(
+                      PARTITION BY workload_name, instance_type, year, month, day
+                      ORDER BY timestamp
+                  ) is NULL and status = 'QuotaReserved-True' 
+                  THEN DATE_ADD('DAY', 1, DATE_TRUNC('DAY', timestamp))
+                  ELSE COALESCE(LEAD(timestamp) OVER(
+                          PARTITION BY workload_name, instance_type, year, month, day
+                          ORDER BY timestamp
+                      ), timestamp) 
+                END as period_end,
+                namespace, status,
+                CASE 
+                  WHEN LEAD(status) OVER(
+                      PARTITION BY workload_name, instance_type, year, month, day
+                      ORDER BY timestamp
+                  ) is NULL and status = 'QuotaReserved-True'
+                  THEN 'QuotaReserved-True'
+                  ELSE LEAD(status) OVER(
+                      PARTITION BY workload_name, instance_type, year, month, day
+                      ORDER BY timestamp
+                  )
+                END as next_status,
+                team, instance_type, task_priority_class, CPU, GPU, neuron_core,
+                admitted, finished, year, month, day, cluster
+            FROM workload_state_changes
+        ),
+
+        filtered_running_periods AS (
+            SELECT *, LAG(period_end) OVER (PARTITION BY workload_name, instance_type ORDER BY period_start) AS prev_period_end
+            FROM running_periods
+            WHERE admitted = true
+        ),
+
+        running_grouped AS (
+            SELECT *,
+                CASE 
+                    WHEN prev_period_end IS NULL THEN 1
+                    WHEN date_diff('second', prev_period_end, period_start) > 0 THEN 1
+                    ELSE 0
+                END AS is_new_group
+            FROM filtered_running_periods
+        ),
+
+        grouped_with_ids AS (
+            SELECT *, SUM(is_new_group) OVER (PARTITION BY workload_name, instance_type ORDER BY period_start ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS group_id
+            FROM running_grouped
+        ),
+
+        continuous_running_periods AS (
+            SELECT
+                workload_name, group_id, MIN(period_start) AS period_start, MAX(period_end) AS period_end, namespace,
+                CASE 
+                    WHEN bool_or(finished) THEN 'Finished'
+                    WHEN bool_or(next_status = 'Failed') OR bool_or(next_status IS NULL) THEN 'Failed'
+                    WHEN bool_or(status = 'QuotaReserved-True' AND next_status = 'Evicted-True') THEN 'Preempted'
+                    ELSE 'Running'
+                END AS status, team, instance_type, task_priority_class, CPU, GPU, neuron_core, year, month, day, cluster
+            FROM grouped_with_ids
+            GROUP BY 
+              workload_name, group_id, namespace, team, instance_type, task_priority_class, CPU, GPU, neuron_core, 
+              year, month, day, cluster
+        ),
+        team_grouped_utilization AS (
+            SELECT
+                workload_name, group_id, namespace, team, instance_type, task_priority_class,
+                MIN(period_start) AS period_start, MAX(period_end) AS period_end, MAX(status) AS status,
+                SUM(date_diff('second', period_start, period_end) / 3600.0 * CPU) AS cpu_utilization_hours,
+                SUM(date_diff('second', period_start, period_end) / 3600.0 * GPU) AS gpu_utilization_hours,
+                SUM(date_diff('second', period_start, period_end) / 3600.0 * neuron_core) AS neuron_utilization_hours,
+                COUNT(DISTINCT workload_name) AS workload_count,
+                SUM(CPU) AS cpu_count, SUM(GPU) AS gpu_count, SUM(neuron_core) AS neuron_count,
+                year, month, day, cluster
+            FROM continuous_running_periods
+            GROUP BY 
+                workload_name, group_id, namespace, team, instance_type, task_priority_class,
+                year, month, day, cluster
+        )
+        SELECT DATE(period_start) as report_date, period_start, period_end, namespace, team, workload_name as task_name,
+            instance_type as instance, workload_count as instance_count, status, neuron_utilization_hours as utilized_neuron_core_hours, 
+            CAST(neuron_count as double) as utilized_neuron_core_count, gpu_utilization_hours as utilized_gpu_hours, 
+            CAST(gpu_count as double) as utilized_gpu_count, cpu_utilization_hours as utilized_vcpu_hours, 
+            CAST(cpu_count as double) as utilized_vcpu_count, task_priority_class as priority_class, 
+            year, month, day, cluster
+        FROM team_grouped_utilization;
+    """
+
+    NON_CRESCENDO_SUMMARY = """
+    INSERT INTO "{database}".summary_report
+    WITH latest_pod_state_changes AS (
+      SELECT *
+      FROM (
+        SELECT
+          *,
+          ROW_NUMBER() OVER (
+            PARTITION BY pod, timestamp, namespace, owner, instance_type
+            ORDER BY CAST(resource_version AS bigint) DESC
+          ) AS row_num
+        FROM (
+          SELECT pod, timestamp, namespace, resource_version, status, owner, instance_type,
+              job_type, assigned_node, CPU, GPU, neuron_core, priority_class, year, month, day,
+              cluster
+          FROM "{database}".pod
+          WHERE year = '{year}' AND month = '{month}' AND day = '{day}'
+          UNION ALL
+          -- States still open at the end of the previous day, carried in at midnight
+          SELECT pod, TIMESTAMP '{year}-{month}-{day} 00:00:00', namespace, resource_version,
+              status, owner, instance_type, job_type, assigned_node, CPU, GPU, neuron_core,
+              priority_class, '{year}', '{month}', '{day}', cluster
+          FROM "{database}".pod_checkpoint
+          WHERE year = '{prev_year}' AND month = '{prev_month}' AND day = '{prev_day}'
+        ) day_states
+      ) ranked
+      WHERE row_num = 1
+    ),
+    pod_state_changes AS (
+        SELECT DISTINCT
+            pod, timestamp, namespace, status, owner, instance_type, job_type, CPU, GPU,
+            neuron_core, year, month, day, cluster
+        FROM latest_pod_state_changes
+        WHERE year = '{year}' AND month = '{month}' AND day = '{day}'
+        AND status != 'Unknown'
+    ),
+    running_periods AS (
+        SELECT 
+            pod,
+            timestamp as period_start,
+            CASE
+                WHEN LEAD(timestamp) OVER(
+                    PARTITION BY pod, instance_type, year, month, day
+                    ORDER BY timestamp
+                ) IS NULL 
+                AND status = 'Running'
+                THEN DATE_ADD('DAY', 1, DATE_TRUNC('DAY', timestamp))
+                ELSE LEAD(timestamp) OVER(
+                    PARTITION BY pod, instance_type, year, month, day
+                    ORDER BY timestamp
+                )
+            END as period_end,
+            status, instance_type, namespace, CPU, GPU, neuron_core, owner, year, month, day, cluster
+        FROM pod_state_changes
+    ),
+    utilization_calc AS (
+        SELECT
+            DATE(period_start) as report_date,
+            namespace,
+            '' as team,
+            instance_type,
+            SUM(
+                CASE 
+                    WHEN status = 'Running' AND period_end IS NOT NULL 
+                    THEN (CAST(DATE_DIFF('second', period_start, period_end) AS DOUBLE) / 3600) * neuron_core
+                    ELSE 0 
+                END
+            ) as total_neuron_core_utilization_hours,
+            0.0 as allocated_neuron_core_utilization_hours,
+            0.0 as borrowed_neuron_core_utilization_hours,
+            SUM(
+                CASE 
+                    WHEN status = 'Running' AND period_end IS NOT NULL 
+                    THEN (CAST(DATE_DIFF('second', period_start, period_end) AS DOUBLE) / 3600) * GPU
+                    ELSE 0 
+                END
+            ) as total_gpu_utilization_hours,
+            0.0 as allocated_gpu_utilization_hours,
+            0.0 as borrowed_gpu_utilization_hours,
+            SUM(
+                CASE 
+                    WHEN status = 'Running' AND period_end IS NOT NULL 
+                    THEN (CAST(DATE_DIFF('second', period_start, period_end) AS DOUBLE) / 3600) * CPU
+                    ELSE 0 
+                END
+            ) as total_vcpu_utilization_hours,
+            0.0 as allocated_vcpu_utilization_hours,
+            0.0 as borrowed_vcpu_utilization_hours,
+            CAST(YEAR(DATE(period_start)) AS VARCHAR) as year,
+            LPAD(CAST(MONTH(DATE(period_start)) AS VARCHAR), 2, '0') as month,
+            LPAD(CAST(DAY(DATE(period_start)) AS VARCHAR), 2, '0') as day,
+            cluster
+        FROM running_periods
+        GROUP BY 
+            DATE(period_start),
+            namespace, instance_type, owner, year, month, day, cluster
+    )
+    SELECT
+        report_date,
+        namespace,
+        team,
+        instance_type,
+        total_neuron_core_utilization_hours,
+        allocated_neuron_core_utilization_hours,
+        borrowed_neuron_core_utilization_hours,
+        total_gpu_utilization_hours,
+        allocated_gpu_utilization_hours,
+        borrowed_gpu_utilization_hours,
+        total_vcpu_utilization_hours,
+        allocated_vcpu_utilization_hours,
+        borrowed_vcpu_utilization_hours,
+        year,
+        month,
+        day,
+        cluster
+    FROM utilization_calc;
+    """
+
+    NON_CRESCENDO_DETAILED = """
+        INSERT INTO "{database}".detailed_report
+        WITH latest_pod_state_changes AS (
+          SELECT *
+          FROM (
+            SELECT
+              *,
+              ROW_NUMBER() OVER (
+                PARTITION BY pod, timestamp, namespace, owner, instance_type
+                ORDER BY CAST(resource_version AS bigint) DESC
+              ) AS row_num
+            FROM (
+              SELECT pod, timestamp, namespace, resource_version, status, owner, instance_type,
+                  job_type, assigned_node, CPU, GPU, neuron_core, priority_class, year, month, day,
+                  cluster
+              FROM "{database}".pod
+              WHERE year = '{year}' AND month = '{month}' AND day = '{day}'
+              UNION ALL
+              -- States still open at the end of the previous day, carried in at midnight
+              SELECT pod, TIMESTAMP '{year}-{month}-{day} 00:00:00', namespace,
+                  resource_version, status, owner, instance_type, job_type, assigned_node, CPU, GPU,
+                  neuron_core, priority_class, '{year}', '{month}', '{day}', cluster
+              FROM "{database}".pod_checkpoint
+              WHERE year = '{prev_year}' AND month = '{prev_month}' AND day = '{prev_day}'
+            ) day_states
+          ) ranked
+          WHERE row_num = 1
+        ),
+        pod_state_changes AS (
+            SELECT DISTINCT
+                namespace, pod, timestamp, status, owner as task_name, instance_type, job_type,
+                assigned_node, CPU, GPU, neuron_core, priority_class, year, month, day, cluster
+            FROM latest_pod_state_changes
+            WHERE year = '{year}' AND month = '{month}' AND day = '{day}'
+        ),
+        running_periods AS (
+            SELECT 
+                namespace,
+                pod,
+                timestamp as period_start,
+                CASE 
+                    WHEN LEAD(timestamp) OVER(
+                        PARTITION BY pod, instance_type, year, month, day
+                        ORDER BY timestamp
+                    ) is NULL and status = 'Running' 
+                    THEN DATE_ADD('DAY', 1, DATE_TRUNC('DAY', timestamp))
+                    ELSE COALESCE(
+                        LEAD(timestamp) OVER(
+                            PARTITION BY pod, instance_type, year, month, day
+                            ORDER BY timestamp
+                        ), 
+                        timestamp
+                    ) 
+                  END as period_end,
+                status,
+                CASE 
+                    WHEN LEAD(status) OVER(
+                        PARTITION BY pod, instance_type, year, month, day
+                        ORDER BY timestamp
+                    ) is NULL and status = 'Running'
+                    THEN 'Running'
+                    ELSE LEAD(status) OVER(
+                        PARTITION BY pod, instance_type, year, month, day
+                        ORDER BY timestamp
+                    )
+                END as next_status,
+                task_name, instance_type, job_type, CPU, GPU, neuron_core, priority_class,
+                year, month, day, cluster
+            FROM pod_state_changes
+        ), 
+        filtered_running_periods AS (
+            SELECT 
+                *,
+                LAG(period_end) OVER (PARTITION BY pod ORDER BY period_start) AS prev_period_end
+            FROM running_periods
+            WHERE status = 'Running'
+        ),
+
+        running_grouped AS (
+            SELECT *,
+                CASE 
+                    WHEN prev_period_end IS NULL THEN 1
+                    WHEN date_diff('second', prev_period_end, period_start) > 0 THEN 1
+                    ELSE 0
+                END AS is_new_group
+            FROM filtered_running_periods
+        ),
+
+        grouped_with_ids AS (
+            SELECT *,
+                SUM(is_new_group) OVER (PARTITION BY pod ORDER BY period_start ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS group_id
+            FROM running_grouped
+        ),
+
+        continuous_running_periods AS (
+            SELECT
+                namespace,
+                pod,
+                group_id,
+                MIN(period_start) AS period_start,
+                MAX(period_end) AS period_end,
+                CASE 
+                    WHEN COUNT_IF(next_status = 'Succeeded') > 0 THEN 'Succeeded'
+                    WHEN COUNT_IF(next_status = 'Failed') > 0 or COUNT_IF(next_status is NULL) > 0 THEN 'Failed'
+                    WHEN bool_or(status = 'QuotaReserved-True' AND next_status = 'Evicted-True') THEN 'Preempted'
+                    ELSE 'Running'
+                END AS status,
+                task_name,
+                instance_type,
+                job_type,
+                CPU,
+                GPU,
+                neuron_core,
+                priority_class,
+                year,
+                month,
+                day,
+                cluster
+            FROM grouped_with_ids
+            GROUP BY
+                namespace,
+                pod,
+                group_id,
+                task_name,
+                instance_type,
+                job_type,
+                CPU,
+                GPU,
+                neuron_core,
+                priority_class,
+                year,
+                month,
+                day,
+                cluster
+        ),
+        team_grouped_utilization AS (
+            SELECT
+                pod,
+                namespace,
+                task_name,
+                group_id,
+                instance_type,
+                job_type,
+                MIN(period_start) AS period_start,
+                MAX(period_end) AS period_end,
+                MAX(status) AS status,
+                SUM(date_diff('second', period_start, period_end) / 3600.0 * CPU) AS cpu_utilization_hours,
+                SUM(date_diff('second', period_start, period_end) / 3600.0 * GPU) AS gpu_utilization_hours,
+                SUM(date_diff('second', period_start, period_end) / 3600.0 * neuron_core) AS neuron_utilization_hours,
+                COUNT(DISTINCT pod) AS pod_count,
+                MAX(CPU) AS cpu_count,
+                MAX(GPU) AS gpu_count,
+                MAX(neuron_core) AS neuron_count,
+                priority_class,
+                year,
+                month,
+                day,
+                cluster
+            FROM continuous_running_periods
+            GROUP BY 
+                pod, namespace, task_name, group_id, instance_type, job_type,
+                priority_class, year, month, day, cluster
+        )
+        SELECT
+            DATE(period_start) as report_date, period_start, period_end, namespace, '' as team,
+            task_name, instance_type as instance, pod_count as instance_count, status,
+            neuron_utilization_hours as utilized_neuron_core_hours,
+            CAST(neuron_count as double) as utilized_neuron_core_count,
+            gpu_utilization_hours as utilized_gpu_hours,
+            CAST(gpu_count as double) as utilized_gpu_count,
+            cpu_utilization_hours as utilized_vcpu_hours,
+            CAST(cpu_count as double) as utilized_vcpu_count,
+            priority_class, year, month, day, cluster
+        FROM team_grouped_utilization;
+    """
+
+
+class CheckpointType(Enum):
+    CLUSTERQUEUE = "clusterqueue_checkpoint"
+    WORKLOAD = "workload_checkpoint"
+    POD = "pod_checkpoint"
+
+
+# Latest state of every interval still open at the end of {day}, built from that day's
+# raw rows and the previous checkpoint. The aggregations of the next day start from it
+# at midnight instead of reading back into earlier raw partitions.
+class CheckpointTemplates:
+    CLUSTERQUEUE = """
+      INSERT INTO "{database}".clusterqueue_checkpoint
+      SELECT instance_type, timestamp, namespace, resource_version, team, gpu_total,
+          gpu_borrowed, cpu_total, cpu_borrowed, neuron_core_total, neuron_core_borrowed,
+          '{year}' AS year, '{month}' AS month, '{day}' AS day, cluster
+      FROM (
+        SELECT *, ROW_NUMBER() OVER (
+            PARTITION BY namespace, team, instance_type, cluster
+            ORDER BY timestamp DESC, CAST(resource_version AS bigint) DESC
+          ) AS row_num
+        FROM (
+          SELECT instance_type, timestamp, namespace, resource_version, team, gpu_total,
+              gpu_borrowed, cpu_total, cpu_borrowed, neuron_core_total, neuron_core_borrowed,
+              cluster
+          FROM "{database}".clusterqueue
+          WHERE year = '{year}' AND month = '{month}' AND day = '{day}'
+          UNION ALL
+          SELECT instance_type, timestamp, namespace, resource_version, team, gpu_total,
+              gpu_borrowed, cpu_total, cpu_borrowed, neuron_core_total, neuron_core_borrowed,
+              cluster
+          FROM "{database}".clusterqueue_checkpoint
+          WHERE year = '{prev_year}' AND month = '{prev_month}' AND day = '{prev_day}'
+        ) day_states
+      ) ranked
+      WHERE row_num = 1 AND (gpu_total > 0 OR cpu_total > 0 OR neuron_core_total > 0);
+    """
+    WORKLOAD = """
+      INSERT INTO "{database}".workload_checkpoint
+      SELECT workload_name, timestamp, namespace, resource_version, team, status,
+          task_priority_class, instance_type, CPU, GPU, neuron_core, admitted, finished,
+          '{year}' AS year, '{month}' AS month, '{day}' AS day, cluster
+      FROM (
+        SELECT *, ROW_NUMBER() OVER (
+            PARTITION BY workload_name, instance_type, cluster
+            ORDER BY timestamp DESC, CAST(resource_version AS bigint) DESC
+          ) AS row_num
+        FROM (
+          SELECT workload_name, timestamp, namespace, resource_version, team, status,
+              task_priority_class, instance_type, CPU, GPU, neuron_core, admitted, finished,
+              cluster
+          FROM "{database}".workload
+          WHERE year = '{year}' AND month = '{month}' AND day = '{day}'
+          UNION ALL
+          SELECT workload_name, timestamp, namespace, resource_version, team, status,
+              task_priority_class, instance_type, CPU, GPU, neuron_core, admitted, finished,
+              cluster
+          FROM "{database}".workload_checkpoint
+          WHERE year = '{prev_year}' AND month = '{prev_month}' AND day = '{prev_day}'
+        ) day_states
+      ) ranked
+      WHERE row_num = 1 AND status = 'QuotaReserved-True';
+    """
+    POD = """
+      INSERT INTO "{database}".pod_checkpoint
+      SELECT pod, timestamp, namespace, resource_version, status, owner, instance_type,
+          job_type, assigned_node, CPU, GPU, neuron_core, priority_class, '{year}' AS year,
+          '{month}' AS month, '{day}' AS day, cluster
+      FROM (
+        SELECT *, ROW_NUMBER() OVER (
+            PARTITION BY pod, instance_type, cluster
+            ORDER BY timestamp DESC, CAST(resource_version AS bigint) DESC
+          ) AS row_num
+        FROM (
+          SELECT pod, timestamp, namespace, resource_version, status, owner, instance_type,
+              job_type, assigned_node, CPU, GPU, neuron_core, priority_class, cluster
+          FROM "{database}".pod
+          WHERE year = '{year}' AND month = '{month}' AND day = '{day}'
+          UNION ALL
+          SELECT pod, timestamp, namespace, resource_version, status, owner, instance_type,
+              job_type, assigned_node, CPU, GPU, neuron_core, priority_class, cluster
+          FROM "{database}".pod_checkpoint
+          WHERE year = '{prev_year}' AND month = '{prev_month}' AND day = '{prev_day}'
+        ) day_states
+      ) ranked
+      WHERE row_num = 1 AND status = 'Running';
+    """
+
+class CatalogType(Enum):
+    REPORT_CATALOG = "report_catalog"
+
+
+# Row counts per report date, namespace and task of the report rows of {day}, read
+# by report generation to check namespace and task filters before querying reports.
+class CatalogTemplates:
+    REPORT_CATALOG = """
+      INSERT INTO "{database}".report_catalog
+      SELECT report_date, namespace, CAST(NULL AS varchar) AS task_name, 'summary' AS report_type,
+          COUNT(*) AS row_count, year, month, day, cluster
+      FROM "{database}".summary_report
+      WHERE year = '{year}' AND month = '{month}' AND day = '{day}'
+      GROUP BY report_date, namespace, year, month, day, cluster
+      UNION ALL
+      SELECT report_date, namespace, task_name, 'detailed' AS report_type,
+          COUNT(*) AS row_count, year, month, day, cluster
+      FROM "{database}".detailed_report
+      WHERE year = '{year}' AND month = '{month}' AND day = '{day}'
+      GROUP BY report_date, namespace, task_name, year, month, day, cluster;
+    """
+
+# Each report table's aggregations are combined into one INSERT, so a day's rows are
+# written in a single sorted pass instead of one unordered write per aggregation
+class ReportTable(Enum):
+    SUMMARY = 'summary_report'
+    DETAILED = 'detailed_report'
+
+
+# Aggregations written to each report table, and the order their rows are written
+# in so that Parquet statistics let namespace and task filters skip row groups
+REPORT_AGGREGATIONS = {
+    ReportTable.SUMMARY: (
+        [QueryType.CRESCENDO_SUMMARY, QueryType.NON_CRESCENDO_SUMMARY],
+        'namespace, team, report_date, instance_type'
+    ),
+    ReportTable.DETAILED: (
+        [QueryType.CRESCENDO_DETAILED, QueryType.NON_CRESCENDO_DETAILED],
+        'namespace, task_name, report_date, instance'
+    )
+}
+
+
+def combine_report_query(report_table, query_templates, order_by):
+    """One INSERT writing the rows of several aggregations into a report table"""
+    # Everything after each template's INSERT line is the query producing its rows
+    queries = [query_template.strip().split('\n', 1)[1].strip().rstrip(';') for query_template in query_templates]
+    return (
+        f'INSERT INTO "{DATABASE_PLACEHOLDER}".' + report_table.value + '\n'
+        + '\nUNION ALL\n'.join(f"SELECT * FROM (\n{query}\n)" for query in queries)
+        + f"\nORDER BY {order_by}"
+    )
+
+
+TEMPLATES = {
+    QueryType.CRESCENDO_SUMMARY: QueryTemplates.CRESCENDO_SUMMARY,
+    QueryType.CRESCENDO_DETAILED: QueryTemplates.CRESCENDO_DETAILED,
+    QueryType.NON_CRESCENDO_SUMMARY: QueryTemplates.NON_CRESCENDO_SUMMARY,
+    QueryType.NON_CRESCENDO_DETAILED: QueryTemplates.NON_CRESCENDO_DETAILED,
+    CheckpointType.CLUSTERQUEUE: CheckpointTemplates.CLUSTERQUEUE,
+    CheckpointType.WORKLOAD: CheckpointTemplates.WORKLOAD,
+    CheckpointType.POD: CheckpointTemplates.POD,
+    CatalogType.REPORT_CATALOG: CatalogTemplates.REPORT_CATALOG
+}
+# The Lambda runs these combined INSERTs rather than the separate aggregations
+TEMPLATES.update({
+    report_table: combine_report_query(report_table, [TEMPLATES[query_type] for query_type in query_types], order_by)
+    for report_table, (query_types, order_by) in REPORT_AGGREGATIONS.items()
+})
+
+
+def fill_template(query_template, day, database):
+    """A template's query for one day of a database"""
+    # Raw tables are read for the target day only; the intervals still open at the end
+    # of the previous day come from its checkpoint partition ({prev_year} etc.)
+    previous_day = day - timedelta(days=1)
+    return query_template.replace(DATABASE_PLACEHOLDER, database)\
+                         .replace('{year}', day.strftime('%Y'))\
+                         .replace('{month}', day.strftime('%m'))\
+                         .replace('{day}', day.strftime('%d'))\
+                         .replace('{prev_year}', previous_day.strftime('%Y'))\
+                         .replace('{prev_month}', previous_day.strftime('%m'))\
+                         .replace('{prev_day}', previous_day.strftime('%d'))
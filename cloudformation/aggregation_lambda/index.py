@@ -0,0 +1,772 @@
+import boto3
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from aggregation_sql import (
+    RAW_TABLES,
+    TEMPLATES,
+    CatalogType,
+    CheckpointType,
+    QueryType,
+    ReportTable,
+    fill_template
+)
+
+# Glue database and report bucket of the stack, set by the CloudFormation template
+DATABASE = os.environ['USAGE_REPORT_DATABASE']
+BUCKET = os.environ['USAGE_REPORT_BUCKET']
+
+# Polling interval for in-flight queries, doubled up to the maximum while they run
+POLL_INITIAL_SECONDS = 0.5
+POLL_MAX_SECONDS = 10
+# Most execution ids accepted by one BatchGetQueryExecution call
+BATCH_GET_LIMIT = 50
+
+# Days aggregated at once during a backfill or catch-up, each running four queries
+MAX_PARALLEL_DAYS = 4
+# Longest catch-up after missed nights; older gaps need an explicit backfill
+MAX_CATCH_UP_DAYS = 31
+# A day is not started with less Lambda time left than this
+MIN_REMAINING_SECONDS = 120
+# Last day aggregated without gaps, kept in the report bucket
+WATERMARK_KEY = 'state/aggregation-watermark.json'
+# Report table locations cleared before a day is aggregated again
+REPORT_PREFIXES = ['reports/summary/', 'reports/detailed/', 'reports/catalog/']
+# Checkpoint table locations, rebuilt each time a day is aggregated
+CHECKPOINT_PREFIXES = ['checkpoints/clusterqueue/', 'checkpoints/workload/', 'checkpoints/pod/']
+# One marker per completed checkpoint; a day with no open intervals writes no checkpoint files
+CHECKPOINT_MARKER_PREFIX = 'state/checkpoints/'
+
+# Days after which a raw day is closed and its small files are compacted
+COMPACTION_DELAY_DAYS = 2
+# Directory, next to the hour partitions of a day, holding the compacted copies
+COMPACTED_DIRECTORY = 'compacted-'
+# Most partitions one CTAS query may write
+MAX_CTAS_PARTITIONS = 100
+# Most partitions one BatchUpdatePartition call accepts
+GLUE_BATCH_LIMIT = 100
+# Most keys one DeleteObjects call accepts
+S3_DELETE_LIMIT = 1000
+# Copies made of a table's partitions while new files keep arriving during the copy
+MAX_COMPACTION_ATTEMPTS = 3
+# Compactions whose original files are kept until no query planned before the swap can read them
+COMPACTION_PENDING_PREFIX = 'state/compaction/'
+# How long the original files outlive the swap; longer than any aggregation query runs
+ORIGINALS_RETENTION_SECONDS = 3600
+# Markers of the days being compacted or aggregated, which must not overlap
+DAY_LOCK_PREFIX = 'state/locks/'
+# Locks older than the Lambda timeout were left by an invocation that did not finish
+DAY_LOCK_TTL_SECONDS = 900
+
+class AthenaQueryExecutor:
+    def __init__(self, dry_run):
+        self.athena = boto3.client('athena')
+        self.s3 = boto3.client('s3')
+        self.glue = boto3.client('glue')
+        self.bucket = BUCKET
+        self.output_location = f"s3://{BUCKET}/athena-results"
+        self.yesterday = (datetime.now() - timedelta(days=1)).date() if not dry_run else datetime.now().date()
+        self.query_mapping = dict(TEMPLATES)
+
+    def wait_for_queries(self, query_execution_ids):
+        """Poll every in-flight query with backoff until all have finished"""
+        finished = {}
+        pending = list(query_execution_ids)
+        delay = POLL_INITIAL_SECONDS
+        while pending:
+            for start in range(0, len(pending), BATCH_GET_LIMIT):
+                response = self.athena.batch_get_query_execution(
+                    QueryExecutionIds=pending[start:start + BATCH_GET_LIMIT]
+                )
+                for execution in response['QueryExecutions']:
+                    status = execution['Status']['State']
+                    if status in ['SUCCEEDED', 'FAILED', 'CANCELLED']:
+                        finished[execution['QueryExecutionId']] = (status, {'QueryExecution': execution})
+            pending = [query_execution_id for query_execution_id in pending if query_execution_id not in finished]
+            if pending:
+                time.sleep(delay)
+                delay = min(delay * 2, POLL_MAX_SECONDS)
+        return finished
+
+    def wait_for_query_completion(self, query_execution_id):
+        return self.wait_for_queries([query_execution_id])[query_execution_id]
+
+    def start_query(self, query):
+        response = self.athena.start_query_execution(
+            QueryString=query,
+            QueryExecutionContext={'Database': DATABASE},
+            ResultConfiguration={'OutputLocation': self.output_location}
+        )
+        return response['QueryExecutionId']
+
+    def execute_query(self, query):
+        query_execution_id = self.start_query(query)
+        status, query_status = self.wait_for_query_completion(query_execution_id)
+        return status, query_status, query_execution_id
+
+    def format_response(self, query_type, status, query_status, query_execution_id, day=None):
+        day = day or self.yesterday
+        if status == 'SUCCEEDED':
+            return {
+                'queryType': query_type.value,
+                'status': 'SUCCESS',
+                'message': f"Data aggregation completed for {day}",
+                'queryExecutionId': query_execution_id
+            }
+        else:
+            error_message = query_status['QueryExecution']['Status'].get('StateChangeReason', 'Unknown error')
+            print(f"Query failed for {query_type.value} on {day}: {error_message}")
+            return {
+                'queryType': query_type.value,
+                'status': 'FAILED',
+                'message': f"Data aggregation failed: {error_message}",
+                'queryExecutionId': query_execution_id
+            }
+
+    def get_query_template(self, query_type: QueryType) -> str:
+        return self.query_mapping.get(query_type, "")
+
+    def prepare_query(self, query_template: str, day=None) -> str:
+        return fill_template(query_template, day or self.yesterday, DATABASE)
+
+    def list_prefixes(self, prefix):
+        """Keys of the prefixes directly below an S3 prefix"""
+        prefixes = []
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix, Delimiter='/'):
+            prefixes.extend(common_prefix['Prefix'] for common_prefix in page.get('CommonPrefixes', []))
+        return prefixes
+
+    def list_partition_values(self, prefix):
+        """Values of the key=value prefixes directly below an S3 prefix"""
+        values = []
+        for child_prefix in self.list_prefixes(prefix):
+            name = child_prefix[len(prefix):].rstrip('/')
+            if '=' in name:
+                values.append(name.split('=', 1)[1])
+        return values
+
+    def list_day_partitions(self, table, day):
+        """Partition values and S3 prefixes of one table for one day"""
+        day_prefix = f"raw/{table}/year={day.strftime('%Y')}/month={day.strftime('%m')}/day={day.strftime('%d')}/"
+        day_values = [('year', day.strftime('%Y')), ('month', day.strftime('%m')), ('day', day.strftime('%d'))]
+        partitions = []
+        for hour in self.list_partition_values(day_prefix):
+            hour_prefix = f"{day_prefix}hour={hour}/"
+            hour_values = day_values + [('hour', hour)]
+            if not RAW_TABLES[table]:
+                partitions.append((hour_values, hour_prefix))
+                continue
+            for cluster in self.list_partition_values(hour_prefix):
+                partitions.append((hour_values + [('cluster', cluster)], f"{hour_prefix}cluster={cluster}/"))
+        return partitions
+
+    def register_partitions(self, table, day) -> bool:
+        """Add the hour partitions of one day that exist in S3 but not in the catalog"""
+        partitions = self.list_day_partitions(table, day)
+        if not partitions:
+            print(f"No data for {table} on {day.strftime('%Y-%m-%d')}")
+            return True
+        clauses = []
+        for values, prefix in partitions:
+            spec = ', '.join(f"{key} = '{value}'" for key, value in values)
+            clauses.append(f"PARTITION ({spec}) LOCATION 's3://{self.bucket}/{prefix}'")
+        query = f"ALTER TABLE {table} ADD IF NOT EXISTS " + ' '.join(clauses)
+        status, query_status, query_execution_id = self.execute_query(query)
+        if status != 'SUCCEEDED':
+            error_message = query_status['QueryExecution']['Status'].get('StateChangeReason', 'Unknown error')
+            print(f"Partition registration failed for {table}: {error_message}")
+            return False
+        return True
+
+    def repair_tables(self, day=None) -> bool:
+        day = day or self.yesterday
+        # Only the target day is listed and registered, so the time taken does not grow
+        # with the retained history the way MSCK REPAIR TABLE does
+        with ThreadPoolExecutor(max_workers=len(RAW_TABLES)) as pool:
+            results = list(pool.map(lambda table: self.register_partitions(table, day), RAW_TABLES))
+        return all(results)
+
+    def delete_prefix(self, prefix):
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            keys = [{'Key': obj['Key']} for obj in page.get('Contents', [])]
+            if keys:
+                self.s3.delete_objects(Bucket=self.bucket, Delete={'Objects': keys, 'Quiet': True})
+
+    def list_keys(self, prefix):
+        """Keys of every object below an S3 prefix"""
+        keys = []
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            keys.extend(obj['Key'] for obj in page.get('Contents', []))
+        return keys
+
+    def delete_keys(self, keys):
+        for start in range(0, len(keys), S3_DELETE_LIMIT):
+            self.s3.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in keys[start:start + S3_DELETE_LIMIT]], 'Quiet': True}
+            )
+
+    def read_json(self, key):
+        """Parsed JSON object at a key, or None when there is none"""
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=key)
+        except self.s3.exceptions.NoSuchKey:
+            return None
+        return json.loads(response['Body'].read())
+
+    def acquire_day_lock(self, day, activity):
+        """Mark a day as in use by an activity, unless another activity holds it
+
+        Compaction and aggregation of the same day exclude each other; runs of the
+        same activity do not. The lock is written before the others are checked, so
+        of two activities starting together at least one sees the other and backs
+        off. Returns the lock key, or None when the day is in use.
+        """
+        day_prefix = f"{DAY_LOCK_PREFIX}{day}/"
+        key = f"{day_prefix}{activity}-{uuid.uuid4().hex}.json"
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=json.dumps({'activity': activity, 'acquired_at': time.time()}).encode('utf-8'),
+            ContentType='application/json'
+        )
+        for other_key in self.list_keys(day_prefix):
+            lock = self.read_json(other_key) if other_key != key else None
+            if lock and lock['activity'] != activity and time.time() - lock['acquired_at'] < DAY_LOCK_TTL_SECONDS:
+                self.release_day_lock(key)
+                return None
+        return key
+
+    def release_day_lock(self, key):
+        self.s3.delete_object(Bucket=self.bucket, Key=key)
+
+    def clear_day_partitions(self, day, table_prefixes):
+        day_path = f"year={day.strftime('%Y')}/month={day.strftime('%m')}/day={day.strftime('%d')}/"
+        for table_prefix in table_prefixes:
+            self.delete_prefix(table_prefix + day_path)
+
+    def get_partitions(self, table, day):
+        expression = f"year = '{day.strftime('%Y')}' AND month = '{day.strftime('%m')}' AND day = '{day.strftime('%d')}'"
+        partitions = []
+        paginator = self.glue.get_paginator('get_partitions')
+        for page in paginator.paginate(DatabaseName=DATABASE, TableName=table, Expression=expression):
+            partitions.extend(page['Partitions'])
+        return partitions
+
+    def clear_report_partitions(self, day):
+        """Delete the report rows already written for a day, so it can be aggregated again"""
+        self.clear_day_partitions(day, REPORT_PREFIXES)
+
+    def start_aggregation(self, query_type: QueryType, day=None):
+        """Submit one aggregation, returning its execution id or an error response"""
+        try:
+            query_template = self.get_query_template(query_type)
+            if not query_template:
+                return None, {
+                    'queryType': query_type.value,
+                    'status': 'ERROR',
+                    'message': f"No query template found for {query_type.value}",
+                    'queryExecutionId': None
+                }
+            query = self.prepare_query(query_template, day)
+            return self.start_query(query), None
+        except Exception as e:
+            return None, {
+                'queryType': query_type.value,
+                'status': 'ERROR',
+                'message': f"Execution error: {str(e)}",
+                'queryExecutionId': None
+            }
+
+    def execute_aggregations(self, query_types, day=None):
+        """Run independent aggregations concurrently and report each one's result"""
+        started = [(query_type,) + self.start_aggregation(query_type, day) for query_type in query_types]
+        query_execution_ids = [query_execution_id for _, query_execution_id, _ in started if query_execution_id]
+        try:
+            finished = self.wait_for_queries(query_execution_ids)
+        except Exception as e:
+            finished = {}
+            print(f"Polling aggregations failed: {str(e)}")
+        results = []
+        for query_type, query_execution_id, error in started:
+            if error is not None:
+                results.append(error)
+            elif query_execution_id not in finished:
+                results.append({
+                    'queryType': query_type.value,
+                    'status': 'ERROR',
+                    'message': "Execution error: query status unavailable",
+                    'queryExecutionId': query_execution_id
+                })
+            else:
+                status, query_status = finished[query_execution_id]
+                results.append(self.format_response(query_type, status, query_status, query_execution_id, day))
+        return results
+
+    def execute_aggregation(self, query_type: QueryType):
+        return self.execute_aggregations([query_type])[0]
+
+    def day_result(self, day, results, status=None, message=None):
+        failed = [result for result in results if result['status'] != 'SUCCESS']
+        return {
+            'day': str(day),
+            'status': status or ('FAILED' if failed else 'SUCCESS'),
+            'message': message or '; '.join(f"{result['queryType']}: {result['message']}" for result in failed),
+            'results': results
+        }
+
+    def has_time_left(self, context):
+        return context is None or context.get_remaining_time_in_millis() >= MIN_REMAINING_SECONDS * 1000
+
+    def checkpoint_marker_key(self, day):
+        return f"{CHECKPOINT_MARKER_PREFIX}{day}.json"
+
+    def has_checkpoint(self, day):
+        try:
+            self.s3.get_object(Bucket=self.bucket, Key=self.checkpoint_marker_key(day))
+        except self.s3.exceptions.NoSuchKey:
+            return False
+        return True
+
+    def checkpoint_day(self, day):
+        """Rebuild the open intervals at the end of a day from its raw rows and the previous checkpoint"""
+        try:
+            # A partly rebuilt checkpoint must not pass for a complete one
+            self.s3.delete_object(Bucket=self.bucket, Key=self.checkpoint_marker_key(day))
+            self.clear_day_partitions(day, CHECKPOINT_PREFIXES)
+        except Exception as e:
+            return self.day_result(day, [], 'FAILED', f"Execution error: {str(e)}")
+        day_result = self.day_result(day, self.execute_aggregations(list(CheckpointType), day))
+        if day_result['status'] == 'SUCCESS':
+            self.s3.put_object(
+                Bucket=self.bucket,
+                Key=self.checkpoint_marker_key(day),
+                Body=json.dumps({'checkpointed_at': datetime.now().isoformat()}).encode('utf-8'),
+                ContentType='application/json'
+            )
+        return day_result
+
+    def ensure_previous_checkpoint(self, day):
+        """Build the checkpoint of the day before when it was never written
+
+        Days aggregated before checkpoints existed, and the day before the first
+        aggregated day, have none. Their checkpoint is then built from their own raw
+        rows, which is the one-day lookback the aggregations used before checkpoints.
+        Returns the result of building it, or None when it already exists.
+        """
+        previous_day = day - timedelta(days=1)
+        if self.has_checkpoint(previous_day):
+            return None
+        print(f"No checkpoint for {previous_day}, building it from its raw data")
+        if not self.repair_tables(previous_day):
+            return self.day_result(previous_day, [], 'FAILED', "Failed to repair database tables for querying.")
+        return self.checkpoint_day(previous_day)
+
+    def aggregate_day(self, day, context=None):
+        """Clear and aggregate one registered day; safe to run again for the same day"""
+        if not self.has_time_left(context):
+            return self.day_result(day, [], 'SKIPPED', "Not enough time left in this invocation")
+        try:
+            self.clear_report_partitions(day)
+        except Exception as e:
+            return self.day_result(day, [], 'FAILED', f"Execution error: {str(e)}")
+        results = self.execute_aggregations(list(ReportTable), day)
+        # The catalog counts the report rows, so it is built once they are all written
+        if all(result['status'] == 'SUCCESS' for result in results):
+            results += self.execute_aggregations(list(CatalogType), day)
+        return self.day_result(day, results)
+
+    def aggregate_days(self, days, max_parallel_days=MAX_PARALLEL_DAYS, context=None):
+        """Register and checkpoint the days in order, then aggregate them in parallel
+
+        Each day's aggregations and checkpoint start from the checkpoint of the day
+        before, so a day whose predecessor in the run failed is not aggregated. The
+        checkpoint before the first day is built first when it is missing. Days being
+        compacted are skipped, along with the days after them.
+        """
+        if not days:
+            return []
+        days = sorted(days)
+        locks = {day: self.acquire_day_lock(day, 'aggregation') for day in days}
+        try:
+            workers = max(1, min(max_parallel_days, len(days)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                repaired = list(pool.map(self.repair_tables, days))
+            blocked = {}
+            checkpoints = {}
+            previous = self.ensure_previous_checkpoint(days[0])
+            if previous is not None and previous['status'] != 'SUCCESS':
+                blocked[days[0]] = self.day_result(days[0], previous['results'], 'FAILED', f"No checkpoint of {previous['day']} to start from: {previous['message']}")
+            for day, is_repaired in zip(days, repaired):
+                if day in blocked:
+                    continue
+                if blocked:
+                    blocked[day] = self.day_result(day, [], 'SKIPPED', "The previous day has no checkpoint to start from")
+                elif not self.has_time_left(context):
+                    blocked[day] = self.day_result(day, [], 'SKIPPED', "Not enough time left in this invocation")
+                elif locks[day] is None:
+                    blocked[day] = self.day_result(day, [], 'SKIPPED', "The raw data of the day is being compacted")
+                elif not is_repaired:
+                    blocked[day] = self.day_result(day, [], 'FAILED', "Failed to repair database tables for querying.")
+                else:
+                    checkpoints[day] = self.checkpoint_day(day)
+                    if day == days[0] and previous is not None:
+                        checkpoints[day]['results'] = previous['results'] + checkpoints[day]['results']
+                    # Without its checkpoint the day cannot be the start of the next run
+                    if checkpoints[day]['status'] != 'SUCCESS':
+                        blocked[day] = checkpoints[day]
+            runnable = [day for day in days if day not in blocked]
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                aggregated = dict(zip(runnable, pool.map(lambda day: self.aggregate_day(day, context), runnable)))
+            day_results = []
+            for day in days:
+                if day in blocked:
+                    day_results.append(blocked[day])
+                else:
+                    day_result = aggregated[day]
+                    day_result['results'] = checkpoints[day]['results'] + day_result['results']
+                    day_results.append(day_result)
+            return day_results
+        finally:
+            for lock in locks.values():
+                if lock is not None:
+                    self.release_day_lock(lock)
+
+    def read_watermark(self):
+        """Last day aggregated without gaps, or None before the first run"""
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=WATERMARK_KEY)
+        except self.s3.exceptions.NoSuchKey:
+            return None
+        watermark = json.loads(response['Body'].read())
+        return datetime.strptime(watermark['last_aggregated_day'], '%Y-%m-%d').date()
+
+    def write_watermark(self, day):
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=WATERMARK_KEY,
+            Body=json.dumps({'last_aggregated_day': str(day)}).encode('utf-8'),
+            ContentType='application/json'
+        )
+
+    def catch_up_days(self):
+        """Yesterday plus any days missed since the watermark, up to MAX_CATCH_UP_DAYS"""
+        watermark = self.read_watermark()
+        if watermark is None:
+            return [self.yesterday]
+        first_day = max(watermark + timedelta(days=1), self.yesterday - timedelta(days=MAX_CATCH_UP_DAYS - 1))
+        return date_range(first_day, self.yesterday)
+
+    def advance_watermark(self, day_results):
+        """Move the watermark over the days that now continue it without a gap"""
+        watermark = original = self.read_watermark()
+        for day_result in sorted(day_results, key=lambda result: result['day']):
+            day = datetime.strptime(day_result['day'], '%Y-%m-%d').date()
+            if watermark is not None and day <= watermark:
+                continue
+            if day_result['status'] != 'SUCCESS':
+                break
+            if watermark is not None and day != watermark + timedelta(days=1):
+                break
+            watermark = day
+        if watermark != original:
+            self.write_watermark(watermark)
+        return watermark
+
+def key_prefix(location):
+    """Keys below s3://<bucket>/, with a trailing slash so cluster=a does not match cluster=ab"""
+    return (location.rstrip('/') + '/').split('/', 3)[3]
+
+class RawPartitionCompactor:
+    """Rewrites a closed day's small raw files into one Parquet file per partition
+
+    Each table's partitions for the day are copied with CTAS into a fresh prefix
+    next to the raw data, and the catalog partitions are repointed at the copies
+    in one batch. A copy is made again when files arrive during the copy. The
+    original files are kept until a compaction run at least
+    ORIGINALS_RETENTION_SECONDS later, so queries planned before the swap can
+    finish. A partition that gained files after the swap is then pointed back at
+    its original files and compacted again.
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.glue = boto3.client('glue')
+
+    def chunk_partitions(self, partitions):
+        """Group partitions by hour into chunks a single CTAS can write"""
+        by_hour = {}
+        for partition in partitions:
+            by_hour.setdefault(partition['Values'][3], []).append(partition)
+        chunks = [[]]
+        for hour in sorted(by_hour):
+            if chunks[-1] and len(chunks[-1]) + len(by_hour[hour]) > MAX_CTAS_PARTITIONS:
+                chunks.append([])
+            chunks[-1].extend(by_hour[hour])
+        return chunks
+
+    def copy_partitions(self, table, day, partitions, table_info):
+        """CTAS copies of the partitions, returning their prefix and new locations, or None"""
+        columns = [column['Name'] for column in table_info['StorageDescriptor']['Columns']]
+        # year, month and day are fixed for the run; the remaining keys partition the copy
+        partition_keys = [key['Name'] for key in table_info['PartitionKeys']][3:]
+        select_list = ', '.join(f'"{name}"' for name in columns + partition_keys)
+        partitioned_by = ', '.join(f"'{name}'" for name in partition_keys)
+
+        token = int(time.time() * 1000)
+        day_prefix = f"raw/{table}/year={day.strftime('%Y')}/month={day.strftime('%m')}/day={day.strftime('%d')}/"
+        run_prefix = f"{day_prefix}{COMPACTED_DIRECTORY}{token}/"
+        temp_tables = []
+        queries = []
+        new_locations = {}
+        for index, chunk in enumerate(self.chunk_partitions(partitions)):
+            temp_table = f"compaction_{table}_{day.strftime('%Y%m%d')}_{token}_{index}"
+            chunk_location = f"s3://{self.executor.bucket}/{run_prefix}part-{index}/"
+            hours = ', '.join(f"'{hour}'" for hour in sorted({partition['Values'][3] for partition in chunk}))
+            temp_tables.append(temp_table)
+            # One bucket per partition makes each partition a single file
+            queries.append(f"""
+                CREATE TABLE {temp_table}
+                WITH (
+                    format = 'PARQUET',
+                    write_compression = 'SNAPPY',
+                    external_location = '{chunk_location}',
+                    partitioned_by = ARRAY[{partitioned_by}],
+                    bucketed_by = ARRAY['{columns[0]}'],
+                    bucket_count = 1
+                ) AS
+                SELECT {select_list}
+                FROM {table}
+                WHERE year = '{day.strftime('%Y')}' AND month = '{day.strftime('%m')}' AND day = '{day.strftime('%d')}'
+                  AND hour IN ({hours})
+            """)
+            for partition in chunk:
+                suffix = ''.join(f"{key}={value}/" for key, value in zip(partition_keys, partition['Values'][3:]))
+                new_locations[tuple(partition['Values'])] = chunk_location + suffix
+
+        try:
+            finished = self.executor.wait_for_queries([self.executor.start_query(query) for query in queries])
+            failed = [query_status for status, query_status in finished.values() if status != 'SUCCEEDED']
+            if failed:
+                error_message = failed[0]['QueryExecution']['Status'].get('StateChangeReason', 'Unknown error')
+                print(f"Compaction failed for {table} on {day}: {error_message}")
+                self.executor.delete_prefix(run_prefix)
+                return None
+            return run_prefix, new_locations
+        finally:
+            for temp_table in temp_tables:
+                try:
+                    self.glue.delete_table(DatabaseName=DATABASE, Name=temp_table)
+                except self.glue.exceptions.EntityNotFoundException:
+                    pass
+
+    def repoint_partitions(self, table, partitions, new_locations):
+        """Point catalog partitions at new locations, returning the values of those that failed"""
+        entries = []
+        for partition in partitions:
+            storage_descriptor = dict(partition['StorageDescriptor'])
+            storage_descriptor['Location'] = new_locations[tuple(partition['Values'])]
+            entries.append({
+                'PartitionValueList': partition['Values'],
+                'PartitionInput': {
+                    'Values': partition['Values'],
+                    'StorageDescriptor': storage_descriptor,
+                    'Parameters': partition.get('Parameters', {})
+                }
+            })
+        failed = set()
+        for start in range(0, len(entries), GLUE_BATCH_LIMIT):
+            response = self.glue.batch_update_partition(
+                DatabaseName=DATABASE,
+                TableName=table,
+                Entries=entries[start:start + GLUE_BATCH_LIMIT]
+            )
+            for error in response.get('Errors', []):
+                print(f"Partition swap failed for {table} {error['PartitionValueList']}: {error.get('ErrorDetail')}")
+                failed.add(tuple(error['PartitionValueList']))
+        return failed
+
+    def compact_table(self, table, day) -> bool:
+        partitions = [
+            partition for partition in self.executor.get_partitions(table, day)
+            if COMPACTED_DIRECTORY not in partition['StorageDescriptor']['Location']
+        ]
+        if not partitions:
+            print(f"Nothing to compact for {table} on {day}")
+            return True
+
+        table_info = self.glue.get_table(DatabaseName=DATABASE, Name=table)['Table']
+        prefixes = {tuple(partition['Values']): key_prefix(partition['StorageDescriptor']['Location']) for partition in partitions}
+        for attempt in range(MAX_COMPACTION_ATTEMPTS):
+            originals = {values: self.executor.list_keys(prefix) for values, prefix in prefixes.items()}
+            copied = self.copy_partitions(table, day, partitions, table_info)
+            if copied is None:
+                return False
+            run_prefix, new_locations = copied
+            # A file written during the copy may be missing from it
+            late = [values for values, prefix in prefixes.items() if set(self.executor.list_keys(prefix)) - set(originals[values])]
+            if not late:
+                break
+            print(f"New files arrived in {len(late)} partitions of {table} on {day} during compaction")
+            self.executor.delete_prefix(run_prefix)
+        else:
+            print(f"Compaction of {table} on {day} stopped after {MAX_COMPACTION_ATTEMPTS} attempts")
+            return False
+
+        failed = self.repoint_partitions(table, partitions, new_locations)
+        swapped = [values for values in prefixes if values not in failed]
+        # The originals stay readable for queries planned before the swap
+        self.executor.s3.put_object(
+            Bucket=self.executor.bucket,
+            Key=f"{COMPACTION_PENDING_PREFIX}{table}/{day}/{run_prefix.rstrip('/').rsplit('/', 1)[1]}.json",
+            Body=json.dumps({
+                'table': table,
+                'day': str(day),
+                'swapped_at': time.time(),
+                'partitions': [{
+                    'values': list(values),
+                    'original': prefixes[values],
+                    'compacted': key_prefix(new_locations[values]),
+                    'keys': originals[values]
+                } for values in swapped]
+            }).encode('utf-8'),
+            ContentType='application/json'
+        )
+        for values in failed:
+            self.executor.delete_prefix(key_prefix(new_locations[values]))
+        print(f"Compacted {len(swapped)} of {len(partitions)} partitions of {table} on {day}")
+        return not failed
+
+    def delete_originals(self):
+        """Delete the original files of earlier compactions that no query can still read
+
+        A partition whose original prefix gained files after its copy was made is
+        pointed back at the original files, which hold every row, and its copy is
+        deleted instead. Returns the days left with partitions to compact again.
+        """
+        recompact = set()
+        for record_key in self.executor.list_keys(COMPACTION_PENDING_PREFIX):
+            record = self.executor.read_json(record_key)
+            if record is None or time.time() - record['swapped_at'] < ORIGINALS_RETENTION_SECONDS:
+                continue
+            day = datetime.strptime(record['day'], '%Y-%m-%d').date()
+            restored = {}
+            for partition in record['partitions']:
+                if set(self.executor.list_keys(partition['original'])) - set(partition['keys']):
+                    restored[tuple(partition['values'])] = partition
+                else:
+                    self.executor.delete_keys(partition['keys'])
+            if restored:
+                print(f"Files arrived after compaction in {len(restored)} partitions of {record['table']} on {day}")
+                # Deleting the copies would fail an aggregation reading them; the next run tries again
+                lock = self.executor.acquire_day_lock(day, 'compaction')
+                if lock is None:
+                    continue
+                try:
+                    current = [partition for partition in self.executor.get_partitions(record['table'], day) if tuple(partition['Values']) in restored]
+                    failed = self.repoint_partitions(record['table'], current, {
+                        values: f"s3://{self.executor.bucket}/{partition['original']}" for values, partition in restored.items()
+                    })
+                    if failed:
+                        continue
+                    for partition in restored.values():
+                        self.executor.delete_prefix(partition['compacted'])
+                finally:
+                    self.executor.release_day_lock(lock)
+                recompact.add(day)
+            self.executor.s3.delete_object(Bucket=self.executor.bucket, Key=record_key)
+        return recompact
+
+    def compact_day(self, day) -> bool:
+        lock = self.executor.acquire_day_lock(day, 'compaction')
+        if lock is None:
+            print(f"Compaction of {day} skipped while the day is being aggregated")
+            return False
+        try:
+            with ThreadPoolExecutor(max_workers=len(RAW_TABLES)) as pool:
+                results = list(pool.map(lambda table: self.compact_table(table, day), RAW_TABLES))
+            return all(results)
+        finally:
+            self.executor.release_day_lock(lock)
+
+def date_range(start_day, end_day):
+    days = []
+    day = start_day
+    while day <= end_day:
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+def aggregate_all_data(event, context):
+    """
+    Main handler that aggregates yesterday and any days missed since the watermark,
+    or the days of a backfill range, with each day's queries run in parallel
+    """
+    dry_run = event.get('dry_run', False)
+    executor = AthenaQueryExecutor(dry_run)
+    if event.get('mode') == 'compact':
+        try:
+            day = datetime.strptime(event['date'], '%Y-%m-%d').date() if 'date' in event \
+                else datetime.now().date() - timedelta(days=COMPACTION_DELAY_DAYS)
+        except ValueError as e:
+            return {
+                'statusCode': 400,
+                'body': f"Compaction needs date as YYYY-MM-DD: {str(e)}"
+            }
+        compactor = RawPartitionCompactor(executor)
+        # Days whose late files put partitions back on their original files are compacted again
+        days = sorted(compactor.delete_originals() | {day})
+        failed = [str(compacted_day) for compacted_day in days if not compactor.compact_day(compacted_day)]
+        if failed:
+            return {
+                'statusCode': 500,
+                'body': f"Raw data compaction failed for {', '.join(failed)}"
+            }
+        return {
+            'statusCode': 200,
+            'body': f"Raw data compaction completed for {', '.join(str(compacted_day) for compacted_day in days)}"
+        }
+    if event.get('mode') == 'backfill':
+        try:
+            days = date_range(
+                datetime.strptime(event['start_date'], '%Y-%m-%d').date(),
+                datetime.strptime(event['end_date'], '%Y-%m-%d').date()
+            )
+        except (KeyError, ValueError) as e:
+            return {
+                'statusCode': 400,
+                'body': f"Backfill needs start_date and end_date as YYYY-MM-DD: {str(e)}"
+            }
+    elif dry_run:
+        days = [executor.yesterday]
+    else:
+        days = executor.catch_up_days()
+
+    day_results = executor.aggregate_days(days, int(event.get('max_parallel_days', MAX_PARALLEL_DAYS)), context)
+    watermark = executor.read_watermark() if dry_run else executor.advance_watermark(day_results)
+    results = [result for day_result in day_results for result in day_result['results']]
+    incomplete = [day_result for day_result in day_results if day_result['status'] != 'SUCCESS']
+    if incomplete:
+        return {
+            'statusCode': 500,
+            'body': "Report aggregation failed: " + '; '.join(
+                f"{day_result['day']} {day_result['status'].lower()}: {day_result['message']}" for day_result in incomplete
+            ),
+            'days': day_results,
+            'watermark': str(watermark) if watermark else None,
+            'queryExecutionId': results
+        }
+    return {
+        'statusCode': 200,
+        'body': f"Report aggregation completed for {len(days)} day(s)",
+        'days': day_results,
+        'watermark': str(watermark) if watermark else None,
+        'queryExecutionId': results
+    }
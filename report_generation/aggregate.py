@@ -0,0 +1,81 @@
+import argparse
+import os
+from datetime import datetime
+
+# The aggregation modules are imported inside main() once the arguments are valid,
+# so that --help and argument errors return without loading DuckDB or pandas.
+
+
+def validate_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    try:
+        start_date = datetime.strptime(args.start_date, "%Y-%m-%d")
+        end_date = datetime.strptime(args.end_date, "%Y-%m-%d")
+    except ValueError as e:
+        parser.error(f"Invalid date, expected YYYY-MM-DD: {str(e)}")
+
+    if end_date < start_date:
+        parser.error("--end-date must not be earlier than --start-date")
+
+    if args.engine == "duckdb" and not os.path.isdir(os.path.join(args.data_dir or "", "raw")):
+        parser.error("--data-dir must contain the raw/ directory of the report bucket")
+
+    if args.engine == "athena" and not args.database_name:
+        parser.error("--database-name is required with --engine athena")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the usage report aggregation queries locally or on Athena",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+
+    parser.add_argument(
+        "--start-date", required=True, help="First day to aggregate (YYYY-MM-DD)"
+    )
+    parser.add_argument(
+        "--end-date", required=True, help="Last day to aggregate (YYYY-MM-DD)"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["duckdb", "athena"],
+        default="duckdb",
+        help="duckdb: run over a local copy of the report bucket (default)\n"
+        "athena: run on Athena without writing to the report tables",
+    )
+    parser.add_argument(
+        "--data-dir",
+        help="Local copy of the report bucket, containing raw/<table>/year=.../ (duckdb)",
+    )
+    parser.add_argument("--database-name", help="Athena database name (athena)")
+    parser.add_argument("--database-workgroup-name", help="Athena workgroup (athena)")
+    parser.add_argument(
+        "--output-dir",
+        default=".",
+        help="Directory for the aggregated <report table>.csv files (default: current directory)",
+    )
+
+    args = parser.parse_args()
+    validate_args(parser, args)
+
+    from src.hyperpod_usage_report.aggregation.engines import AthenaEngine, DuckDBEngine
+    from src.hyperpod_usage_report.aggregation.runner import AggregationRunner
+
+    if args.engine == "duckdb":
+        engine = DuckDBEngine(args.data_dir)
+    else:
+        engine = AthenaEngine(args.database_name, args.database_workgroup_name)
+
+    runner = AggregationRunner(engine)
+    tables = runner.run_range(args.start_date, args.end_date)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for table, df in tables.items():
+        path = os.path.join(args.output_dir, f"{table}.csv")
+        df.to_csv(path, index=False)
+        print(f"Wrote {len(df)} rows to {path}")
+    for stage in runner.metrics.stages:
+        print(f"{stage['day']} {stage['query']}: {stage['duration_seconds']:.3f}s, {stage['rows']} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import json
+import sys
+
+from src.hyperpod_usage_report.batch import BatchManifest, BatchRunner
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="HyperPod Usage Report Batch Runner",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+
+    parser.add_argument(
+        "--manifest",
+        required=True,
+        help="JSON or YAML manifest listing the reports to generate",
+    )
+    parser.add_argument(
+        "--max-concurrent-reports",
+        type=int,
+        help="Override the number of reports generated concurrently",
+    )
+    parser.add_argument(
+        "--max-concurrent-queries",
+        type=int,
+        help="Override the default number of concurrent Athena queries per workgroup",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        manifest = BatchManifest.load(args.manifest)
+    except (OSError, ValueError) as e:
+        parser.error(f"Invalid manifest: {str(e)}")
+
+    if args.max_concurrent_reports:
+        manifest.max_concurrent_reports = args.max_concurrent_reports
+    if args.max_concurrent_queries:
+        manifest.max_concurrent_queries = args.max_concurrent_queries
+
+    results = BatchRunner(manifest).run()
+    print(json.dumps(results, indent=2))
+
+    failed = [result for result in results if result["status"] != "SUCCESS"]
+    print(f"{len(results) - len(failed)} of {len(results)} reports generated successfully")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,98 @@
 import argparse
+import os
+from datetime import datetime
 
-from src.hyperpod_usage_report.report_generator import ReportGenerator
+# ReportGenerator is imported inside main() once the arguments are valid, so
+# that --help and argument errors return without loading the AWS and data
+# processing libraries.
+
+
+def validate_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Reject malformed arguments before any heavy module is imported"""
+    try:
+        start_date = datetime.strptime(args.start_date, "%Y-%m-%d")
+        end_date = datetime.strptime(args.end_date, "%Y-%m-%d")
+    except ValueError as e:
+        parser.error(f"Invalid date, expected YYYY-MM-DD: {str(e)}")
+
+    if end_date < start_date:
+        parser.error("--end-date must not be earlier than --start-date")
+
+    if not args.output_report_location.startswith("s3://"):
+        parser.error("--output-report-location must be an S3 location (s3://bucket/path)")
+
+    if args.diagnostics_location and not args.diagnostics_location.startswith("s3://"):
+        parser.error("--diagnostics-location must be an S3 location (s3://bucket/path)")
+
+    if args.diagnostics_location and not args.profile:
+        parser.error("--diagnostics-location requires --profile")
+
+    if args.max_scan_gb is not None and args.max_scan_gb <= 0:
+        parser.error("--max-scan-gb must be greater than 0")
+
+    if args.fleet_cluster and (len(args.format) > 1 or len(args.type) > 1):
+        parser.error("--fleet-cluster supports a single --format and --type")
+
+    if args.subtotals and (args.fleet_cluster or args.shard_by):
+        parser.error("--subtotals cannot be combined with --fleet-cluster or --shard-by")
+
+    if args.pipeline and (
+        args.fleet_cluster or len(args.format) > 1 or len(args.type) > 1 or args.format[0] != "csv"
+    ):
+        parser.error("--pipeline streams a single --format csv report without --fleet-cluster")
+
+    if args.gzip and not args.pipeline:
+        parser.error("--gzip requires --pipeline")
+
+    for value in args.fleet_cluster or []:
+        if not value.split(":")[0] or value.count(":") > 2:
+            parser.error(
+                f"Invalid --fleet-cluster '{value}', expected NAME[:DATABASE[:WORKGROUP]]"
+            )
+
+
+def parse_fleet_clusters(args: argparse.Namespace) -> list:
+    """List (cluster, database, workgroup) for --cluster-name and every --fleet-cluster
+
+    Database and workgroup default to --database-name and --database-workgroup-name.
+    """
+    clusters = [(args.cluster_name, args.database_name, args.database_workgroup_name)]
+    for value in args.fleet_cluster:
+        name, database, workgroup = (value.split(":") + ["", ""])[:3]
+        clusters.append(
+            (name, database or args.database_name, workgroup or args.database_workgroup_name)
+        )
+    return clusters
+
+
+def write_metrics(args: argparse.Namespace, metrics) -> None:
+    """Write the requested metrics outputs; a failure here never fails the report"""
+    try:
+        if args.metrics_file:
+            metrics.write_json(args.metrics_file)
+            print(f"Wrote run metrics to {args.metrics_file}")
+        if args.prometheus_textfile:
+            metrics.write_prometheus(args.prometheus_textfile)
+    except OSError as e:
+        print(f"Error writing metrics: {str(e)}")
+
+
+def write_profiles(args: argparse.Namespace, metrics) -> None:
+    """Report where the stage profiles are and upload them when a location was given"""
+    profiler = metrics.profiler
+    profiler.stop()
+    print(f"Wrote {len(profiler.files)} profile files to {profiler.output_dir}")
+    if not args.diagnostics_location:
+        return
+
+    from src.hyperpod_usage_report.utils.s3_uploader import S3Uploader
+
+    location = f"{args.diagnostics_location.rstrip('/')}/{metrics.run_id}"
+    try:
+        S3Uploader.upload_files(profiler.files, location)
+        print(f"Uploaded profiles to {location}")
+    except Exception as e:
+        print(f"Error uploading profiles: {str(e)}")
 
 
 def main():
@@ -18,8 +110,9 @@ def main():
     parser.add_argument(
         "--format",
         choices=["pdf", "csv"],
+        nargs="+",
         required=True,
-        help="Output format (pdf or csv)",
+        help="Output format (pdf or csv); list both to render each from one fetch",
     )
     parser.add_argument("--database-name", required=True, help="Athena database name")
     parser.add_argument(
@@ -30,8 +123,9 @@ def main():
     parser.add_argument(
         "--type",
         choices=["summary", "detailed"],
+        nargs="+",
         required=True,
-        help="Report type (summary or detailed)",
+        help="Report type (summary or detailed); list both to generate each in one run",
     )
     parser.add_argument(
         "--output-report-location",
@@ -41,23 +135,161 @@ def main():
     parser.add_argument("--cluster-name", required=True, help="Hyperpod Cluster Name")
     parser.add_argument("--namespace", required=False, help="Filter report by namespace (optional)")
     parser.add_argument("--task", required=False, help="Filter report by task name (optional)")
-    
+    parser.add_argument(
+        "--shard-by",
+        choices=["day", "week"],
+        required=False,
+        help="Fetch the date range as parallel per-day or per-week queries (optional)",
+    )
+    parser.add_argument(
+        "--fleet-cluster",
+        action="append",
+        metavar="NAME[:DATABASE[:WORKGROUP]]",
+        help="Add a cluster to a multi-cluster fleet report; repeat for each cluster (optional)",
+    )
+    parser.add_argument(
+        "--max-scan-gb",
+        type=float,
+        required=False,
+        help="Refuse to run when the queries are estimated to scan more than this many GB (optional)",
+    )
+    parser.add_argument(
+        "--allow-large-scan",
+        action="store_true",
+        help="Run even when the estimated scan is over --max-scan-gb",
+    )
+    parser.add_argument(
+        "--check-catalog",
+        action="store_true",
+        help="Look --namespace and --task up in the report catalog first, failing fast with "
+        "suggestions when they have no data in the range",
+    )
+    parser.add_argument(
+        "--subtotals",
+        action="store_true",
+        help="Add team, namespace and grand total rows over the range, computed in the report query",
+    )
+    parser.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        help="Skip the report when the uploaded copy was generated from the same source data "
+        "and parameters",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Stream a CSV report from Athena to S3, formatting and uploading rows while later "
+        "rows are still being fetched",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Compress the streamed report with gzip, uploading it as .csv.gz (requires --pipeline)",
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="Print the SQL, partitions touched and estimated scan cost without running the report",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        required=False,
+        help="Write a JSON run record with per-stage timings and Athena statistics (optional)",
+    )
+    parser.add_argument(
+        "--prometheus-textfile",
+        required=False,
+        help="Write run metrics as a node_exporter textfile, e.g. /var/lib/node_exporter/usage_report.prom (optional)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile each stage with cProfile and tracemalloc, writing the results to profiles/<run id>",
+    )
+    parser.add_argument(
+        "--diagnostics-location",
+        required=False,
+        help="S3 location to upload --profile output to, under a <run id> prefix (optional)",
+    )
+
     args = parser.parse_args()
+    # Repeated values would render the same file twice
+    args.format = list(dict.fromkeys(args.format))
+    args.type = list(dict.fromkeys(args.type))
+    validate_args(parser, args)
 
-    generator = ReportGenerator(
-        start_date=args.start_date,
-        end_date=args.end_date,
-        cluster_name=args.cluster_name,
-        database_name=args.database_name,
-        database_workgroup_name=args.database_workgroup_name,
-        report_type=args.type,
-        output_location=args.output_report_location,
-        format=args.format,
-        namespace=args.namespace,
-        task=args.task,
-    )
+    max_scan_bytes = None
+    if args.max_scan_gb is not None and not args.allow_large_scan:
+        max_scan_bytes = int(args.max_scan_gb * 1024 ** 3)
+
+    from src.hyperpod_usage_report.utils.metrics import RunMetrics
+
+    metrics = RunMetrics()
+    metrics.labels = {"report_type": ",".join(args.type), "format": ",".join(args.format)}
+    if args.profile:
+        from src.hyperpod_usage_report.utils.profiler import StageProfiler
+
+        metrics.profiler = StageProfiler(os.path.join("profiles", metrics.run_id))
+
+    if args.fleet_cluster:
+        from src.hyperpod_usage_report.fleet_report_generator import (
+            ClusterTarget,
+            FleetReportGenerator,
+        )
+
+        generator = FleetReportGenerator(
+            start_date=args.start_date,
+            end_date=args.end_date,
+            clusters=[ClusterTarget(*cluster) for cluster in parse_fleet_clusters(args)],
+            report_type=args.type[0],
+            output_location=args.output_report_location,
+            format=args.format[0],
+            namespace=args.namespace,
+            task=args.task,
+            shard_by=args.shard_by,
+            max_scan_bytes=max_scan_bytes,
+            check_catalog=args.check_catalog,
+            skip_unchanged=args.skip_unchanged,
+            metrics=metrics,
+        )
+    else:
+        from src.hyperpod_usage_report.report_generator import ReportGenerator
+
+        generator = ReportGenerator(
+            start_date=args.start_date,
+            end_date=args.end_date,
+            cluster_name=args.cluster_name,
+            database_name=args.database_name,
+            database_workgroup_name=args.database_workgroup_name,
+            report_type=args.type,
+            output_location=args.output_report_location,
+            format=args.format,
+            namespace=args.namespace,
+            task=args.task,
+            shard_by=args.shard_by,
+            max_scan_bytes=max_scan_bytes,
+            check_catalog=args.check_catalog,
+            skip_unchanged=args.skip_unchanged,
+            subtotals=args.subtotals,
+            pipeline=args.pipeline,
+            compress=args.gzip,
+            metrics=metrics,
+        )
+
+    if args.explain:
+        print(generator.explain())
+        return
 
-    generator.generate_report()
+    try:
+        generator.generate_report()
+        metrics.finish("success")
+    except Exception as e:
+        metrics.finish("failed", str(e))
+        raise
+    finally:
+        write_metrics(args, metrics)
+        if metrics.profiler is not None:
+            write_profiles(args, metrics)
 
 
 if __name__ == "__main__":
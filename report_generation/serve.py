@@ -0,0 +1,63 @@
+import argparse
+from http.server import ThreadingHTTPServer
+
+from src.hyperpod_usage_report.service import ReportService, make_request_handler
+from src.hyperpod_usage_report.utils.query_cache import (
+    DEFAULT_MAX_ENTRIES,
+    DEFAULT_TTL_SECONDS,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="HyperPod Usage Report Service",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8080, help="Port to listen on (default: 8080)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of reports generated concurrently (default: 4)",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_TTL_SECONDS,
+        help=f"Seconds a query result stays cached (default: {DEFAULT_TTL_SECONDS})",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        help=f"Maximum number of cached query results (default: {DEFAULT_MAX_ENTRIES})",
+    )
+
+    args = parser.parse_args()
+
+    service = ReportService(
+        max_workers=args.workers,
+        cache_max_entries=args.cache_size,
+        cache_ttl_seconds=args.cache_ttl,
+    )
+    service.warm_up()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_request_handler(service))
+    print(f"Report service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
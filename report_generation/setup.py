@@ -12,5 +12,9 @@ setup(
         "pyarrow==20.0.0",
         "fpdf>=1.7.2",
     ],
+    extras_require={
+        "yaml": ["pyyaml>=5.1"],
+        "duckdb": ["duckdb>=0.10.0"],
+    },
     python_requires=">=3.8",
 )
@@ -0,0 +1,106 @@
+import re
+from typing import List, Tuple
+
+# Milliseconds per unit for the date_diff rewrite
+DATE_DIFF_UNITS_MS = {
+    "millisecond": 1,
+    "second": 1000,
+    "minute": 60 * 1000,
+    "hour": 60 * 60 * 1000,
+    "day": 24 * 60 * 60 * 1000,
+}
+
+_INSERT_PATTERN = re.compile(
+    r'^\s*INSERT\s+INTO\s+(?:"[^"]+"\.|\w+\.)?"?(\w+)"?\s+', re.IGNORECASE
+)
+
+
+def split_insert(sql: str) -> Tuple[str, str]:
+    """Split an INSERT INTO ... query into the target table and the query producing its rows"""
+    match = _INSERT_PATTERN.match(sql)
+    if match is None:
+        raise ValueError("Expected an INSERT INTO query")
+    return match.group(1), sql[match.end():].strip().rstrip(";")
+
+
+def _call_arguments(sql: str, open_paren: int) -> Tuple[List[str], int]:
+    """Top-level arguments of the call whose "(" is at open_paren, and the index after its ")" """
+    arguments = []
+    depth = 0
+    quoted = False
+    start = open_paren + 1
+    for index in range(open_paren, len(sql)):
+        char = sql[index]
+        if char == "'":
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                arguments.append(sql[start:index].strip())
+                return arguments, index + 1
+        elif char == "," and depth == 1:
+            arguments.append(sql[start:index].strip())
+            start = index + 1
+    raise ValueError(f"Unbalanced parentheses after: {sql[open_paren - 20:open_paren + 20]}")
+
+
+def _rewrite_calls(sql: str, name: str, rewrite) -> str:
+    """Replace every call to function name, innermost arguments first"""
+    pattern = re.compile(rf"\b{name}\s*\(", re.IGNORECASE)
+    result = []
+    position = 0
+    while True:
+        match = pattern.search(sql, position)
+        if match is None:
+            result.append(sql[position:])
+            return "".join(result)
+        if sql.count("'", 0, match.start()) % 2:
+            # Inside a string literal
+            result.append(sql[position:match.end()])
+            position = match.end()
+            continue
+        arguments, end = _call_arguments(sql, match.end() - 1)
+        arguments = [_rewrite_calls(argument, name, rewrite) for argument in arguments]
+        result.append(sql[position:match.start()])
+        result.append(rewrite(arguments, sql[match.start():end]))
+        position = end
+
+
+def _unit(argument: str) -> str:
+    return argument.strip("'").lower()
+
+
+def _date_add(arguments: List[str], original: str) -> str:
+    unit, value, timestamp = arguments
+    return f"({timestamp} + ({value}) * INTERVAL 1 {_unit(unit).upper()})"
+
+
+def _date_diff(arguments: List[str], original: str) -> str:
+    unit, start, end = arguments
+    if _unit(unit) not in DATE_DIFF_UNITS_MS:
+        return original
+    # Athena counts whole elapsed units, DuckDB counts unit boundaries crossed
+    return (
+        f"CAST(TRUNC((epoch_ms({end}) - epoch_ms({start})) / "
+        f"{DATE_DIFF_UNITS_MS[_unit(unit)]}.0) AS BIGINT)"
+    )
+
+
+def _date(arguments: List[str], original: str) -> str:
+    return f"CAST({arguments[0]} AS DATE)"
+
+
+def athena_to_duckdb(sql: str) -> str:
+    """Rewrite the Athena (Trino) functions the aggregation SQL uses into DuckDB SQL
+
+    Integer division, which also differs between the engines, is handled by the
+    DuckDB connection settings rather than in the SQL text.
+    """
+    sql = _rewrite_calls(sql, "DATE_ADD", _date_add)
+    sql = _rewrite_calls(sql, "DATE_DIFF", _date_diff)
+    sql = _rewrite_calls(sql, "DATE", _date)
+    return sql
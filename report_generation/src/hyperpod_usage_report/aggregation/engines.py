@@ -0,0 +1,102 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Any
+
+from ..utils.lazy_import import LazyModule
+from .dialect import athena_to_duckdb
+from .templates import RAW_TABLES, CheckpointType
+
+duckdb = LazyModule("duckdb")
+wr = LazyModule("awswrangler")
+
+
+class AggregationEngine(ABC):
+    """Runs the query part of an aggregation and returns its rows as a DataFrame"""
+
+    # Database name substituted into the templates
+    database: str
+
+    @abstractmethod
+    def query(self, sql: str) -> Any:
+        pass
+
+
+class AthenaEngine(AggregationEngine):
+    """Runs aggregation queries on Athena without writing to the report tables"""
+
+    def __init__(self, database: str, workgroup: str = None, boto3_session: Any = None):
+        self.database = database
+        self.workgroup = workgroup
+        self.boto3_session = boto3_session
+
+    def query(self, sql: str) -> Any:
+        return wr.athena.read_sql_query(
+            sql=sql,
+            database=self.database,
+            workgroup=self.workgroup,
+            boto3_session=self.boto3_session,
+            ctas_approach=False,
+        )
+
+
+class DuckDBEngine(AggregationEngine):
+    """Runs aggregation queries locally with DuckDB over Hive-partitioned Parquet
+
+    data_dir mirrors the report bucket: raw/<table>/year=YYYY/month=MM/day=DD/hour=HH/...
+    Each raw table found there is exposed as a view in a schema named after the
+    database, and the Athena SQL is rewritten into DuckDB's dialect before it runs.
+    Checkpoints are in-memory tables filled as the days are run in order.
+    """
+
+    def __init__(self, data_dir: str, database: str = "usage_report"):
+        self.data_dir = data_dir
+        self.database = database
+        self._lock = threading.Lock()
+        try:
+            self.connection = duckdb.connect()
+        except ImportError:
+            raise ImportError(
+                "DuckDB is required for local aggregation; install it with "
+                "`pip install -e .[duckdb]`"
+            )
+        # Athena divides integers without a remainder
+        self.connection.execute("SET integer_division = true")
+        self.connection.execute(f'CREATE SCHEMA IF NOT EXISTS "{database}"')
+        for table in RAW_TABLES:
+            table_dir = os.path.join(data_dir, "raw", table)
+            if not os.path.isdir(table_dir):
+                continue
+            pattern = os.path.join(table_dir, "**", "*.parquet").replace("'", "''")
+            # Partition values stay strings, as in the Glue tables
+            self.connection.execute(
+                f'CREATE OR REPLACE VIEW "{database}".{table} AS '
+                f"SELECT * FROM read_parquet('{pattern}', hive_partitioning = true, "
+                f"hive_types_autocast = false, union_by_name = true)"
+            )
+        for checkpoint_type in CheckpointType:
+            raw_table = checkpoint_type.value[: -len("_checkpoint")]
+            if not os.path.isdir(os.path.join(data_dir, "raw", raw_table)):
+                continue
+            # Same columns as the raw table, partitioned by day instead of hour
+            self.connection.execute(
+                f'CREATE TABLE "{database}".{checkpoint_type.value} AS '
+                f'SELECT * EXCLUDE (hour) FROM "{database}".{raw_table} LIMIT 0'
+            )
+
+    def query(self, sql: str) -> Any:
+        # A DuckDB connection runs one statement at a time
+        with self._lock:
+            return self.connection.execute(athena_to_duckdb(sql)).df()
+
+    def write_checkpoint(self, table: str, sql: str, day: date) -> int:
+        """Replace one day of a checkpoint table with the rows of sql, returning their count"""
+        with self._lock:
+            self.connection.execute(
+                f'DELETE FROM "{self.database}".{table} WHERE year = ? AND month = ? AND day = ?',
+                [day.strftime("%Y"), day.strftime("%m"), day.strftime("%d")],
+            )
+            return self.connection.execute(
+                f'INSERT INTO "{self.database}".{table} BY NAME {athena_to_duckdb(sql)}'
+            ).fetchone()[0]
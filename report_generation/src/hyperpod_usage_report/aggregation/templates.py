@@ -0,0 +1,56 @@
+import importlib.util
+import os
+import sys
+from datetime import date
+from typing import Union
+
+# The aggregation SQL is read from the module the Lambda is packaged with, so the
+# harness runs exactly the queries the Lambda runs
+AGGREGATION_SQL = os.path.join(
+    os.path.dirname(__file__),
+    "..",
+    "..",
+    "..",
+    "..",
+    "cloudformation",
+    "aggregation_lambda",
+    "aggregation_sql.py",
+)
+
+
+def _load_aggregation_sql():
+    """The Lambda's SQL module, registered under the name the Lambda imports it by"""
+    # One module object, so its enums are the same classes wherever they are used
+    module = sys.modules.get("aggregation_sql")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("aggregation_sql", AGGREGATION_SQL)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["aggregation_sql"] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+_aggregation_sql = _load_aggregation_sql()
+
+DATABASE_PLACEHOLDER = _aggregation_sql.DATABASE_PLACEHOLDER
+# Raw tables written by the operator, partitioned by year/month/day/hour[/cluster]
+RAW_TABLES = tuple(_aggregation_sql.RAW_TABLES)
+QueryType = _aggregation_sql.QueryType
+QueryTemplates = _aggregation_sql.QueryTemplates
+CheckpointType = _aggregation_sql.CheckpointType
+CheckpointTemplates = _aggregation_sql.CheckpointTemplates
+CatalogType = _aggregation_sql.CatalogType
+CatalogTemplates = _aggregation_sql.CatalogTemplates
+ReportTable = _aggregation_sql.ReportTable
+REPORT_AGGREGATIONS = _aggregation_sql.REPORT_AGGREGATIONS
+TEMPLATES = _aggregation_sql.TEMPLATES
+combine_report_query = _aggregation_sql.combine_report_query
+
+
+def prepare_query(
+    query_type: Union[QueryType, ReportTable, CheckpointType, CatalogType],
+    day: date,
+    database: str,
+) -> str:
+    """Fill in a template for one day the same way the Lambda does"""
+    return _aggregation_sql.fill_template(TEMPLATES[query_type], day, database)
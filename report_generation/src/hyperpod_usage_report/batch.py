@@ -0,0 +1,132 @@
+import json
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from .report_spec import ReportSpec
+from .utils.query_cache import QueryResultCache
+from .utils.thread_sessions import ThreadLocalSessions
+from .utils.workgroup_limiter import WorkgroupLimiter
+
+DEFAULT_MAX_CONCURRENT_REPORTS = 8
+# Athena's default quota is 20 concurrent DML queries per account and region;
+# stay well below it by default so other users of the account are not starved.
+DEFAULT_MAX_CONCURRENT_QUERIES = 5
+
+MANIFEST_KEYS = {
+    "defaults",
+    "reports",
+    "max_concurrent_reports",
+    "max_concurrent_queries",
+    "workgroup_query_limits",
+}
+
+
+@dataclass
+class BatchManifest:
+    reports: List[ReportSpec]
+    max_concurrent_reports: int = DEFAULT_MAX_CONCURRENT_REPORTS
+    max_concurrent_queries: int = DEFAULT_MAX_CONCURRENT_QUERIES
+    workgroup_query_limits: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BatchManifest":
+        """Build a manifest, merging the optional defaults into every report entry"""
+        if not isinstance(data, dict):
+            raise ValueError("Manifest must be a mapping with a 'reports' list")
+
+        unknown = sorted(set(data) - MANIFEST_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown manifest fields: {', '.join(unknown)}")
+
+        entries = data.get("reports")
+        if not isinstance(entries, list) or not entries:
+            raise ValueError("Manifest must contain a non-empty 'reports' list")
+
+        defaults = data.get("defaults") or {}
+        reports = []
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                raise ValueError(f"Report #{index} must be a mapping")
+            try:
+                reports.append(ReportSpec.from_dict({**defaults, **entry}))
+            except ValueError as e:
+                raise ValueError(f"Report #{index}: {str(e)}")
+            if not reports[-1].output_report_location:
+                raise ValueError(f"Report #{index}: output_report_location is required")
+
+        return cls(
+            reports=reports,
+            max_concurrent_reports=int(
+                data.get("max_concurrent_reports", DEFAULT_MAX_CONCURRENT_REPORTS)
+            ),
+            max_concurrent_queries=int(
+                data.get("max_concurrent_queries", DEFAULT_MAX_CONCURRENT_QUERIES)
+            ),
+            workgroup_query_limits={
+                workgroup: int(limit)
+                for workgroup, limit in (data.get("workgroup_query_limits") or {}).items()
+            },
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "BatchManifest":
+        """Load a manifest from a JSON or YAML (.yaml/.yml, requires PyYAML) file"""
+        with open(path) as f:
+            if path.endswith((".yaml", ".yml")):
+                try:
+                    import yaml
+                except ImportError:
+                    raise ValueError(
+                        "PyYAML is required for YAML manifests; install it with "
+                        "`pip install -e .[yaml]` or use a JSON manifest"
+                    )
+                data = yaml.safe_load(f)
+            else:
+                data = json.load(f)
+        return cls.from_dict(data)
+
+
+class BatchRunner:
+    """Runs the reports of a manifest on a bounded pool
+
+    All reports share one workgroup limiter and one query cache, so an identical query
+    (for example the heartbeat coverage of a date range) is run once and its result
+    feeds every report that needs it. Each worker thread has its own boto3 session.
+    """
+
+    def __init__(self, manifest: BatchManifest):
+        self.manifest = manifest
+        self.sessions = ThreadLocalSessions()
+        self.query_limiter = WorkgroupLimiter(
+            manifest.max_concurrent_queries, manifest.workgroup_query_limits
+        )
+        # Every query of the batch stays cached until the batch finishes
+        self.query_cache = QueryResultCache(
+            max_entries=2 * len(manifest.reports), ttl_seconds=float("inf")
+        )
+
+    def _run_report(self, spec: ReportSpec) -> dict:
+        output_dir = tempfile.mkdtemp(prefix="hyperpod-usage-report-")
+        try:
+            spec.create_generator(
+                boto3_session=self.sessions.get(),
+                query_cache=self.query_cache,
+                query_limiter=self.query_limiter,
+                output_dir=output_dir,
+            ).generate_report()
+            return {"report": spec.to_dict(), "status": "SUCCESS"}
+        except Exception as e:
+            return {"report": spec.to_dict(), "status": "FAILED", "message": str(e)}
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    def run(self) -> List[dict]:
+        """Run every report and return one result per report, in manifest order"""
+        with ThreadPoolExecutor(
+            max_workers=self.manifest.max_concurrent_reports,
+            thread_name_prefix="batch-report",
+        ) as executor:
+            return list(executor.map(self._run_report, self.manifest.reports))
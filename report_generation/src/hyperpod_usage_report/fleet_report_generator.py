@@ -0,0 +1,298 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from .report_generator import (
+    ReportGenerationError,
+    ReportGenerator,
+    ReportType,
+    S3UploadError,
+    create_format_generator,
+    pd,
+)
+from .utils.frames import normalize_report_frame
+from .utils.input_fingerprint import FINGERPRINT_METADATA_KEY, compute_fingerprint
+from .utils.metrics import RunMetrics
+from .utils.query_cache import QueryResultCache
+from .utils.report_catalog import ReportCatalog
+from .utils.scan_estimator import ScanBudgetExceededError, format_bytes
+from .utils.s3_uploader import S3Uploader
+from .utils.workgroup_limiter import WorkgroupLimiter
+
+DEFAULT_MAX_CLUSTER_WORKERS = 8
+
+
+@dataclass
+class ClusterTarget:
+    cluster_name: str
+    database_name: str
+    database_workgroup_name: str
+
+
+class FleetReportGenerator:
+    """Builds one report over several clusters
+
+    Each cluster's usage data and heartbeat coverage are fetched concurrently, rows
+    are tagged with their cluster and merged, and the report is rendered with one
+    section and totals row per cluster followed by fleet-wide totals.
+    """
+
+    def __init__(
+        self,
+        start_date: str,
+        end_date: str,
+        clusters: List[ClusterTarget],
+        report_type: str,
+        output_location: str,
+        format: str,
+        namespace: str = None,
+        task: str = None,
+        boto3_session: Any = None,
+        query_cache: QueryResultCache = None,
+        output_dir: str = "",
+        query_limiter: WorkgroupLimiter = None,
+        shard_by: str = None,
+        max_cluster_workers: int = DEFAULT_MAX_CLUSTER_WORKERS,
+        max_scan_bytes: int = None,
+        check_catalog: bool = False,
+        skip_unchanged: bool = False,
+        metrics: RunMetrics = None,
+    ):
+        if not clusters:
+            raise ValueError("A fleet report needs at least one cluster")
+        names = [target.cluster_name for target in clusters]
+        if len(set(names)) != len(names):
+            raise ValueError("Cluster names in a fleet report must be unique")
+
+        self.metrics = metrics or RunMetrics()
+        # Clusters sharing a database must filter on their cluster partition
+        databases = [target.database_name for target in clusters]
+        self.cluster_generators = [
+            ReportGenerator(
+                start_date=start_date,
+                end_date=end_date,
+                cluster_name=target.cluster_name,
+                database_name=target.database_name,
+                report_type=report_type,
+                output_location=output_location,
+                database_workgroup_name=target.database_workgroup_name,
+                format=format,
+                namespace=namespace,
+                task=task,
+                boto3_session=boto3_session,
+                query_cache=query_cache,
+                output_dir=output_dir,
+                query_limiter=query_limiter,
+                shard_by=shard_by,
+                cluster_filter=databases.count(target.database_name) > 1,
+                metrics=self.metrics,
+            )
+            for target in clusters
+        ]
+        self.report_type = report_type
+        self.output_location = output_location
+        self.format = format
+        self.output_dir = output_dir
+        self.boto3_session = boto3_session
+        self.max_cluster_workers = max_cluster_workers
+        self.max_scan_bytes = max_scan_bytes
+        self.check_catalog = check_catalog
+        self.skip_unchanged = skip_unchanged
+        self.namespace = namespace
+        self.task = task
+        self._generator = None
+
+    @property
+    def cluster_names(self) -> List[str]:
+        return [generator.cluster_name for generator in self.cluster_generators]
+
+    @property
+    def generator(self):
+        """Report generator for the requested format, imported when first rendered"""
+        if self._generator is None:
+            self._generator = create_format_generator(self.format, self.output_dir)
+        return self._generator
+
+    def _fetch_cluster(self, generator: ReportGenerator) -> Tuple[Any, list]:
+        """Fetches one cluster's usage data and missing periods, tagging rows with the cluster"""
+        with self.metrics.stage("fetch_data", cluster=generator.cluster_name) as stage:
+            df = generator._fetch_data()
+            stage["rows"] = len(df)
+        df["cluster"] = generator.cluster_name
+        with self.metrics.stage("gap_detection", cluster=generator.cluster_name) as stage:
+            missing_periods = generator._find_missing_period()
+            stage["rows"] = len(missing_periods)
+        return df, missing_periods
+
+    def _fetch_fleet_data(self) -> Tuple[Any, Dict[str, list]]:
+        """Fetches every cluster concurrently and merges the rows in cluster order"""
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(self.max_cluster_workers, len(self.cluster_generators))),
+            thread_name_prefix="fleet-cluster",
+        ) as executor:
+            results = list(executor.map(self._fetch_cluster, self.cluster_generators))
+
+        frames = [df for df, _ in results]
+        non_empty = [df for df in frames if not df.empty]
+        df = pd.concat(non_empty, ignore_index=True) if non_empty else frames[0]
+        # Normalized after the merge, since concatenating categoricals falls back to objects
+        df = normalize_report_frame(df)
+        missing_periods_by_cluster = {
+            name: missing_periods
+            for name, (_, missing_periods) in zip(self.cluster_names, results)
+        }
+        return df, missing_periods_by_cluster
+
+    def explain(self) -> str:
+        """Describes the SQL, partitions touched and estimated cost for every cluster"""
+        return "\n\n".join(
+            f"Cluster: {generator.cluster_name}\n{generator.explain()}"
+            for generator in self.cluster_generators
+        )
+
+    def _check_scan_budget(self) -> None:
+        """Raises ScanBudgetExceededError when the whole fleet would scan over max_scan_bytes"""
+        if self.max_scan_bytes is None:
+            return
+        total_bytes = sum(
+            estimate.bytes_scanned
+            for generator in self.cluster_generators
+            for _, estimate in generator.estimate_scan()
+        )
+        if total_bytes > self.max_scan_bytes:
+            raise ScanBudgetExceededError(
+                f"Fleet report would scan about {format_bytes(total_bytes)}, over the budget "
+                f"of {format_bytes(self.max_scan_bytes)}. Narrow the date range, use "
+                f"--shard-by to prune partitions, or override the budget."
+            )
+
+    def _check_catalog(self) -> int:
+        """Estimated fleet report rows; a filter is only rejected when no cluster has data"""
+        try:
+            catalog = ReportCatalog.merge(
+                [generator.fetch_catalog() for generator in self.cluster_generators]
+            )
+        except Exception as e:
+            print(f"Skipping the report catalog check: {str(e)}")
+            return None
+        return catalog.check(self.report_type, self.namespace, self.task)
+
+    def input_fingerprint(self) -> str:
+        """Fingerprint of the fleet parameters, generator version and every cluster's sources"""
+        parameters = {
+            "clusters": [
+                generator._fingerprint_parameters() for generator in self.cluster_generators
+            ],
+            "fleet": True,
+        }
+        source_objects = sorted(
+            {
+                source
+                for generator in self.cluster_generators
+                for source in generator.source_objects()
+            }
+        )
+        return compute_fingerprint(parameters, source_objects)
+
+    def report_file_path(self) -> str:
+        """Local path the fleet report is rendered to; its name is also the uploaded key"""
+        extension = (
+            self.generator.CSV_EXTENSION
+            if self.format.lower() == "csv"
+            else self.generator.PDF_EXTENSION
+        )
+        return self.generator._build_filename(self._prepare_header_info(), extension)
+
+    def _check_unchanged(self) -> Tuple[bool, Dict[str, str]]:
+        """Whether the stored fleet report has the current input fingerprint, and the metadata to upload"""
+        try:
+            fingerprint = self.input_fingerprint()
+            stored = S3Uploader.get_remote_metadata(
+                self.report_file_path(), self.output_location, self.boto3_session
+            )
+        except Exception as e:
+            print(f"Skipping the input fingerprint check: {str(e)}")
+            return False, None
+        unchanged = (stored or {}).get(FINGERPRINT_METADATA_KEY) == fingerprint
+        return unchanged, {FINGERPRINT_METADATA_KEY: fingerprint}
+
+    def _prepare_header_info(self) -> Dict[str, Any]:
+        """Prepares header information covering every cluster of the fleet"""
+        header_info = self.cluster_generators[0]._prepare_header_info()
+        header_info["cluster_name"] = ", ".join(self.cluster_names)
+        header_info["clusters"] = self.cluster_names
+        return header_info
+
+    def render_report(self) -> str:
+        """Fetches every cluster and renders the fleet report locally, returning its path"""
+        # Validate report type
+        ReportType(self.report_type)
+
+        # Refuse oversized scans before anything is submitted
+        if self.max_scan_bytes is not None:
+            with self.metrics.stage("scan_estimate"):
+                self._check_scan_budget()
+
+        if self.check_catalog:
+            with self.metrics.stage("catalog_check") as stage:
+                stage["rows"] = self._check_catalog()
+
+        df, missing_periods_by_cluster = self._fetch_fleet_data()
+        header_info = self._prepare_header_info()
+
+        try:
+            with self.metrics.stage("render") as stage:
+                stage["rows"] = len(df)
+                return self.generator.generate_fleet_report(
+                    df, header_info, missing_periods_by_cluster
+                )
+        except Exception as e:
+            raise ReportGenerationError(
+                f"Failed to generate {self.report_type} fleet report: {str(e)}"
+            )
+
+    def _upload_and_cleanup(self, output_file: str, metadata: Dict[str, str] = None) -> None:
+        try:
+            S3Uploader.upload_files(
+                [output_file],
+                self.output_location,
+                boto3_session=self.boto3_session,
+                metadata=metadata,
+            )
+            print(f"Successfully uploaded report to {self.output_location}")
+        except Exception as e:
+            raise S3UploadError(f"Failed to upload report: {str(e)}")
+
+    def generate_report(self):
+        output_file = None
+        try:
+            metadata = None
+            if self.skip_unchanged:
+                ReportType(self.report_type)
+                with self.metrics.stage("fingerprint"):
+                    unchanged, metadata = self._check_unchanged()
+                if unchanged:
+                    print(
+                        f"Skipping {self.report_type} fleet report, its inputs are unchanged "
+                        f"since it was last uploaded"
+                    )
+                    return
+
+            output_file = self.render_report()
+            with self.metrics.stage("upload"):
+                self._upload_and_cleanup(output_file, metadata)
+            print(
+                f"Successfully generated and uploaded {self.report_type} fleet report "
+                f"for {len(self.cluster_generators)} clusters"
+            )
+        except ValueError:
+            print(f"Invalid report type: {self.report_type}")
+            raise
+        except Exception as e:
+            print(f"Report generation failed: {str(e)}")
+            raise ReportGenerationError(f"Failed to generate report: {str(e)}")
+        finally:
+            if output_file and os.path.exists(output_file):
+                os.remove(output_file)
+                print(f"Cleaned up temporary file: {output_file}")
@@ -1,7 +1,10 @@
+import os
 from abc import ABC, abstractmethod
 
 import pandas as pd
 
+from ..utils.query_builder import GRAND_TOTAL, NAMESPACE_SUBTOTAL, TEAM_SUBTOTAL
+
 
 class BaseReportGenerator(ABC):
     """Base class for report generators"""
@@ -10,6 +13,34 @@ class BaseReportGenerator(ABC):
     CSV_EXTENSION = "csv"
     PDF_EXTENSION = "pdf"
 
+    # Hour columns summed into cluster and fleet totals
+    SUMMARY_TOTAL_COLUMNS = [
+        "total_neuron_core_utilization_hours",
+        "allocated_neuron_core_utilization_hours",
+        "borrowed_neuron_core_utilization_hours",
+        "total_gpu_utilization_hours",
+        "allocated_gpu_utilization_hours",
+        "borrowed_gpu_utilization_hours",
+        "total_vcpu_utilization_hours",
+        "allocated_vcpu_utilization_hours",
+        "borrowed_vcpu_utilization_hours",
+    ]
+    DETAILED_TOTAL_COLUMNS = [
+        "utilized_neuron_core_hours",
+        "utilized_gpu_hours",
+        "utilized_vcpu_hours",
+    ]
+
+    # Labels of the subtotal rows of a report fetched with subtotals, by subtotal level
+    SUBTOTAL_LABELS = {
+        TEAM_SUBTOTAL: "Team subtotal",
+        NAMESPACE_SUBTOTAL: "Namespace subtotal",
+        GRAND_TOTAL: "Total",
+    }
+
+    def __init__(self, output_dir: str = ""):
+        self.output_dir = output_dir
+
     @abstractmethod
     def generate_summary_report(
         self, df: pd.DataFrame, header_info: dict, missing_periods: list
@@ -24,13 +55,43 @@ class BaseReportGenerator(ABC):
         """Generate detailed report in specific format"""
         pass
 
+    @abstractmethod
+    def generate_fleet_report(
+        self, df: pd.DataFrame, header_info: dict, missing_periods_by_cluster: dict
+    ) -> str:
+        """Generate a multi-cluster report with per-cluster sections and totals"""
+        pass
+
+    def _total_columns(self, header_info: dict) -> list:
+        return (
+            self.DETAILED_TOTAL_COLUMNS
+            if header_info["report_type"] == "detailed"
+            else self.SUMMARY_TOTAL_COLUMNS
+        )
+
+    def _cluster_totals(self, df: pd.DataFrame, header_info: dict) -> dict:
+        """Sum the hour columns of a cluster or fleet frame"""
+        return {column: float(df[column].sum()) for column in self._total_columns(header_info)}
+
+    @staticmethod
+    def _subtotal_groups(level: int, row: dict) -> dict:
+        """Namespace and team a subtotal row totals, as the text shown in their columns"""
+        groups = {}
+        if level != GRAND_TOTAL:
+            groups["namespace"] = "" if pd.isna(row["namespace"]) else str(row["namespace"])
+        if level == TEAM_SUBTOTAL:
+            groups["team"] = "" if pd.isna(row["team"]) else str(row["team"])
+        return groups
+
     def _build_filename(self, header_info: dict, extension: str) -> str:
         """Build filename with optional namespace and task suffixes"""
         namespace_suffix = f"-{header_info['namespace']}" if header_info.get('namespace') else ""
         task_suffix = f"-{header_info['task']}" if header_info.get('task') else ""
-        base_name = f"{header_info['report_type']}-report-{header_info['start_date']}"
-        return (
+        fleet_prefix = "fleet-" if header_info.get("clusters") else ""
+        base_name = f"{fleet_prefix}{header_info['report_type']}-report-{header_info['start_date']}"
+        filename = (
             f"{base_name}-{header_info['end_date']}{namespace_suffix}{task_suffix}.{extension}"
             if int(header_info["days"]) > 1
             else f"{base_name}{namespace_suffix}{task_suffix}.{extension}"
         )
+        return os.path.join(self.output_dir, filename)
@@ -1,9 +1,55 @@
+import itertools
+from typing import Iterable, Iterator
+
 import pandas as pd
 
+from ..utils.query_builder import SUBTOTAL_LEVEL_COLUMN
 from .base import BaseReportGenerator
 
+# Rows joined into each block of a streamed report, bounding the text held at once
+ROWS_PER_BLOCK = 256
+
 
 class CSVReportGenerator(BaseReportGenerator):
+    # Column headers (multi-level)
+    SUMMARY_RESOURCE_HEADERS = [
+        ",,,Instance,NeuronCore,,,GPU,,,vCPU,,",
+        "Date,Namespace,Team,Type,Total utilization (hours),Allocated utilization (hours),Borrowed utilization (hours),"
+        + "Total utilization (hours),Allocated utilization (hours),Borrowed utilization (hours),"
+        + "Total utilization (hours),Allocated utilization (hours),Borrowed utilization (hours)",
+    ]
+    DETAILED_RESOURCE_HEADERS = [
+        ",,,,,,NeuronCore,,GPU,,vCPU,,",
+        "Date,Period Start,Period End,Namespace,Team,Task,Instance,Status,Total utilization (hours),"
+        + "Total utilization (count),Total utilization (hours),Total utilization (count),"
+        + "Total utilization (hours),Total utilization (count),Priority class",
+    ]
+    # Columns written to each report type, in output order
+    SUMMARY_COLUMNS = [
+        "report_date",
+        "namespace",
+        "team",
+        "instance_type",
+        *BaseReportGenerator.SUMMARY_TOTAL_COLUMNS,
+    ]
+    DETAILED_COLUMNS = [
+        "report_date",
+        "period_start",
+        "period_end",
+        "namespace",
+        "team",
+        "task_name",
+        "instance",
+        "status",
+        "utilized_neuron_core_hours",
+        "utilized_neuron_core_count",
+        "utilized_gpu_hours",
+        "utilized_gpu_count",
+        "utilized_vcpu_hours",
+        "utilized_vcpu_count",
+        "priority_class",
+    ]
+
     def generate_report_header(self, header_info: dict) -> list:
         """Generate standard report header"""
         time_period = f"{header_info['start_date']} to {header_info['end_date']}"
@@ -31,80 +77,141 @@ class CSVReportGenerator(BaseReportGenerator):
         
         return filter_lines
 
-    def generate_summary_report(
-        self, df: pd.DataFrame, header_info: dict, missing_periods: list
-    ) -> str:
-        """Generate CSV Summary report"""
-        output_file = self._build_filename(header_info, self.CSV_EXTENSION)
+    @staticmethod
+    def _check_columns(df: pd.DataFrame, columns: list) -> None:
+        missing = [column for column in columns if column not in df.columns]
+        if missing:
+            raise KeyError(f"Missing report columns: {', '.join(missing)}")
+
+    @staticmethod
+    def _rows(df: pd.DataFrame, columns: list):
+        """Iterate row values in output order without copying or reordering the frame"""
+        return zip(*(df[column] for column in columns))
 
-        # Column headers (multi-level)
-        resource_headers = [
-            ",,,Instance,NeuronCore,,,GPU,,,vCPU,,",
-            "Date,Namespace,Team,Type,Total utilization (hours),Allocated utilization (hours),Borrowed utilization (hours),"
-            + "Total utilization (hours),Allocated utilization (hours),Borrowed utilization (hours),"
-            + "Total utilization (hours),Allocated utilization (hours),Borrowed utilization (hours)",
+    def _format_summary_row(self, row) -> list:
+        report_date, namespace, team, instance_type, *hours = row
+        return [
+            report_date.strftime("%Y-%m-%d"),
+            namespace,
+            team,
+            instance_type,
+            *(f"{value:.2f}" for value in hours),
         ]
 
-        # Reorder DataFrame columns to match desired output
-        df = df[
-            [
-                "report_date",
-                "namespace",
-                "team",
-                "instance_type",
-                "total_neuron_core_utilization_hours",
-                "allocated_neuron_core_utilization_hours",
-                "borrowed_neuron_core_utilization_hours",
-                "total_gpu_utilization_hours",
-                "allocated_gpu_utilization_hours",
-                "borrowed_gpu_utilization_hours",
-                "total_vcpu_utilization_hours",
-                "allocated_vcpu_utilization_hours",
-                "borrowed_vcpu_utilization_hours",
-            ]
+    def _format_detailed_row(self, row) -> list:
+        (
+            report_date,
+            period_start,
+            period_end,
+            namespace,
+            team,
+            task_name,
+            instance,
+            status,
+            *utilization,
+            priority_class,
+        ) = row
+        return [
+            report_date.strftime("%Y-%m-%d"),
+            period_start.strftime("%H:%M:%S"),
+            period_end.strftime("%H:%M:%S"),
+            namespace,
+            team,
+            task_name,
+            instance,
+            status,
+            *(f"{value:.2f}" for value in utilization),
+            priority_class,
         ]
 
-        # Write to file
-        with open(output_file, "w") as f:
-            # Write base header
-            for row in self.generate_report_header(header_info):
-                f.write(f"{row}\n")
+    def _format_totals_row(self, label: str, totals: dict, header_info: dict) -> list:
+        """Format a totals row aligned with the summary or detailed columns"""
+        if header_info["report_type"] == "detailed":
+            # Hours columns alternate with count columns, which are not summed
+            return [label, "", "", "", "", "", "", ""] + [
+                value
+                for column in self.DETAILED_TOTAL_COLUMNS
+                for value in (f"{totals[column]:.2f}", "")
+            ] + [""]
+        return [label, "", "", ""] + [
+            f"{totals[column]:.2f}" for column in self.SUMMARY_TOTAL_COLUMNS
+        ]
 
-            # Write filter lines
-            for row in self.generate_filter_lines(header_info):
-                f.write(f"{row}\n")
+    def _format_subtotal_row(self, level: int, row: dict, header_info: dict) -> list:
+        """Format a subtotal row with its label, the namespace and team it totals and the hours"""
+        columns = (
+            self.DETAILED_COLUMNS
+            if header_info["report_type"] == "detailed"
+            else self.SUMMARY_COLUMNS
+        )
+        cells = self._format_totals_row(self.SUBTOTAL_LABELS[level], row, header_info)
+        for column, text in self._subtotal_groups(level, row).items():
+            cells[columns.index(column)] = text
+        return cells
 
-            # Write missing periods (moved to after filters)
-            if missing_periods != []:
-                f.write(f"Missing data periods\n")
-                for period in missing_periods:
-                    f.write(f"{period['start_time']} to {period['end_time']}\n")
+    def _format_rows(self, df: pd.DataFrame, columns: list, format_row, header_info: dict):
+        """Format the report rows, and the subtotal rows when the frame was fetched with them"""
+        if SUBTOTAL_LEVEL_COLUMN not in df.columns:
+            for row in self._rows(df, columns):
+                yield format_row(row)
+            return
 
-            # Write column headers
-            for header_row in resource_headers:
-                f.write(f"{header_row}\n")
+        for *row, level in self._rows(df, columns + [SUBTOTAL_LEVEL_COLUMN]):
+            if level:
+                yield self._format_subtotal_row(level, dict(zip(columns, row)), header_info)
+            else:
+                yield format_row(row)
+
+    def stream_report(
+        self, chunks: Iterable[pd.DataFrame], header_info: dict, missing_periods: list
+    ) -> Iterator[str]:
+        """Yield a summary or detailed CSV report as text, one block per chunk of rows
+
+        The chunks are consumed as they arrive, so the start of the report can be
+        written or uploaded while later rows are still being fetched.
+        """
+        is_detailed = header_info["report_type"] == "detailed"
+        columns = self.DETAILED_COLUMNS if is_detailed else self.SUMMARY_COLUMNS
+        format_row = self._format_detailed_row if is_detailed else self._format_summary_row
+
+        lines = self.generate_report_header(header_info) + self.generate_filter_lines(header_info)
+        if missing_periods != []:
+            lines.append("Missing Data Periods" if is_detailed else "Missing data periods")
+            lines.extend(
+                f"{period['start_time']} to {period['end_time']}" for period in missing_periods
+            )
+        lines.extend(
+            self.DETAILED_RESOURCE_HEADERS if is_detailed else self.SUMMARY_RESOURCE_HEADERS
+        )
+        yield "".join(f"{line}\n" for line in lines)
 
+        has_rows = False
+        for df in chunks:
             if df.empty:
-                f.write("No Results\n")
-            else:
-                # Write data
-                for _, row in df.iterrows():
-                    formatted_row = [
-                        row["report_date"].strftime("%Y-%m-%d"),
-                        row["namespace"],
-                        row["team"],
-                        row["instance_type"],
-                        f"{row['total_neuron_core_utilization_hours']:.2f}",
-                        f"{row['allocated_neuron_core_utilization_hours']:.2f}",
-                        f"{row['borrowed_neuron_core_utilization_hours']:.2f}",
-                        f"{row['total_gpu_utilization_hours']:.2f}",
-                        f"{row['allocated_gpu_utilization_hours']:.2f}",
-                        f"{row['borrowed_gpu_utilization_hours']:.2f}",
-                        f"{row['total_vcpu_utilization_hours']:.2f}",
-                        f"{row['allocated_vcpu_utilization_hours']:.2f}",
-                        f"{row['borrowed_vcpu_utilization_hours']:.2f}",
-                    ]
-                    f.write(",".join(formatted_row) + "\n")
+                continue
+            self._check_columns(df, columns)
+            has_rows = True
+            rows = self._format_rows(df, columns, format_row, header_info)
+            while True:
+                block = "".join(
+                    ",".join(cells) + "\n" for cells in itertools.islice(rows, ROWS_PER_BLOCK)
+                )
+                if not block:
+                    break
+                yield block
+        if not has_rows:
+            yield "No Results\n"
+
+    def generate_summary_report(
+        self, df: pd.DataFrame, header_info: dict, missing_periods: list
+    ) -> str:
+        """Generate CSV Summary report"""
+        output_file = self._build_filename(header_info, self.CSV_EXTENSION)
+        self._check_columns(df, self.SUMMARY_COLUMNS)
+
+        with open(output_file, "w") as f:
+            for block in self.stream_report([df], header_info, missing_periods):
+                f.write(block)
 
         return output_file
 
@@ -113,78 +220,71 @@ class CSVReportGenerator(BaseReportGenerator):
     ) -> str:
         """Generate CSV Detailed report"""
         output_file = self._build_filename(header_info, self.CSV_EXTENSION)
+        self._check_columns(df, self.DETAILED_COLUMNS)
 
-        # Column headers (multi-level)
-        resource_headers = [
-            ",,,,,,NeuronCore,,GPU,,vCPU,,",
-            "Date,Period Start,Period End,Namespace,Team,Task,Instance,Status,Total utilization (hours),"
-            + "Total utilization (count),Total utilization (hours),Total utilization (count),"
-            + "Total utilization (hours),Total utilization (count),Priority class",
-        ]
+        with open(output_file, "w") as f:
+            for block in self.stream_report([df], header_info, missing_periods):
+                f.write(block)
 
-        # Reorder DataFrame columns to match desired output
-        df = df[
-            [
-                "report_date",
-                "period_start",
-                "period_end",
-                "namespace",
-                "team",
-                "task_name",
-                "instance",
-                "status",
-                "utilized_neuron_core_hours",
-                "utilized_neuron_core_count",
-                "utilized_gpu_hours",
-                "utilized_gpu_count",
-                "utilized_vcpu_hours",
-                "utilized_vcpu_count",
-                "priority_class",
-            ]
-        ]
+        return output_file
+
+    def generate_fleet_report(
+        self, df: pd.DataFrame, header_info: dict, missing_periods_by_cluster: dict
+    ) -> str:
+        """Generate CSV multi-cluster report with a section and totals row per cluster"""
+        output_file = self._build_filename(header_info, self.CSV_EXTENSION)
+        is_detailed = header_info["report_type"] == "detailed"
+        resource_headers = (
+            self.DETAILED_RESOURCE_HEADERS if is_detailed else self.SUMMARY_RESOURCE_HEADERS
+        )
+        format_row = self._format_detailed_row if is_detailed else self._format_summary_row
+        columns = self.DETAILED_COLUMNS if is_detailed else self.SUMMARY_COLUMNS
+        cluster_totals = {}
 
-        # Write to file
         with open(output_file, "w") as f:
-            # Write base header
             for row in self.generate_report_header(header_info):
                 f.write(f"{row}\n")
 
-            # Write filter lines
             for row in self.generate_filter_lines(header_info):
                 f.write(f"{row}\n")
 
-            # Write missing periods
-            if missing_periods != []:
-                f.write(f"Missing Data Periods\n")
-                for period in missing_periods:
-                    f.write(f"{period['start_time']} to {period['end_time']}\n")
+            for cluster in header_info["clusters"]:
+                cluster_df = df[df["cluster"] == cluster]
+                f.write(f"\nCluster: {cluster}\n")
+
+                missing_periods = missing_periods_by_cluster.get(cluster, [])
+                if missing_periods != []:
+                    f.write(f"Missing Data Periods\n")
+                    for period in missing_periods:
+                        f.write(f"{period['start_time']} to {period['end_time']}\n")
+
+                for header_row in resource_headers:
+                    f.write(f"{header_row}\n")
 
-            # Write column headers
+                if cluster_df.empty:
+                    f.write("No Results\n")
+                for row in self._rows(cluster_df, columns):
+                    f.write(",".join(format_row(row)) + "\n")
+
+                cluster_totals[cluster] = self._cluster_totals(cluster_df, header_info)
+                f.write(
+                    ",".join(self._format_totals_row("Total", cluster_totals[cluster], header_info))
+                    + "\n"
+                )
+
+            # Per-cluster and fleet-wide totals
+            f.write("\nFleet Totals\n")
             for header_row in resource_headers:
                 f.write(f"{header_row}\n")
-
-            if df.empty:
-                f.write("No Results\n")
-            else:
-                # Write data
-                for _, row in df.iterrows():
-                    formatted_row = [
-                        row["report_date"].strftime("%Y-%m-%d"),
-                        row["period_start"].strftime("%H:%M:%S"),
-                        row["period_end"].strftime("%H:%M:%S"),
-                        row["namespace"],
-                        row["team"],
-                        row["task_name"],
-                        row["instance"],
-                        row["status"],
-                        f"{row['utilized_neuron_core_hours']:.2f}",
-                        f"{row['utilized_neuron_core_count']:.2f}",
-                        f"{row['utilized_gpu_hours']:.2f}",
-                        f"{row['utilized_gpu_count']:.2f}",
-                        f"{row['utilized_vcpu_hours']:.2f}",
-                        f"{row['utilized_vcpu_count']:.2f}",
-                        row["priority_class"],
-                    ]
-                    f.write(",".join(formatted_row) + "\n")
+            for cluster, totals in cluster_totals.items():
+                f.write(",".join(self._format_totals_row(cluster, totals, header_info)) + "\n")
+            f.write(
+                ",".join(
+                    self._format_totals_row(
+                        "All clusters", self._cluster_totals(df, header_info), header_info
+                    )
+                )
+                + "\n"
+            )
 
         return output_file
@@ -4,6 +4,7 @@ from typing import Any, Callable, Dict, List
 import pandas as pd
 from fpdf import FPDF
 
+from ..utils.query_builder import GRAND_TOTAL, SUBTOTAL_LEVEL_COLUMN
 from .base import BaseReportGenerator
 
 
@@ -18,13 +19,15 @@ class PDFStyle:
     TITLE_FONT = ("Arial", "B", 16)
     HEADER_FONT = ("Arial", "B", 10)
     CONTENT_FONT = ("Arial", "", 8)
+    TOTAL_FONT = ("Arial", "B", 8)
     HEADER_BG_COLOR = (0, 0, 0)
     HEADER_TEXT_COLOR = (255, 255, 255)
     SUBHEADER_BG_COLOR = (200, 200, 200)
 
 
 class PDFReportGenerator(BaseReportGenerator):
-    def __init__(self):
+    def __init__(self, output_dir: str = ""):
+        super().__init__(output_dir)
         self._setup_column_configs()
 
     def _setup_column_configs(self):
@@ -280,17 +283,70 @@ class PDFReportGenerator(BaseReportGenerator):
         pdf.ln(15)
 
     def _add_table_content(
-        self, pdf: FPDF, df: pd.DataFrame, columns: List[ColumnConfig]
+        self,
+        pdf: FPDF,
+        df: pd.DataFrame,
+        columns: List[ColumnConfig],
+        header_info: Dict[str, Any] = None,
     ) -> None:
-        """Add table content rows"""
+        """Add table content rows, with subtotal rows when the frame was fetched with them"""
         pdf.set_font(*PDFStyle.CONTENT_FONT)
-        for _, row in df.iterrows():
-            for col in columns:
-                value = row[col.name]
-                formatted_value = col.formatter(value)
-                pdf.cell(col.width, 10, formatted_value, 1)
+        if SUBTOTAL_LEVEL_COLUMN not in df.columns:
+            # Read the columns directly rather than building a Series per row
+            for row in zip(*(df[col.name] for col in columns)):
+                for col, value in zip(columns, row):
+                    pdf.cell(col.width, 10, col.formatter(value), 1)
+                pdf.ln()
+            return
+
+        for *row, level in zip(*(df[col.name] for col in columns), df[SUBTOTAL_LEVEL_COLUMN]):
+            if level:
+                self._add_subtotal_row(
+                    pdf, columns, level, dict(zip((col.name for col in columns), row)), header_info
+                )
+                pdf.set_font(*PDFStyle.CONTENT_FONT)
+                continue
+            for col, value in zip(columns, row):
+                pdf.cell(col.width, 10, col.formatter(value), 1)
             pdf.ln()
 
+    def _add_totals_row(
+        self,
+        pdf: FPDF,
+        columns: List[ColumnConfig],
+        label: str,
+        totals: Dict[str, float],
+        groups: Dict[str, str] = None,
+    ) -> None:
+        """Add a bold row with the label in the first column and summed hour columns
+
+        Columns named in groups show the given text, e.g. the namespace of a subtotal.
+        """
+        groups = groups or {}
+        pdf.set_font(*PDFStyle.TOTAL_FONT)
+        for i, col in enumerate(columns):
+            if col.name in totals:
+                text = f"{totals[col.name]:.2f}"
+            elif col.name in groups:
+                text = groups[col.name]
+            else:
+                text = label if i == 0 else ""
+            pdf.cell(col.width, 10, text, 1)
+        pdf.ln()
+
+    def _add_subtotal_row(
+        self,
+        pdf: FPDF,
+        columns: List[ColumnConfig],
+        level: int,
+        row: Dict[str, Any],
+        header_info: Dict[str, Any],
+    ) -> None:
+        totals = {column: row[column] for column in self._total_columns(header_info)}
+        self._add_totals_row(
+            pdf, columns, self.SUBTOTAL_LABELS[level], totals, self._subtotal_groups(level, row)
+        )
+
     def _generate_report(
         self,
         df: pd.DataFrame,
@@ -303,6 +359,13 @@ class PDFReportGenerator(BaseReportGenerator):
         """Generate a PDF report with the specified format"""
         output_file = self._build_filename(header_info, self.PDF_EXTENSION)
         pdf = self._create_pdf()
+
+        # The grand total closes the last page instead of forming a namespace of its own
+        grand_totals = df.iloc[0:0]
+        if SUBTOTAL_LEVEL_COLUMN in df.columns:
+            is_grand_total = df[SUBTOTAL_LEVEL_COLUMN] == GRAND_TOTAL
+            grand_totals = df[is_grand_total]
+            df = df[~is_grand_total]
         
         # Check if there's data to display
         if df.empty:
@@ -312,14 +375,14 @@ class PDFReportGenerator(BaseReportGenerator):
             pdf.cell(0, 20, "No Results", ln=True, align="C")
         else:
             if 'namespace' in df.columns:
-                # Group by namespace and create separate pages
-                namespaces = df['namespace'].unique()
-                for i, namespace in enumerate(namespaces):
+                # Group by namespace, in order of first appearance, and create separate pages
+                namespace_groups = df.groupby(
+                    'namespace', sort=False, observed=True, dropna=False
+                )
+                for i, (namespace, namespace_data) in enumerate(namespace_groups):
                     if i > 0:
                         pdf.add_page()
                     
-                    namespace_data = df[df['namespace'] == namespace]
-                    
                     if header_info.get('namespace'):
                         if i == 0:
                             self._add_report_header(pdf, header_info, missing_periods)
@@ -327,11 +390,14 @@ class PDFReportGenerator(BaseReportGenerator):
                         self._add_report_header(pdf, header_info, missing_periods, namespace)
                     
                     self._add_table_headers(pdf, columns, headers, is_detailed)
-                    self._add_table_content(pdf, namespace_data, columns)
+                    self._add_table_content(pdf, namespace_data, columns, header_info)
             else:
                 self._add_report_header(pdf, header_info, missing_periods)
                 self._add_table_headers(pdf, columns, headers, is_detailed)
-                self._add_table_content(pdf, df, columns)
+                self._add_table_content(pdf, df, columns, header_info)
+
+            for row in grand_totals.to_dict("records"):
+                self._add_subtotal_row(pdf, columns, GRAND_TOTAL, row, header_info)
         
         pdf.output(output_file)
         return output_file
@@ -361,3 +427,48 @@ class PDFReportGenerator(BaseReportGenerator):
             False,
             missing_periods,
         )
+
+    def generate_fleet_report(
+        self, df: pd.DataFrame, header_info: Dict[str, Any], missing_periods_by_cluster: dict
+    ) -> str:
+        """Generate a multi-cluster PDF report with a section per cluster and fleet totals"""
+        output_file = self._build_filename(header_info, self.PDF_EXTENSION)
+        is_detailed = header_info["report_type"] == "detailed"
+        columns = self.detailed_columns if is_detailed else self.summary_columns
+        headers = self.detailed_table_headers if is_detailed else self.summary_table_headers
+        pdf = self._create_pdf()
+        cluster_totals = {}
+
+        for i, cluster in enumerate(header_info["clusters"]):
+            if i > 0:
+                pdf.add_page()
+            cluster_df = df[df["cluster"] == cluster]
+            cluster_header = {**header_info, "cluster_name": cluster}
+
+            self._add_report_header(
+                pdf, cluster_header, missing_periods_by_cluster.get(cluster, [])
+            )
+            self._add_table_headers(pdf, columns, headers, is_detailed)
+            if cluster_df.empty:
+                pdf.set_font(*PDFStyle.HEADER_FONT)
+                pdf.cell(0, 20, "No Results", ln=True, align="C")
+            else:
+                self._add_table_content(pdf, cluster_df, columns)
+
+            cluster_totals[cluster] = self._cluster_totals(cluster_df, header_info)
+            self._add_totals_row(pdf, columns, "Total", cluster_totals[cluster])
+
+        # Fleet totals page
+        pdf.add_page()
+        self._add_report_header(pdf, header_info, [])
+        pdf.set_font(*PDFStyle.HEADER_FONT)
+        pdf.cell(0, 10, "Fleet Totals", ln=True, align="L")
+        self._add_table_headers(pdf, columns, headers, is_detailed)
+        for cluster, totals in cluster_totals.items():
+            self._add_totals_row(pdf, columns, cluster, totals)
+        self._add_totals_row(
+            pdf, columns, "All clusters", self._cluster_totals(df, header_info)
+        )
+
+        pdf.output(output_file)
+        return output_file
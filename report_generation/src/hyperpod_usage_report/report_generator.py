@@ -1,16 +1,45 @@
+import copy
+import itertools
 import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, List, Tuple, Union
 
-import awswrangler as wr
-import pandas as pd
-
-from .generators.csv_generator import CSVReportGenerator
-from .generators.pdf_generator import PDFReportGenerator
+from .utils.frames import drop_empty_subtotals, normalize_report_frame
+from .utils.input_fingerprint import (
+    FINGERPRINT_METADATA_KEY,
+    compute_fingerprint,
+    list_source_objects,
+)
+from .utils.lazy_import import LazyModule
+from .utils.metrics import RunMetrics
+from .utils.pipeline import Pipeline, gzip_blocks
 from .utils.query_builder import QueryBuilder
+from .utils.query_cache import QueryResultCache
+from .utils.report_catalog import ReportCatalog
+from .utils.scan_estimator import (
+    ScanBudgetExceededError,
+    ScanEstimate,
+    ScanEstimator,
+    format_bytes,
+)
+from .utils.workgroup_limiter import WorkgroupLimiter
 from .utils.s3_uploader import S3Uploader
 
+# Loaded on first use so that CLI parsing and validation never pay for them
+wr = LazyModule("awswrangler")
+pd = LazyModule("pandas")
+
+# Length in days of each shard when a report range is fetched as parallel queries
+SHARD_DAYS = {"day": 1, "week": 7}
+DEFAULT_MAX_SHARD_WORKERS = 8
+DEFAULT_SHARD_RETRIES = 2
+SHARD_RETRY_BACKOFF_SECONDS = 2
+GZIP_EXTENSION = "gz"
+
 
 class ReportType(Enum):
     SUMMARY = "summary"
@@ -29,6 +58,18 @@ class S3UploadError(Exception):
     pass
 
 
+def create_format_generator(report_format: str, output_dir: str = ""):
+    """Create the CSV or PDF generator, importing only the one that is needed"""
+    if report_format.lower() == "csv":
+        from .generators.csv_generator import CSVReportGenerator
+
+        return CSVReportGenerator(output_dir)
+
+    from .generators.pdf_generator import PDFReportGenerator
+
+    return PDFReportGenerator(output_dir)
+
+
 class ReportGenerator:
     def __init__(
         self,
@@ -36,43 +77,462 @@ class ReportGenerator:
         end_date: str,
         cluster_name: str,
         database_name: str,
-        report_type: str,
+        report_type: Union[str, List[str]],
         output_location: str,
         database_workgroup_name: str,
-        format: str,
+        format: Union[str, List[str]],
         namespace: str = None,
         task: str = None,
+        boto3_session: Any = None,
+        query_cache: QueryResultCache = None,
+        output_dir: str = "",
+        query_limiter: WorkgroupLimiter = None,
+        shard_by: str = None,
+        max_shard_workers: int = DEFAULT_MAX_SHARD_WORKERS,
+        shard_retries: int = DEFAULT_SHARD_RETRIES,
+        cluster_filter: bool = False,
+        max_scan_bytes: int = None,
+        check_catalog: bool = False,
+        skip_unchanged: bool = False,
+        subtotals: bool = False,
+        pipeline: bool = False,
+        compress: bool = False,
+        metrics: RunMetrics = None,
     ):
         self.start_date = datetime.strptime(start_date, "%Y-%m-%d")
         self.end_date = datetime.strptime(end_date, "%Y-%m-%d")
         self.database_name = database_name
-        self.report_type = report_type
+        # Several report types and formats are rendered from one fetch; the first of
+        # each is used wherever a single report is meant
+        self.report_types = [report_type] if isinstance(report_type, str) else list(report_type)
+        self.formats = [format] if isinstance(format, str) else list(format)
+        self.report_type = self.report_types[0]
         self.output_location = output_location
-        self.format = format
+        self.format = self.formats[0]
         self.cluster_name = cluster_name
         self.database_workgroup_name = database_workgroup_name
         self.namespace = namespace
         self.task = task
-        
-        self.generator = (
-            CSVReportGenerator() if format.lower() == "csv" else PDFReportGenerator()
+        # Optional state shared by long-running or batch callers
+        self.boto3_session = boto3_session
+        self.query_cache = query_cache
+        self.output_dir = output_dir
+        self.query_limiter = query_limiter
+        if shard_by is not None and shard_by not in SHARD_DAYS:
+            raise ValueError(
+                f"Invalid shard period '{shard_by}'. Must be one of: {', '.join(SHARD_DAYS)}"
+            )
+        if subtotals and shard_by is not None:
+            raise ValueError("Subtotals cover the whole range and cannot be fetched in shards")
+        if pipeline and (
+            len(self.report_types) > 1 or len(self.formats) > 1 or self.format.lower() != "csv"
+        ):
+            raise ValueError("The pipelined run streams a single CSV report")
+        if compress and not pipeline:
+            raise ValueError("Compressed reports are only written by the pipelined run")
+        self.shard_by = shard_by
+        self.max_shard_workers = max_shard_workers
+        self.shard_retries = shard_retries
+        # Restrict queries to this cluster's partitions when a database holds several clusters
+        self.cluster_filter = cluster_filter
+        # Refuse to submit queries estimated to scan more than this many bytes
+        self.max_scan_bytes = max_scan_bytes
+        # Look the filters up in the report catalog before running the report queries
+        self.check_catalog = check_catalog
+        # Skip the run when the stored report was rendered from the same inputs
+        self.skip_unchanged = skip_unchanged
+        # Fetch team, namespace and grand total rows with the report rows
+        self.subtotals = subtotals
+        # Stream the report from Athena to S3 through concurrent stages instead of
+        # rendering a local file, optionally gzip-compressed
+        self.pipeline = pipeline
+        self.compress = compress
+        self.metrics = metrics or RunMetrics()
+        self._generator = None
+
+    @property
+    def generator(self):
+        """Report generator for the requested format, imported when first rendered"""
+        if self._generator is None:
+            self._generator = create_format_generator(self.format, self.output_dir)
+        return self._generator
+
+    def _output(self, report_type: str, format: str = None) -> "ReportGenerator":
+        """A copy of this generator for a single report type and format
+
+        The copy shares the session, caches, limiter and metrics of this generator.
+        """
+        output = copy.copy(self)
+        output.report_type = report_type
+        output.report_types = [report_type]
+        output.format = format or self.format
+        output.formats = [output.format]
+        output._generator = None
+        return output
+
+    def _outputs(self) -> List["ReportGenerator"]:
+        """One single-output generator per requested report type and format"""
+        return [
+            self._output(report_type, format)
+            for report_type in self.report_types
+            for format in self.formats
+        ]
+
+    def _read_sql_query(self, sql: str, workgroup: str = None, query: str = "report") -> Any:
+        """Runs an Athena query through the optional shared cache and workgroup limiter
+
+        Queries that actually reach Athena are recorded in the run metrics under the
+        given query kind; cache hits are not.
+        """
+        kwargs = {"sql": sql, "database": self.database_name}
+        if workgroup:
+            kwargs["workgroup"] = workgroup
+        if self.boto3_session is not None:
+            kwargs["boto3_session"] = self.boto3_session
+
+        def timed_query():
+            start = time.perf_counter()
+            df = wr.athena.read_sql_query(**kwargs)
+            self.metrics.record_query(
+                query, df, time.perf_counter() - start, cluster=self.cluster_name
+            )
+            return df
+
+        def run_query():
+            if self.query_limiter is None:
+                return timed_query()
+            with self.query_limiter.slot(workgroup):
+                return timed_query()
+
+        if self.query_cache is None:
+            return run_query()
+
+        df = self.query_cache.get_or_load(
+            (self.database_name, workgroup, sql), run_query
+        )
+        # Shallow copy so callers adding columns never modify the cached frame
+        return df.copy(deep=False)
+
+    def _read_sql_chunks(
+        self, sql: str, workgroup: str = None, query: str = "report"
+    ) -> Iterator[Any]:
+        """Runs an Athena query and yields its result in chunks as they are downloaded
+
+        The workgroup slot is only held until the query has finished. Chunked results
+        bypass the query cache, which holds whole frames.
+        """
+        kwargs = {"sql": sql, "database": self.database_name, "chunksize": True}
+        if workgroup:
+            kwargs["workgroup"] = workgroup
+        if self.boto3_session is not None:
+            kwargs["boto3_session"] = self.boto3_session
+
+        start = time.perf_counter()
+        if self.query_limiter is None:
+            chunks = wr.athena.read_sql_query(**kwargs)
+        else:
+            with self.query_limiter.slot(workgroup):
+                chunks = wr.athena.read_sql_query(**kwargs)
+        if isinstance(chunks, pd.DataFrame):
+            chunks = [chunks]
+
+        first_chunk = None
+        rows = 0
+        for chunk in chunks:
+            if first_chunk is None:
+                first_chunk = chunk
+            rows += len(chunk)
+            yield chunk
+        self.metrics.record_query(
+            query, first_chunk, time.perf_counter() - start, rows=rows, cluster=self.cluster_name
         )
 
+    def _cluster_filter_args(self) -> Dict[str, str]:
+        return {"cluster": self.cluster_name} if self.cluster_filter else {}
+
+    def _subtotal_args(self) -> Dict[str, bool]:
+        return {"subtotals": True} if self.subtotals else {}
+
+    def _date_shards(self) -> List[Tuple[datetime, datetime]]:
+        """Splits the report range into consecutive day or week shards"""
+        step = timedelta(days=SHARD_DAYS[self.shard_by])
+        shards = []
+        shard_start = self.start_date
+        while shard_start <= self.end_date:
+            shard_end = min(shard_start + step - timedelta(days=1), self.end_date)
+            shards.append((shard_start, shard_end))
+            shard_start = shard_end + timedelta(days=1)
+        return shards
+
+    def _shard_query(self, shard_start: datetime, shard_end: datetime) -> str:
+        return QueryBuilder.build_fetch_report_data_query(
+            self.report_type,
+            shard_start.strftime("%Y-%m-%d"),
+            shard_end.strftime("%Y-%m-%d"),
+            self.namespace,
+            self.task,
+            partition_filter=True,
+            **self._cluster_filter_args(),
+        )
+
+    def _report_query(self) -> str:
+        return QueryBuilder.build_fetch_report_data_query(
+            self.report_type,
+            self.start_date.strftime("%Y-%m-%d"),
+            self.end_date.strftime("%Y-%m-%d"),
+            self.namespace,
+            self.task,
+            **self._subtotal_args(),
+            **self._cluster_filter_args(),
+        )
+
+    def _heartdub_query(self) -> str:
+        return QueryBuilder.build_fetch_heartdub_query(
+            self.start_date.strftime("%Y-%m-%d"),
+            self.end_date.strftime("%Y-%m-%d"),
+            **self._cluster_filter_args(),
+        )
+
+    def fetch_catalog(self) -> ReportCatalog:
+        """Fetches the report catalog entries of the report's days
+
+        The lookup goes through the query cache, so callers sharing one only read the
+        catalog once per range.
+        """
+        query = QueryBuilder.build_fetch_catalog_query(
+            self.start_date.strftime("%Y-%m-%d"),
+            self.end_date.strftime("%Y-%m-%d"),
+            **self._cluster_filter_args(),
+        )
+        df = self._read_sql_query(query, self.database_workgroup_name, query="catalog")
+        return ReportCatalog(df, self.start_date, self.end_date)
+
+    def _check_catalog(self) -> int:
+        """Estimated report rows; raises NoMatchingDataError when a filter has no data"""
+        try:
+            catalog = self.fetch_catalog()
+        except Exception as e:
+            # Deployments without the catalog table still get their report
+            print(f"Skipping the report catalog check: {str(e)}")
+            return None
+        return sum(
+            catalog.check(report_type, self.namespace, self.task)
+            for report_type in self.report_types
+        )
+
+    def _fetch_shard(self, shard_start: datetime, shard_end: datetime) -> Any:
+        """Fetches one partition-scoped shard, retrying only this shard on failure"""
+        query = self._shard_query(shard_start, shard_end)
+        for attempt in range(self.shard_retries + 1):
+            try:
+                return self._read_sql_query(query, self.database_workgroup_name)
+            except Exception as e:
+                if attempt == self.shard_retries:
+                    raise
+                print(
+                    f"Retrying shard {shard_start:%Y-%m-%d} to {shard_end:%Y-%m-%d} "
+                    f"after error: {str(e)}"
+                )
+                time.sleep(SHARD_RETRY_BACKOFF_SECONDS * (attempt + 1))
+
+    def _fetch_sharded_data(self) -> Any:
+        """Fetches all shards in parallel and concatenates them in date order"""
+        shards = self._date_shards()
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(self.max_shard_workers, len(shards)))
+        ) as executor:
+            frames = list(executor.map(lambda shard: self._fetch_shard(*shard), shards))
+
+        # Each shard is sorted by report_date first, so shard order keeps the global order
+        non_empty = [frame for frame in frames if not frame.empty]
+        if not non_empty:
+            return frames[0]
+        return pd.concat(non_empty, ignore_index=True)
+
     def _fetch_data(self):
         """Fetches required data for report generation"""
+        if self.shard_by:
+            try:
+                return self._fetch_sharded_data()
+            except Exception as e:
+                print(f"Error fetching data: {str(e)}")
+                raise
+
         try:
-            query = QueryBuilder.build_fetch_report_data_query(
-                self.report_type,
-                self.start_date.strftime("%Y-%m-%d"),
-                self.end_date.strftime("%Y-%m-%d"),
-                self.namespace,
-                self.task,
+            query = self._report_query()
+            return self._read_sql_query(query, self.database_workgroup_name)
+        except Exception as e:
+            print(f"Error fetching data: {str(e)}")
+            raise
+
+    def _prefetch_shards(self) -> Iterator[Any]:
+        """Yields the shards in date order, fetching at most max_shard_workers ahead"""
+        shards = iter(self._date_shards())
+        workers = max(1, self.max_shard_workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque(
+                executor.submit(self._fetch_shard, *shard)
+                for shard in itertools.islice(shards, workers)
             )
-            return wr.athena.read_sql_query(sql=query, database=self.database_name, workgroup=self.database_workgroup_name)
+            try:
+                while pending:
+                    frame = pending.popleft().result()
+                    shard = next(shards, None)
+                    if shard is not None:
+                        pending.append(executor.submit(self._fetch_shard, *shard))
+                    yield frame
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _fetch_chunks(self) -> Iterator[Any]:
+        """Yields the report rows in report order as normalized chunks, for the pipelined run"""
+        if self.shard_by:
+            chunks = self._prefetch_shards()
+        else:
+            chunks = self._read_sql_chunks(self._report_query(), self.database_workgroup_name)
+
+        has_report_rows = False
+        try:
+            for chunk in chunks:
+                if not has_report_rows:
+                    # Subtotal rows follow the rows they total, so subtotals before any
+                    # report row are the empty grand total of a report without rows
+                    chunk = drop_empty_subtotals(chunk)
+                    has_report_rows = not chunk.empty
+                yield normalize_report_frame(chunk)
         except Exception as e:
             print(f"Error fetching data: {str(e)}")
             raise
 
+    def estimate_scan(self, estimator: ScanEstimator = None) -> List[Tuple[str, ScanEstimate]]:
+        """Estimates the bytes scanned by every query of the report without running them
+
+        Only the sharded queries prune the report table by day; the cluster partition is
+        pruned when the cluster filter is on. The heartbeat query reads its whole table.
+        """
+        estimator = estimator or ScanEstimator(self.database_name, self.boto3_session)
+        cluster = self.cluster_name if self.cluster_filter else None
+
+        estimates = []
+        for report_type in self.report_types:
+            output = self._output(report_type)
+            table = f"{report_type}_report"
+            if self.shard_by:
+                estimates.extend(
+                    (
+                        output._shard_query(shard_start, shard_end),
+                        estimator.estimate(
+                            table,
+                            shard_start.strftime("%Y-%m-%d"),
+                            shard_end.strftime("%Y-%m-%d"),
+                            cluster,
+                        ),
+                    )
+                    for shard_start, shard_end in self._date_shards()
+                )
+            else:
+                estimates.append(
+                    (output._report_query(), estimator.estimate(table, cluster=cluster))
+                )
+
+        estimates.append((self._heartdub_query(), estimator.estimate("heartdub")))
+        return estimates
+
+    def explain(self, estimator: ScanEstimator = None) -> str:
+        """Describes the SQL, partitions touched and estimated cost of the report"""
+        estimates = self.estimate_scan(estimator)
+        lines = []
+        for sql, estimate in estimates:
+            lines.append("SQL:")
+            lines.extend(line.rstrip() for line in sql.strip("\n").splitlines())
+            lines.extend(estimate.describe())
+            lines.append("")
+        total_bytes = sum(estimate.bytes_scanned for _, estimate in estimates)
+        total_cost = sum(estimate.cost_usd for _, estimate in estimates)
+        lines.append(
+            f"Total estimated scan: {format_bytes(total_bytes)} (~${total_cost:.4f})"
+        )
+        return "\n".join(lines)
+
+    def _check_scan_budget(self) -> None:
+        """Raises ScanBudgetExceededError when the estimated scan is over max_scan_bytes"""
+        if self.max_scan_bytes is None:
+            return
+        total_bytes = sum(estimate.bytes_scanned for _, estimate in self.estimate_scan())
+        if total_bytes > self.max_scan_bytes:
+            raise ScanBudgetExceededError(
+                f"Report would scan about {format_bytes(total_bytes)}, over the budget of "
+                f"{format_bytes(self.max_scan_bytes)}. Narrow the date range, use "
+                f"--shard-by to prune partitions, or override the budget."
+            )
+
+    def _fingerprint_parameters(self) -> Dict[str, Any]:
+        return {
+            "cluster_name": self.cluster_name,
+            "database_name": self.database_name,
+            "report_types": self.report_types,
+            "formats": [format.lower() for format in self.formats],
+            "start_date": self.start_date.strftime("%Y-%m-%d"),
+            "end_date": self.end_date.strftime("%Y-%m-%d"),
+            "namespace": self.namespace,
+            "task": self.task,
+            "cluster_filter": self.cluster_filter,
+            "subtotals": self.subtotals,
+        }
+
+    def source_objects(self, estimator: ScanEstimator = None) -> List[Tuple[str, str, str]]:
+        """Key, ETag and last-modified time of the report and heartbeat objects of the range"""
+        estimator = estimator or ScanEstimator(self.database_name, self.boto3_session)
+        start_date = self.start_date.strftime("%Y-%m-%d")
+        end_date = self.end_date.strftime("%Y-%m-%d")
+        cluster = self.cluster_name if self.cluster_filter else None
+        return list_source_objects(
+            estimator,
+            [
+                (f"{report_type}_report", start_date, end_date, cluster)
+                for report_type in self.report_types
+            ]
+            + [("heartdub", start_date, end_date, None)],
+        )
+
+    def input_fingerprint(self, estimator: ScanEstimator = None) -> str:
+        """Fingerprint of the report parameters, generator version and source objects"""
+        return compute_fingerprint(self._fingerprint_parameters(), self.source_objects(estimator))
+
+    def report_file_path(self) -> str:
+        """Local path the report is rendered to; its name is also the uploaded key"""
+        extension = (
+            self.generator.CSV_EXTENSION
+            if self.format.lower() == "csv"
+            else self.generator.PDF_EXTENSION
+        )
+        if self.compress:
+            extension = f"{extension}.{GZIP_EXTENSION}"
+        return self.generator._build_filename(self._prepare_header_info(), extension)
+
+    def _check_unchanged(self) -> Tuple[bool, Dict[str, str]]:
+        """Whether every stored output has the current input fingerprint, and the metadata to upload
+
+        When the fingerprint cannot be computed the report is rendered as usual, without
+        a fingerprint.
+        """
+        try:
+            fingerprint = self.input_fingerprint()
+            stored = [
+                S3Uploader.get_remote_metadata(
+                    output.report_file_path(), self.output_location, self.boto3_session
+                )
+                for output in self._outputs()
+            ]
+        except Exception as e:
+            print(f"Skipping the input fingerprint check: {str(e)}")
+            return False, None
+        unchanged = all(
+            (metadata or {}).get(FINGERPRINT_METADATA_KEY) == fingerprint for metadata in stored
+        )
+        return unchanged, {FINGERPRINT_METADATA_KEY: fingerprint}
+
     def _prepare_header_info(self) -> Dict[str, str]:
         """Prepares header information for the report"""
         base_header = {
@@ -114,10 +574,17 @@ class ReportGenerator:
                 f"Failed to generate {report_type.value} report: {str(e)}"
             )
 
-    def _upload_and_cleanup(self, output_file: str) -> None:
-        """Uploads the generated report to S3"""
+    def _upload_and_cleanup(
+        self, output_files: List[str], metadata: Dict[str, str] = None
+    ) -> None:
+        """Uploads the generated reports to S3, skipping those whose stored copy is identical"""
         try:
-            S3Uploader.upload_file(output_file, self.output_location)
+            S3Uploader.upload_files(
+                output_files,
+                self.output_location,
+                boto3_session=self.boto3_session,
+                metadata=metadata,
+            )
             print(f"Successfully uploaded report to {self.output_location}")
         except Exception as e:
             raise S3UploadError(f"Failed to upload report: {str(e)}")
@@ -127,11 +594,8 @@ class ReportGenerator:
         all_hours = list(range(24))
         results = []
         try:
-            query = QueryBuilder.build_fetch_heartdub_query(
-                self.start_date.strftime("%Y-%m-%d"),
-                self.end_date.strftime("%Y-%m-%d"),
-            )
-            df = wr.athena.read_sql_query(sql=query, database=self.database_name)
+            query = self._heartdub_query()
+            df = self._read_sql_query(query, query="heartbeat")
         except Exception as e:
             print(f"Error fetching data: {str(e)}")
             raise
@@ -178,36 +642,186 @@ class ReportGenerator:
                     prev = h
         return results
 
-    def generate_report(self):
-        output_file = None
-        try:
-            # Validate report type
-            report_type = ReportType(self.report_type)
+    def _render_output(
+        self, output: "ReportGenerator", df: Any, missing_periods: list
+    ) -> str:
+        report_type = ReportType(output.report_type)
+        with self.metrics.stage(
+            "render", cluster=self.cluster_name, report_type=output.report_type, format=output.format
+        ) as stage:
+            stage["rows"] = len(df)
+            return output._generate_report_by_type(
+                df, output._prepare_header_info(), report_type, missing_periods
+            )
+
+    def _check_inputs(self) -> None:
+        """Validates the report types and runs the optional checks before any report query"""
+        # Validate report types
+        for report_type in self.report_types:
+            ReportType(report_type)
+
+        # Refuse oversized scans before anything is submitted
+        if self.max_scan_bytes is not None:
+            with self.metrics.stage("scan_estimate", cluster=self.cluster_name):
+                self._check_scan_budget()
+
+        # Reject filters without data before the report and heartbeat queries run
+        if self.check_catalog:
+            with self.metrics.stage("catalog_check", cluster=self.cluster_name) as stage:
+                stage["rows"] = self._check_catalog()
+
+    def render_reports(self) -> List[str]:
+        """Fetches the data and renders every requested report locally, returning the file paths
 
-            # Fetch and prepare data
-            df = self._fetch_data()
-            header_info = self._prepare_header_info()
+        Each report type's table is fetched once and the missing periods are computed
+        once; all formats are then rendered concurrently from those shared frames.
+        """
+        self._check_inputs()
 
-            # Fetch missing date period
+        # Fetch and prepare data
+        frames = {}
+        for report_type in self.report_types:
+            with self.metrics.stage(
+                "fetch_data", cluster=self.cluster_name, report_type=report_type
+            ) as stage:
+                frames[report_type] = normalize_report_frame(
+                    drop_empty_subtotals(self._output(report_type)._fetch_data())
+                )
+                stage["rows"] = len(frames[report_type])
+
+        # Fetch missing date period
+        with self.metrics.stage("gap_detection", cluster=self.cluster_name) as stage:
             missing_periods = self._find_missing_period()
+            stage["rows"] = len(missing_periods)
+
+        # Generate every report type and format
+        outputs = self._outputs()
+        if len(outputs) == 1:
+            return [self._render_output(outputs[0], frames[self.report_type], missing_periods)]
+
+        with ThreadPoolExecutor(
+            max_workers=len(outputs), thread_name_prefix="report-render"
+        ) as executor:
+            futures = [
+                executor.submit(
+                    self._render_output, output, frames[output.report_type], missing_periods
+                )
+                for output in outputs
+            ]
+        errors = [future.exception() for future in futures if future.exception()]
+        output_files = [future.result() for future in futures if not future.exception()]
+        if errors:
+            for output_file in output_files:
+                if os.path.exists(output_file):
+                    os.remove(output_file)
+            raise errors[0]
+        return output_files
+
+    def render_report(self) -> str:
+        """Fetches the data and renders the report locally, returning the output file path
 
-            # Generate appropriate report
-            output_file = self._generate_report_by_type(
-                df, header_info, report_type, missing_periods
+        Use render_reports() when several report types or formats were requested.
+        """
+        if len(self.report_types) > 1 or len(self.formats) > 1:
+            raise ValueError(
+                "render_report() renders a single report; use render_reports() for several "
+                "report types or formats"
             )
+        return self.render_reports()[0]
+
+    def stream_report(self, metadata: Dict[str, str] = None) -> str:
+        """Fetches, formats, optionally compresses and uploads the report as one pipeline
+
+        Each stage runs on its own thread, linked by bounded queues: rows are formatted
+        and parts uploaded while later rows are still being fetched, and the report is
+        never written to disk. Returns the uploaded file name.
+        """
+        self._check_inputs()
+
+        # Fetch missing date period
+        with self.metrics.stage("gap_detection", cluster=self.cluster_name) as stage:
+            missing_periods = self._find_missing_period()
+            stage["rows"] = len(missing_periods)
+
+        header_info = self._prepare_header_info()
+        file_name = os.path.basename(self.report_file_path())
+
+        def fetch() -> Iterator[Any]:
+            with self.metrics.stage(
+                "fetch_data", cluster=self.cluster_name, report_type=self.report_type
+            ) as stage:
+                stage["rows"] = 0
+                for chunk in self._fetch_chunks():
+                    stage["rows"] += len(chunk)
+                    yield chunk
+
+        def render(chunks: Iterator[Any]) -> Iterator[bytes]:
+            with self.metrics.stage(
+                "render", cluster=self.cluster_name, report_type=self.report_type, format=self.format
+            ):
+                for block in self.generator.stream_report(chunks, header_info, missing_periods):
+                    yield block.encode("utf-8")
+
+        def compress(blocks: Iterator[bytes]) -> Iterator[bytes]:
+            with self.metrics.stage("compress", cluster=self.cluster_name):
+                yield from gzip_blocks(blocks)
+
+        def upload(blocks: Iterator[bytes]) -> None:
+            with self.metrics.stage("upload", cluster=self.cluster_name) as stage:
+                try:
+                    stage["bytes"] = S3Uploader.upload_stream(
+                        blocks,
+                        file_name,
+                        self.output_location,
+                        boto3_session=self.boto3_session,
+                        metadata=metadata,
+                    )
+                except Exception as e:
+                    raise S3UploadError(f"Failed to upload report: {str(e)}")
+
+        stages = [("render", render)]
+        if self.compress:
+            stages.append(("compress", compress))
+        Pipeline().run(("fetch_data", fetch()), stages, ("upload", upload))
+        return file_name
+
+    def generate_report(self):
+        report_types = ", ".join(self.report_types)
+        output_files = []
+        try:
+            metadata = None
+            if self.skip_unchanged:
+                # Validate report types before any listing
+                for report_type in self.report_types:
+                    ReportType(report_type)
+                with self.metrics.stage("fingerprint", cluster=self.cluster_name):
+                    unchanged, metadata = self._check_unchanged()
+                if unchanged:
+                    print(
+                        f"Skipping {report_types} report, its inputs are unchanged "
+                        f"since it was last uploaded"
+                    )
+                    return
+
+            if self.pipeline:
+                self.stream_report(metadata)
+            else:
+                output_files = self.render_reports()
 
-            # Upload and cleanup
-            self._upload_and_cleanup(output_file)
+                # Upload and cleanup
+                with self.metrics.stage("upload", cluster=self.cluster_name):
+                    self._upload_and_cleanup(output_files, metadata)
 
-            print(f"Successfully generated and uploaded {report_type.value} report")
+            print(f"Successfully generated and uploaded {report_types} report")
 
         except ValueError:
-            print(f"Invalid report type: {self.report_type}")
+            print(f"Invalid report type: {report_types}")
             raise
         except Exception as e:
             print(f"Report generation failed: {str(e)}")
             raise ReportGenerationError(f"Failed to generate report: {str(e)}")
         finally:
-            if output_file and os.path.exists(output_file):
-                os.remove(output_file)
-                print(f"Cleaned up temporary file: {output_file}")
+            for output_file in output_files:
+                if os.path.exists(output_file):
+                    os.remove(output_file)
+                    print(f"Cleaned up temporary file: {output_file}")
@@ -0,0 +1,210 @@
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+
+REPORT_FORMATS = ("pdf", "csv")
+REPORT_TYPES = ("summary", "detailed")
+SHARD_PERIODS = ("day", "week")
+CLUSTER_KEYS = {"cluster_name", "database_name", "database_workgroup_name"}
+STRING_FIELDS = (
+    "start_date",
+    "end_date",
+    "format",
+    "type",
+    "database_name",
+    "database_workgroup_name",
+    "cluster_name",
+    "output_report_location",
+    "namespace",
+    "task",
+    "shard_by",
+)
+
+
+@dataclass
+class ReportSpec:
+    """Parameters of a single report, as accepted by run.py and the service/batch entry points"""
+
+    start_date: str
+    end_date: str
+    format: str
+    type: str
+    database_name: str
+    database_workgroup_name: str
+    cluster_name: str
+    output_report_location: str = None
+    namespace: str = None
+    task: str = None
+    shard_by: str = None
+    # Extra clusters for a fleet report, as names or mappings with cluster_name and
+    # optional database_name and database_workgroup_name
+    clusters: list = None
+    max_scan_bytes: int = None
+    check_catalog: bool = None
+    skip_unchanged: bool = None
+    subtotals: bool = None
+    pipeline: bool = None
+    compress: bool = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ReportSpec":
+        """Build and validate a spec from a JSON-style dictionary"""
+        if not isinstance(data, dict):
+            raise ValueError("Report spec must be a JSON object")
+
+        known = {f.name for f in fields(cls)}
+        unknown = sorted(set(data) - known)
+        if unknown:
+            raise ValueError(f"Unknown report spec fields: {', '.join(unknown)}")
+
+        required = [f.name for f in fields(cls) if f.default is not None]
+        missing = [name for name in required if not data.get(name)]
+        if missing:
+            raise ValueError(f"Missing required report spec fields: {', '.join(missing)}")
+
+        spec = cls(**data)
+        spec.validate()
+        return spec
+
+    def validate(self) -> None:
+        for name in STRING_FIELDS:
+            value = getattr(self, name)
+            if value is not None and not isinstance(value, str):
+                raise ValueError(f"{name} must be a string")
+
+        try:
+            start_date = datetime.strptime(self.start_date, "%Y-%m-%d")
+            end_date = datetime.strptime(self.end_date, "%Y-%m-%d")
+        except ValueError as e:
+            raise ValueError(f"Invalid date, expected YYYY-MM-DD: {str(e)}")
+
+        if end_date < start_date:
+            raise ValueError("end_date must not be earlier than start_date")
+
+        if self.format not in REPORT_FORMATS:
+            raise ValueError(
+                f"Invalid format '{self.format}'. Must be one of: {', '.join(REPORT_FORMATS)}"
+            )
+
+        if self.type not in REPORT_TYPES:
+            raise ValueError(
+                f"Invalid report type '{self.type}'. Must be one of: {', '.join(REPORT_TYPES)}"
+            )
+
+        if self.shard_by and self.shard_by not in SHARD_PERIODS:
+            raise ValueError(
+                f"Invalid shard period '{self.shard_by}'. Must be one of: {', '.join(SHARD_PERIODS)}"
+            )
+
+        if self.clusters is not None:
+            if not isinstance(self.clusters, list):
+                raise ValueError("clusters must be a list")
+            for cluster in self.clusters:
+                if isinstance(cluster, dict):
+                    if not cluster.get("cluster_name") or set(cluster) - CLUSTER_KEYS:
+                        raise ValueError(
+                            f"Invalid cluster {cluster}, expected keys: {', '.join(sorted(CLUSTER_KEYS))}"
+                        )
+                elif not isinstance(cluster, str) or not cluster:
+                    raise ValueError(f"Invalid cluster {cluster!r}, expected a name or mapping")
+
+        if self.max_scan_bytes is not None and (
+            not isinstance(self.max_scan_bytes, int)
+            or isinstance(self.max_scan_bytes, bool)
+            or self.max_scan_bytes <= 0
+        ):
+            raise ValueError("max_scan_bytes must be a positive integer")
+
+        if self.check_catalog is not None and not isinstance(self.check_catalog, bool):
+            raise ValueError("check_catalog must be true or false")
+
+        if self.skip_unchanged is not None and not isinstance(self.skip_unchanged, bool):
+            raise ValueError("skip_unchanged must be true or false")
+
+        if self.subtotals is not None and not isinstance(self.subtotals, bool):
+            raise ValueError("subtotals must be true or false")
+
+        if self.subtotals and (self.clusters or self.shard_by):
+            raise ValueError("subtotals cannot be combined with clusters or shard_by")
+
+        for name in ("pipeline", "compress"):
+            value = getattr(self, name)
+            if value is not None and not isinstance(value, bool):
+                raise ValueError(f"{name} must be true or false")
+
+        if self.pipeline and (self.clusters or self.format != "csv"):
+            raise ValueError("pipeline only streams csv reports and cannot be combined with clusters")
+
+        if self.compress and not self.pipeline:
+            raise ValueError("compress requires pipeline")
+
+        if self.output_report_location and not self.output_report_location.startswith("s3://"):
+            raise ValueError("output_report_location must be an S3 location (s3://bucket/path)")
+
+    def to_dict(self) -> dict:
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+    def cluster_targets(self) -> list:
+        """Clusters of a fleet report, the spec's own cluster first"""
+        from .fleet_report_generator import ClusterTarget
+
+        targets = [
+            ClusterTarget(self.cluster_name, self.database_name, self.database_workgroup_name)
+        ]
+        for cluster in self.clusters or []:
+            if isinstance(cluster, str):
+                cluster = {"cluster_name": cluster}
+            targets.append(
+                ClusterTarget(
+                    cluster["cluster_name"],
+                    cluster.get("database_name") or self.database_name,
+                    cluster.get("database_workgroup_name") or self.database_workgroup_name,
+                )
+            )
+        return targets
+
+    def create_generator(self, **kwargs):
+        """Create a ReportGenerator, or a FleetReportGenerator when clusters are listed
+
+        Extra keyword arguments are passed through.
+        """
+        if self.clusters:
+            from .fleet_report_generator import FleetReportGenerator
+
+            return FleetReportGenerator(
+                start_date=self.start_date,
+                end_date=self.end_date,
+                clusters=self.cluster_targets(),
+                report_type=self.type,
+                output_location=self.output_report_location,
+                format=self.format,
+                namespace=self.namespace,
+                task=self.task,
+                shard_by=self.shard_by,
+                max_scan_bytes=self.max_scan_bytes,
+                check_catalog=bool(self.check_catalog),
+                skip_unchanged=bool(self.skip_unchanged),
+                **kwargs,
+            )
+
+        from .report_generator import ReportGenerator
+
+        return ReportGenerator(
+            start_date=self.start_date,
+            end_date=self.end_date,
+            cluster_name=self.cluster_name,
+            database_name=self.database_name,
+            database_workgroup_name=self.database_workgroup_name,
+            report_type=self.type,
+            output_location=self.output_report_location,
+            format=self.format,
+            namespace=self.namespace,
+            task=self.task,
+            shard_by=self.shard_by,
+            max_scan_bytes=self.max_scan_bytes,
+            check_catalog=bool(self.check_catalog),
+            skip_unchanged=bool(self.skip_unchanged),
+            subtotals=bool(self.subtotals),
+            pipeline=bool(self.pipeline),
+            compress=bool(self.compress),
+            **kwargs,
+        )
@@ -0,0 +1,183 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from typing import Tuple
+
+from .report_spec import ReportSpec
+from .utils.query_cache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL_SECONDS, QueryResultCache
+from .utils.thread_sessions import ThreadLocalSessions
+
+DEFAULT_WORKERS = 4
+# How long warm_up waits for every worker thread to start
+WARM_UP_TIMEOUT_SECONDS = 60
+MAX_REQUEST_BYTES = 64 * 1024
+CONTENT_TYPES = {"csv": "text/csv", "pdf": "application/pdf"}
+
+
+class ReportService:
+    """Generates reports on a pool of workers with warm AWS sessions and shared query results
+
+    Every worker thread has its own boto3 session; the query cache is shared.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_WORKERS,
+        cache_max_entries: int = DEFAULT_MAX_ENTRIES,
+        cache_ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        work_dir: str = None,
+    ):
+        self.max_workers = max_workers
+        self.sessions = ThreadLocalSessions()
+        self.query_cache = QueryResultCache(cache_max_entries, cache_ttl_seconds)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="report-worker"
+        )
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix="hyperpod-usage-report-")
+
+    def _warm_worker(self, started: threading.Barrier) -> None:
+        try:
+            session = self.sessions.get()
+            session.client("athena")
+            session.client("s3")
+        except Exception:
+            started.abort()
+            raise
+        # Hold this worker until every other one has started, so each warm-up task
+        # runs on a thread of its own
+        started.wait(timeout=WARM_UP_TIMEOUT_SECONDS)
+
+    def warm_up(self) -> None:
+        """Import the report dependencies and create every worker's AWS clients ahead of the first request"""
+        import awswrangler  # noqa: F401
+
+        from .generators.csv_generator import CSVReportGenerator  # noqa: F401
+        from .generators.pdf_generator import PDFReportGenerator  # noqa: F401
+
+        started = threading.Barrier(self.max_workers)
+        for future in [
+            self.executor.submit(self._warm_worker, started) for _ in range(self.max_workers)
+        ]:
+            future.result()
+        print("Report service warmed up")
+
+    def submit(self, spec: ReportSpec) -> Future:
+        """Queue a report on the worker pool
+
+        The future resolves to the S3 location when the spec has an output location,
+        otherwise to the path of the rendered file, which the caller must remove with
+        release().
+        """
+        return self.executor.submit(self._run, spec)
+
+    def _run(self, spec: ReportSpec) -> str:
+        request_dir = tempfile.mkdtemp(dir=self.work_dir)
+        generator = spec.create_generator(
+            boto3_session=self.sessions.get(),
+            query_cache=self.query_cache,
+            output_dir=request_dir,
+        )
+        if spec.output_report_location:
+            try:
+                generator.generate_report()
+            finally:
+                shutil.rmtree(request_dir, ignore_errors=True)
+            return spec.output_report_location
+
+        try:
+            return generator.render_report()
+        except Exception:
+            shutil.rmtree(request_dir, ignore_errors=True)
+            raise
+
+    @staticmethod
+    def release(output_file: str) -> None:
+        """Remove a rendered report and its per-request directory"""
+        shutil.rmtree(os.path.dirname(output_file), ignore_errors=True)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def make_request_handler(service: ReportService):
+    """Build an HTTP handler class bound to a report service
+
+    POST /reports takes a JSON report spec. With output_report_location the report is
+    uploaded and a JSON status is returned; without it the report file is streamed back.
+    GET /health returns the cache size.
+    """
+
+    class ReportRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: HTTPStatus, body: dict) -> None:
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _read_spec(self) -> Tuple[ReportSpec, str]:
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                return None, "Invalid Content-Length"
+            if length > MAX_REQUEST_BYTES:
+                return None, "Request body too large"
+            try:
+                return ReportSpec.from_dict(json.loads(self.rfile.read(length) or b"{}")), None
+            except ValueError as e:
+                return None, str(e)
+
+        def _send_file(self, spec: ReportSpec, output_file: str) -> None:
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", CONTENT_TYPES[spec.format])
+            self.send_header("Content-Length", str(os.path.getsize(output_file)))
+            self.send_header(
+                "Content-Disposition",
+                f'attachment; filename="{os.path.basename(output_file)}"',
+            )
+            self.end_headers()
+            with open(output_file, "rb") as f:
+                shutil.copyfileobj(f, self.wfile)
+
+        def do_GET(self):
+            if self.path != "/health":
+                self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+                return
+            self._send_json(
+                HTTPStatus.OK, {"status": "ok", "cached_queries": len(service.query_cache)}
+            )
+
+        def do_POST(self):
+            if self.path != "/reports":
+                self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+                return
+
+            spec, error = self._read_spec()
+            if error:
+                self._send_json(HTTPStatus.BAD_REQUEST, {"error": error})
+                return
+
+            try:
+                result = service.submit(spec).result()
+            except Exception as e:
+                print(f"Report generation failed: {str(e)}")
+                self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+                return
+
+            if spec.output_report_location:
+                self._send_json(HTTPStatus.OK, {"status": "uploaded", "location": result})
+                return
+
+            try:
+                self._send_file(spec, result)
+            finally:
+                service.release(result)
+
+    return ReportRequestHandler
@@ -0,0 +1,54 @@
+from typing import Any
+
+from .lazy_import import LazyModule
+from .query_builder import SUBTOTAL_LEVEL_COLUMN
+
+pd = LazyModule("pandas")
+
+# Low-cardinality string columns of the report tables, stored as categoricals
+CATEGORY_COLUMNS = (
+    "cluster",
+    "namespace",
+    "team",
+    "instance_type",
+    "task_name",
+    "instance",
+    "status",
+    "priority_class",
+    "labels",
+)
+# Columns with more distinct values than this share of the rows stay as strings,
+# where a dictionary would save little
+MAX_CATEGORY_RATIO = 0.5
+
+
+def normalize_report_frame(df: Any) -> Any:
+    """Shrink a fetched report frame in place and return it
+
+    String columns with few distinct values are dictionary-encoded as categoricals and
+    integer columns are downcast to the smallest type that holds every value. Hour
+    columns stay float64, since sums over float32 values lose precision.
+    """
+    if df.empty:
+        return df
+
+    for column in CATEGORY_COLUMNS:
+        if column not in df.columns or isinstance(df[column].dtype, pd.CategoricalDtype):
+            continue
+        if df[column].nunique(dropna=False) <= len(df) * MAX_CATEGORY_RATIO:
+            df[column] = df[column].astype("category")
+
+    for column in df.select_dtypes(include="integer").columns:
+        df[column] = pd.to_numeric(df[column], downcast="integer")
+
+    return df
+
+
+def drop_empty_subtotals(df: Any) -> Any:
+    """Drop the subtotal rows of a frame fetched with subtotals that has no report rows
+
+    Grouping no rows still returns the grand total, with every sum null.
+    """
+    if SUBTOTAL_LEVEL_COLUMN in df.columns and not (df[SUBTOTAL_LEVEL_COLUMN] == 0).any():
+        return df.iloc[0:0]
+    return df
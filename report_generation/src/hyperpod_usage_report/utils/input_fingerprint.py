@@ -0,0 +1,68 @@
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from .scan_estimator import MAX_LISTING_WORKERS, ScanEstimator
+
+# S3 user metadata key of the fingerprint stored on every uploaded report
+FINGERPRINT_METADATA_KEY = "input-fingerprint"
+# Bump when a change to the report queries or rendering should invalidate stored reports
+FINGERPRINT_VERSION = "1"
+PACKAGE_NAME = "sagemaker-hyperpod-usage-report"
+
+
+def generator_version() -> str:
+    """Installed package version and fingerprint version of this report generator"""
+    from importlib import metadata
+
+    try:
+        package_version = metadata.version(PACKAGE_NAME)
+    except metadata.PackageNotFoundError:
+        package_version = "unknown"
+    return f"{package_version}+{FINGERPRINT_VERSION}"
+
+
+def list_source_objects(
+    estimator: ScanEstimator, sources: List[Tuple[str, str, str, str]]
+) -> List[Tuple[str, str, str]]:
+    """Key, ETag and last-modified time of every object a report reads
+
+    Each source is a (table, start date, end date, cluster) tuple, resolved to its Glue
+    partitions; the partition locations are listed in parallel.
+    """
+    locations = [
+        location
+        for table, start_date, end_date, cluster in sources
+        for location in estimator.partition_locations(table, start_date, end_date, cluster)
+    ]
+    if not locations:
+        return []
+
+    with ThreadPoolExecutor(
+        max_workers=min(MAX_LISTING_WORKERS, len(locations))
+    ) as executor:
+        listings = list(executor.map(estimator.list_objects, locations))
+    return sorted(
+        {
+            (obj["Key"], obj["ETag"].strip('"'), str(obj["LastModified"]))
+            for listing in listings
+            for obj in listing
+        }
+    )
+
+
+def compute_fingerprint(
+    parameters: Dict[str, Any], source_objects: List[Tuple[str, str, str]]
+) -> str:
+    """SHA-256 over the report parameters, the generator version and the source objects"""
+    payload = json.dumps(
+        {
+            "parameters": parameters,
+            "generator": generator_version(),
+            "sources": [list(source) for source in source_objects],
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,24 @@
+import importlib
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """Module placeholder that defers the real import until an attribute is first used
+
+    Heavy dependencies (awswrangler, pandas, boto3, fpdf) are bound through this
+    class so that importing the report package, parsing arguments and printing
+    ``--help`` stay fast, and each dependency is only loaded by the stage that
+    needs it.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module = None
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
@@ -0,0 +1,250 @@
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+METRIC_PREFIX = "hyperpod_usage_report"
+
+# Athena statistics copied from the QueryExecution payload awswrangler attaches to results
+ATHENA_STATISTICS = {
+    "QueryQueueTimeInMillis": "queue_seconds",
+    "QueryPlanningTimeInMillis": "planning_seconds",
+    "EngineExecutionTimeInMillis": "engine_seconds",
+    "ServiceProcessingTimeInMillis": "service_seconds",
+    "TotalExecutionTimeInMillis": "total_execution_seconds",
+}
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of the process so far, or None when unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + "}"
+
+
+class RunMetrics:
+    """Collects per-stage timings and Athena query statistics for one report run
+
+    Stages and queries may be recorded from several threads, for example when shards
+    or clusters are fetched concurrently.
+    """
+
+    def __init__(self, run_id: str = None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.started_at = datetime.now(timezone.utc)
+        self.status = None
+        self.error = None
+        self.labels: Dict[str, Any] = {}
+        # Optional StageProfiler that profiles every stage
+        self.profiler = None
+        self._start = time.perf_counter()
+        self._duration = None
+        self._stages: List[dict] = []
+        self._queries: List[dict] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, **labels) -> Iterator[dict]:
+        """Time a stage; the caller may set record["rows"] to get a throughput figure"""
+        record = {"stage": name, **labels}
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                if self.profiler is not None:
+                    stack.enter_context(self.profiler.profile(name, **labels))
+                yield record
+        finally:
+            duration = time.perf_counter() - start
+            record["duration_seconds"] = round(duration, 6)
+            if record.get("rows") is not None and duration > 0:
+                record["rows_per_second"] = round(record["rows"] / duration, 2)
+            record["peak_rss_bytes"] = peak_rss_bytes()
+            with self._lock:
+                self._stages.append(record)
+
+    def record_query(
+        self, query: str, df: Any, wall_seconds: float, rows: int = None, **labels
+    ) -> None:
+        """Record the Athena statistics of a finished query
+
+        Client time is the wall time not spent inside Athena: submission, polling
+        and result download. Pass rows when df is not the whole result, as with a
+        result read in chunks.
+        """
+        record = {"query": query, **labels, "wall_seconds": round(wall_seconds, 6)}
+        if rows is None and hasattr(df, "__len__"):
+            rows = len(df)
+        record["rows"] = rows
+
+        execution = getattr(df, "query_metadata", None)
+        if not isinstance(execution, dict):
+            execution = {}
+        statistics = execution.get("Statistics", {})
+        if execution:
+            record["query_execution_id"] = execution.get("QueryExecutionId")
+        for key, field in ATHENA_STATISTICS.items():
+            if key in statistics:
+                record[field] = statistics[key] / 1000
+        if "DataScannedInBytes" in statistics:
+            record["bytes_scanned"] = statistics["DataScannedInBytes"]
+        if "total_execution_seconds" in record:
+            record["client_seconds"] = round(
+                max(0.0, wall_seconds - record["total_execution_seconds"]), 6
+            )
+
+        with self._lock:
+            self._queries.append(record)
+
+    def finish(self, status: str, error: str = None) -> None:
+        self.status = status
+        self.error = error
+        self._duration = time.perf_counter() - self._start
+
+    @property
+    def stages(self) -> List[dict]:
+        with self._lock:
+            return list(self._stages)
+
+    @property
+    def queries(self) -> List[dict]:
+        with self._lock:
+            return list(self._queries)
+
+    def to_dict(self) -> dict:
+        duration = self._duration
+        if duration is None:
+            duration = time.perf_counter() - self._start
+        queries = self.queries
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": round(duration, 6),
+            "status": self.status,
+            "error": self.error,
+            **self.labels,
+            "bytes_scanned": sum(query.get("bytes_scanned", 0) for query in queries),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "stages": self.stages,
+            "queries": queries,
+        }
+
+    def write_json(self, path: str) -> None:
+        """Write the run record as a single JSON document"""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+
+    def to_prometheus(self) -> str:
+        """Render the run in the Prometheus text exposition format"""
+        record = self.to_dict()
+        lines = []
+
+        def gauge(name: str, help_text: str, samples: List[tuple]) -> None:
+            samples = [(labels, value) for labels, value in samples if value is not None]
+            if not samples:
+                return
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            for labels, value in samples:
+                lines.append(f"{METRIC_PREFIX}_{name}{_format_labels(labels)} {value}")
+
+        gauge("run_success", "1 if the last run succeeded", [({}, int(record["status"] == "success"))])
+        gauge("run_duration_seconds", "Wall time of the last run", [({}, record["duration_seconds"])])
+        gauge("run_bytes_scanned", "Bytes scanned by Athena in the last run", [({}, record["bytes_scanned"])])
+
+        # Stages with the same labels (for example one per shard) are summed
+        stages: Dict[tuple, dict] = {}
+        for stage in record["stages"]:
+            labels = tuple(
+                (key, value)
+                for key, value in stage.items()
+                if key not in ("duration_seconds", "rows", "rows_per_second", "peak_rss_bytes")
+            )
+            total = stages.setdefault(labels, {"duration_seconds": 0.0, "rows": None, "peak_rss_bytes": None})
+            total["duration_seconds"] += stage["duration_seconds"]
+            if stage.get("rows") is not None:
+                total["rows"] = (total["rows"] or 0) + stage["rows"]
+            if stage.get("peak_rss_bytes") is not None:
+                total["peak_rss_bytes"] = max(total["peak_rss_bytes"] or 0, stage["peak_rss_bytes"])
+        stage_samples = [(dict(labels), total) for labels, total in stages.items()]
+        gauge(
+            "stage_duration_seconds",
+            "Wall time of each report stage",
+            [(labels, total["duration_seconds"]) for labels, total in stage_samples],
+        )
+        gauge(
+            "stage_rows",
+            "Rows handled by each report stage",
+            [(labels, total["rows"]) for labels, total in stage_samples],
+        )
+        gauge(
+            "stage_rows_per_second",
+            "Throughput of each report stage",
+            [
+                (labels, round(total["rows"] / total["duration_seconds"], 2))
+                for labels, total in stage_samples
+                if total["rows"] is not None and total["duration_seconds"] > 0
+            ],
+        )
+        gauge(
+            "stage_peak_rss_bytes",
+            "Process peak RSS at the end of each report stage",
+            [(labels, total["peak_rss_bytes"]) for labels, total in stage_samples],
+        )
+
+        # Queries are summed per query kind to keep label cardinality bounded
+        queries: Dict[str, dict] = {}
+        for query in record["queries"]:
+            total = queries.setdefault(query["query"], {"count": 0})
+            total["count"] += 1
+            for field in ("wall_seconds", "client_seconds", "bytes_scanned", *ATHENA_STATISTICS.values()):
+                if field in query:
+                    total[field] = total.get(field, 0) + query[field]
+        gauge(
+            "queries",
+            "Athena queries run, by query kind",
+            [({"query": name}, total["count"]) for name, total in queries.items()],
+        )
+        for field, help_text in (
+            ("wall_seconds", "Wall time of Athena queries"),
+            ("queue_seconds", "Time Athena queries spent queued"),
+            ("planning_seconds", "Time Athena spent planning queries"),
+            ("engine_seconds", "Athena engine execution time"),
+            ("client_seconds", "Submission, polling and result download time"),
+            ("bytes_scanned", "Bytes scanned by Athena queries"),
+        ):
+            gauge(
+                f"query_{field}",
+                help_text,
+                [({"query": name}, total.get(field)) for name, total in queries.items()],
+            )
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write a node_exporter textfile, replacing the previous one atomically"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
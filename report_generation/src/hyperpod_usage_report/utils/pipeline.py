@@ -0,0 +1,134 @@
+import queue
+import threading
+import zlib
+from typing import Any, Callable, Iterable, Iterator, List, Tuple
+
+# Items buffered between two stages before the upstream stage blocks
+DEFAULT_QUEUE_SIZE = 4
+# How often a blocked stage checks whether another stage has failed
+POLL_SECONDS = 0.1
+GZIP_LEVEL = 6
+# zlib window bits selecting the gzip container
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+_END = object()
+
+Stage = Tuple[str, Callable[[Iterator[Any]], Iterable[Any]]]
+
+
+class _Cancelled(Exception):
+    """Raised inside a stage when another stage has failed"""
+
+
+class Pipeline:
+    """Runs a source and a chain of stages concurrently, linked by bounded queues
+
+    The source and every stage except the last run on their own thread; the last
+    stage (the sink) runs on the calling thread and its return value is the result
+    of run(). Each stage takes an iterator of the previous stage's items and yields
+    its own, so a stage blocks when the next one falls behind, and total time
+    approaches that of the slowest stage. The first error of any stage stops the
+    others and is raised from run().
+    """
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._failed = threading.Event()
+        self._errors: List[BaseException] = []
+        self._lock = threading.Lock()
+
+    def _fail(self, error: BaseException) -> None:
+        with self._lock:
+            self._errors.append(error)
+        self._failed.set()
+
+    def _put(self, items: queue.Queue, item: Any) -> None:
+        while True:
+            if self._failed.is_set():
+                raise _Cancelled("Cancelled after another pipeline stage failed")
+            try:
+                items.put(item, timeout=POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def _drain(self, items: queue.Queue) -> Iterator[Any]:
+        while True:
+            if self._failed.is_set():
+                raise _Cancelled("Cancelled after another pipeline stage failed")
+            try:
+                item = items.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if item is _END:
+                return
+            yield item
+
+    def _feed(self, produce: Callable[[], Iterable[Any]], out: queue.Queue) -> None:
+        try:
+            for item in produce():
+                self._put(out, item)
+            self._put(out, _END)
+        except _Cancelled:
+            pass
+        except BaseException as e:
+            self._fail(e)
+
+    def run(self, source: Tuple[str, Iterable[Any]], stages: List[Stage], sink: Stage) -> Any:
+        threads = []
+        name, items = source
+        upstream = queue.Queue(maxsize=self.queue_size)
+        threads.append(
+            threading.Thread(
+                target=self._feed,
+                args=(lambda items=items: items, upstream),
+                name=f"pipeline-{name}",
+                daemon=True,
+            )
+        )
+        for name, transform in stages:
+            downstream = queue.Queue(maxsize=self.queue_size)
+            threads.append(
+                threading.Thread(
+                    target=self._feed,
+                    args=(
+                        lambda transform=transform, upstream=upstream: transform(
+                            self._drain(upstream)
+                        ),
+                        downstream,
+                    ),
+                    name=f"pipeline-{name}",
+                    daemon=True,
+                )
+            )
+            upstream = downstream
+
+        for thread in threads:
+            thread.start()
+        _, consume = sink
+        result = None
+        try:
+            result = consume(self._drain(upstream))
+        except _Cancelled:
+            pass
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            # Unblocks the other stages when the sink stopped early
+            self._failed.set()
+            for thread in threads:
+                thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return result
+
+
+def gzip_blocks(blocks: Iterable[bytes], level: int = GZIP_LEVEL) -> Iterator[bytes]:
+    """Compress a stream of byte blocks into one gzip stream, block by block"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    for block in blocks:
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,142 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+TOP_ALLOCATIONS = 25
+TOP_FUNCTIONS = 40
+# Frames kept by tracemalloc; enough to attribute allocations made inside pandas
+TRACEMALLOC_FRAMES = 10
+
+
+def _function_label(func: Tuple[str, int, str]) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def folded_stacks(stats: pstats.Stats) -> List[str]:
+    """Convert a cProfile call graph to folded stacks for flamegraph.pl or speedscope
+
+    cProfile keeps caller/callee pairs rather than full stacks, so each function's own
+    time is spread over its callers in proportion to the time each caller spent in it.
+    Values are in microseconds.
+    """
+    children: Dict[tuple, List[Tuple[tuple, float]]] = {}
+    roots = []
+    for func, (_, _, _, cumulative, callers) in stats.stats.items():
+        if not callers:
+            roots.append(func)
+        for caller, (_, _, _, caller_cumulative) in callers.items():
+            children.setdefault(caller, []).append((func, caller_cumulative))
+
+    lines: Dict[str, float] = {}
+
+    def walk(func: tuple, path: List[str], share: float, seen: frozenset) -> None:
+        _, _, inline, cumulative, _ = stats.stats[func]
+        stack = path + [_function_label(func)]
+        if inline * share > 0:
+            key = ";".join(stack)
+            lines[key] = lines.get(key, 0.0) + inline * share
+        for child, child_cumulative in children.get(func, []):
+            if child in seen or cumulative <= 0:
+                continue
+            walk(child, stack, share * child_cumulative / cumulative, seen | {child})
+
+    for root in roots:
+        walk(root, [], 1.0, frozenset([root]))
+
+    return [
+        f"{stack} {int(seconds * 1_000_000)}"
+        for stack, seconds in sorted(lines.items())
+        if int(seconds * 1_000_000) > 0
+    ]
+
+
+class StageProfiler:
+    """Profiles report stages with cProfile and tracemalloc
+
+    For every stage it writes a pstats dump (<stage>.prof), a readable summary of the
+    hottest functions (<stage>.txt), folded stacks for flame graphs (<stage>.folded)
+    and the top allocation sites (<stage>.allocations.txt). The CPU profile covers the
+    thread that runs the stage; allocations are traced for the whole process.
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self.files: List[str] = []
+        self._stem_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    def _stage_path(self, name: str, labels: dict) -> str:
+        suffix = "-".join(str(value) for value in labels.values())
+        stem = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{name}-{suffix}" if suffix else name)
+        # Repeated stages (for example one per shard) get a numbered suffix
+        with self._lock:
+            count = self._stem_counts.get(stem, 0) + 1
+            self._stem_counts[stem] = count
+        return os.path.join(self.output_dir, stem if count == 1 else f"{stem}-{count}")
+
+    @contextmanager
+    def profile(self, name: str, **labels) -> Iterator[None]:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active in this thread, e.g. a nested stage
+            profile = None
+        start_snapshot = tracemalloc.take_snapshot()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            end_snapshot = tracemalloc.take_snapshot()
+            self._write(self._stage_path(name, labels), profile, start_snapshot, end_snapshot)
+
+    def _write(
+        self,
+        path: str,
+        profile: cProfile.Profile,
+        start_snapshot: tracemalloc.Snapshot,
+        end_snapshot: tracemalloc.Snapshot,
+    ) -> None:
+        written = []
+        if profile is not None:
+            profile.dump_stats(path + ".prof")
+            written.append(path + ".prof")
+
+            summary = io.StringIO()
+            stats = pstats.Stats(profile, stream=summary)
+            stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            with open(path + ".txt", "w") as f:
+                f.write(summary.getvalue())
+            written.append(path + ".txt")
+
+            with open(path + ".folded", "w") as f:
+                f.write("\n".join(folded_stacks(stats)) + "\n")
+            written.append(path + ".folded")
+
+        allocations = end_snapshot.compare_to(start_snapshot, "lineno")
+        _, peak = tracemalloc.get_traced_memory()
+        with open(path + ".allocations.txt", "w") as f:
+            f.write(f"Traced memory peak so far: {peak} bytes\n")
+            f.write(f"Top {TOP_ALLOCATIONS} allocation sites during the stage:\n")
+            for stat in allocations[:TOP_ALLOCATIONS]:
+                f.write(f"{stat}\n")
+        written.append(path + ".allocations.txt")
+
+        with self._lock:
+            self.files.extend(written)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
@@ -1,16 +1,95 @@
+from datetime import datetime, timedelta
+
+# Rows fetched with subtotals carry GROUPING(namespace, team, report_date) in this
+# column: 0 on report rows, otherwise a bit for each column the row totals over
+SUBTOTAL_LEVEL_COLUMN = "subtotal_level"
+TEAM_SUBTOTAL = 1
+NAMESPACE_SUBTOTAL = 3
+GRAND_TOTAL = 7
+
+# Per report type: the columns identifying a report row, the hour columns summed into
+# the subtotals, and the order of report rows within a team
+SUBTOTAL_QUERY_COLUMNS = {
+    "summary": (
+        ["report_date", "namespace", "team", "instance_type", "cluster"],
+        [
+            "total_neuron_core_utilization_hours",
+            "allocated_neuron_core_utilization_hours",
+            "borrowed_neuron_core_utilization_hours",
+            "total_gpu_utilization_hours",
+            "allocated_gpu_utilization_hours",
+            "borrowed_gpu_utilization_hours",
+            "total_vcpu_utilization_hours",
+            "allocated_vcpu_utilization_hours",
+            "borrowed_vcpu_utilization_hours",
+        ],
+        "report_date, instance_type",
+    ),
+    "detailed": (
+        [
+            "report_date",
+            "period_start",
+            "period_end",
+            "namespace",
+            "team",
+            "task_name",
+            "instance",
+            "instance_count",
+            "status",
+            "utilized_neuron_core_count",
+            "utilized_gpu_count",
+            "utilized_vcpu_count",
+            "priority_class",
+            "cluster",
+        ],
+        ["utilized_neuron_core_hours", "utilized_gpu_hours", "utilized_vcpu_hours"],
+        "report_date, period_start, task_name",
+    ),
+}
+
+
 class QueryBuilder:
+    @staticmethod
+    def build_partition_predicate(start_date: str, end_date: str) -> str:
+        """Build a year/month/day predicate that prunes a report table to the given days"""
+        day = datetime.strptime(start_date, "%Y-%m-%d")
+        last_day = datetime.strptime(end_date, "%Y-%m-%d")
+        conditions = []
+        while day <= last_day:
+            conditions.append(
+                f"(year = '{day:%Y}' AND month = '{day:%m}' AND day = '{day:%d}')"
+            )
+            day += timedelta(days=1)
+        return f"({' OR '.join(conditions)})"
+
     @staticmethod
     def build_fetch_report_data_query(
-        report_type: str, start_date: str, end_date: str, namespace: str = None, task: str = None
+        report_type: str,
+        start_date: str,
+        end_date: str,
+        namespace: str = None,
+        task: str = None,
+        partition_filter: bool = False,
+        cluster: str = None,
+        subtotals: bool = False,
     ) -> str:
         where_clause = f"DATE(report_date) BETWEEN DATE('{start_date}') AND DATE('{end_date}')"
+
+        if partition_filter:
+            where_clause += f" AND {QueryBuilder.build_partition_predicate(start_date, end_date)}"
         
+        if cluster:
+            where_clause += f" AND cluster = '{cluster}'"
+
         if namespace:
             where_clause += f" AND namespace = '{namespace}'"
         
         if task:
             where_clause += f" AND task_name = '{task}'"
         
+        if subtotals and report_type in SUBTOTAL_QUERY_COLUMNS:
+            return QueryBuilder._build_subtotals_query(report_type, where_clause)
+
         if report_type == "summary":
             return f"""
             SELECT *
@@ -31,10 +110,41 @@ class QueryBuilder:
             )
 
     @staticmethod
-    def build_fetch_heartdub_query(start_date: str, end_date: str) -> str:
+    def _build_subtotals_query(report_type: str, where_clause: str) -> str:
+        """Report rows with team, namespace and grand totals over the range, in one scan
+
+        Each team's rows are followed by the team subtotal, each namespace by its
+        subtotal, and the grand total comes last.
+        """
+        key_columns, hour_columns, row_order = SUBTOTAL_QUERY_COLUMNS[report_type]
+        keys = ", ".join(key_columns)
+        sums = "".join(f"\n                SUM({column}) AS {column}," for column in hour_columns)
+        return f"""
+            SELECT {keys},{sums}
+                GROUPING(namespace, team, report_date) AS {SUBTOTAL_LEVEL_COLUMN}
+            FROM {report_type}_report
+            WHERE {where_clause}
+            GROUP BY GROUPING SETS (({keys}), (namespace, team), (namespace), ())
+            ORDER BY GROUPING(namespace), namespace, GROUPING(team), team,
+                GROUPING(report_date), {row_order}
+            """
+
+    @staticmethod
+    def build_fetch_catalog_query(start_date: str, end_date: str, cluster: str = None) -> str:
+        """Catalog rows of every report type for the given days, for a point lookup"""
+        cluster_clause = f"\n            AND cluster = '{cluster}'" if cluster else ""
+        return f"""
+            SELECT report_date, namespace, task_name, report_type, row_count
+            FROM report_catalog
+            WHERE {QueryBuilder.build_partition_predicate(start_date, end_date)}{cluster_clause}
+        """
+
+    @staticmethod
+    def build_fetch_heartdub_query(start_date: str, end_date: str, cluster: str = None) -> str:
+        cluster_clause = f"\n                AND cluster = '{cluster}'" if cluster else ""
         return f"""
             SELECT DISTINCT cluster, year, month, day, hour
             FROM heartdub
             WHERE DATE(timestamp) BETWEEN DATE('{start_date}')
-                AND DATE('{end_date}')
+                AND DATE('{end_date}'){cluster_clause}
         """
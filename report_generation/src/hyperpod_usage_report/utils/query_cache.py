@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from .singleflight import SingleFlight
+
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_TTL_SECONDS = 900
+
+
+class QueryResultCache:
+    """Thread-safe LRU cache of Athena query results with a time-to-live
+
+    Concurrent misses for the same key are coalesced, so identical queries issued
+    by several reports at once are only run once.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value for a key, or None if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for a key, calling loader to fill it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = self._flights.do(key, lambda: self._load(key, loader))
+        return value
+
+    def _load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        # Another flight for this key may have completed since the caller's miss
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
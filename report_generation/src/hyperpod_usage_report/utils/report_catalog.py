@@ -0,0 +1,89 @@
+import difflib
+from datetime import datetime, timedelta
+from typing import Any, List
+
+from .lazy_import import LazyModule
+
+pd = LazyModule("pandas")
+
+# Most close matches suggested for a namespace or task without data
+MAX_SUGGESTIONS = 3
+
+
+class NoMatchingDataError(Exception):
+    pass
+
+
+class ReportCatalog:
+    """Report row counts per report date, namespace and task, as indexed by the aggregation
+
+    The catalog only holds days aggregated since the index was introduced, and a day
+    without any report rows has no entries either. A filter is therefore only judged
+    empty when every day of the range has entries; otherwise the report runs as usual.
+    """
+
+    def __init__(self, rows: Any, start_date: datetime, end_date: datetime):
+        self.rows = rows
+        self.start_date = start_date
+        self.end_date = end_date
+        indexed_days = set(pd.to_datetime(rows["report_date"]).dt.date) if len(rows) else set()
+        day = start_date.date()
+        self.covered = True
+        while day <= end_date.date():
+            if day not in indexed_days:
+                self.covered = False
+                break
+            day += timedelta(days=1)
+
+    @classmethod
+    def merge(cls, catalogs: List["ReportCatalog"]) -> "ReportCatalog":
+        """One catalog over several clusters, covered only when each of them is"""
+        frames = [catalog.rows for catalog in catalogs]
+        merged = cls(
+            pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0],
+            catalogs[0].start_date,
+            catalogs[0].end_date,
+        )
+        merged.covered = all(catalog.covered for catalog in catalogs)
+        return merged
+
+    def _matching(self, report_type: str, namespace: str = None, task: str = None) -> Any:
+        rows = self.rows[self.rows["report_type"] == report_type]
+        if namespace:
+            rows = rows[rows["namespace"] == namespace]
+        # Summary rows are not broken down by task
+        if task and report_type == "detailed":
+            rows = rows[rows["task_name"] == task]
+        return rows
+
+    def estimate_rows(self, report_type: str, namespace: str = None, task: str = None) -> int:
+        """Rows the report query will return, by the catalog's counts"""
+        return int(self._matching(report_type, namespace, task)["row_count"].sum())
+
+    def suggestions(self, column: str, value: str) -> List[str]:
+        names = [name for name in self.rows[column].dropna().unique() if name]
+        return difflib.get_close_matches(value, names, n=MAX_SUGGESTIONS)
+
+    def check(self, report_type: str, namespace: str = None, task: str = None) -> int:
+        """Estimated row count of the report
+
+        Raises NoMatchingDataError when the range is covered and the namespace or
+        task filter matches nothing, naming the closest values that do have data.
+        """
+        estimated_rows = self.estimate_rows(report_type, namespace, task)
+        if estimated_rows or not self.covered or not (namespace or task):
+            return estimated_rows
+
+        range_text = f"{self.start_date:%Y-%m-%d} to {self.end_date:%Y-%m-%d}"
+        messages = []
+        for column, label, value in (("namespace", "namespace", namespace), ("task_name", "task", task)):
+            if not value or value in set(self.rows[column].dropna()):
+                continue
+            suggestions = self.suggestions(column, value)
+            hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+            messages.append(f"No {label} '{value}' has usage data from {range_text}.{hint}")
+        if not messages:
+            messages.append(
+                f"No {report_type} report rows match the filters from {range_text}."
+            )
+        raise NoMatchingDataError(" ".join(messages))
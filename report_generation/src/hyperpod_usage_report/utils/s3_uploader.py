@@ -1,21 +1,213 @@
+import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple
 
-import boto3
+from .lazy_import import LazyModule
+
+boto3 = LazyModule("boto3")
+s3_transfer = LazyModule("boto3.s3.transfer")
+botocore_exceptions = LazyModule("botocore.exceptions")
+
+# Multipart settings shared by uploads and local ETag computation so that the
+# checksum of a local file matches the ETag S3 assigns to the uploaded object.
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+MAX_UPLOAD_WORKERS = 8
+
+UPLOADED = "uploaded"
+SKIPPED = "skipped"
 
 
 class S3Uploader:
+    @staticmethod
+    def _transfer_config():
+        return s3_transfer.TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            multipart_chunksize=MULTIPART_CHUNKSIZE,
+        )
+
+    @staticmethod
+    def _build_destination(file_path: str, output_location: str) -> Tuple[str, str]:
+        """Split an s3:// location into the bucket and object key for a file"""
+        parts = output_location.rstrip('/').split("/")
+        bucket = parts[2]
+        key = f"{'/'.join(parts[3:])}/{os.path.basename(file_path)}" if len(parts) > 3 else os.path.basename(file_path)
+        return bucket, key
+
     @staticmethod
     def upload_file(file_path: str, output_location: str) -> None:
         try:
             s3_client = boto3.client("s3")
-            parts = output_location.rstrip('/').split("/")
-            bucket = parts[2]
-            key = f"{'/'.join(parts[3:])}/{os.path.basename(file_path)}" if len(parts) > 3 else os.path.basename(file_path)
+            bucket, key = S3Uploader._build_destination(file_path, output_location)
 
-            s3_client.upload_file(file_path, bucket, key)
+            s3_client.upload_file(
+                file_path, bucket, key, Config=S3Uploader._transfer_config()
+            )
             print(
                 f"Report uploaded successfully to {output_location}{os.path.basename(file_path)}"
             )
         except Exception as e:
             print(f"Error uploading to S3: {str(e)}")
             raise
+
+    @staticmethod
+    def compute_etag(
+        file_path: str,
+        threshold: int = MULTIPART_THRESHOLD,
+        chunk_size: int = MULTIPART_CHUNKSIZE,
+    ) -> str:
+        """Compute the ETag S3 assigns to a file uploaded with the given multipart settings"""
+        if os.path.getsize(file_path) < threshold:
+            md5 = hashlib.md5()
+            with open(file_path, "rb") as f:
+                for block in iter(lambda: f.read(chunk_size), b""):
+                    md5.update(block)
+            return md5.hexdigest()
+
+        part_digests = []
+        with open(file_path, "rb") as f:
+            for part in iter(lambda: f.read(chunk_size), b""):
+                part_digests.append(hashlib.md5(part).digest())
+        return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+    @staticmethod
+    def _head_object(s3_client, bucket: str, key: str) -> dict:
+        """Return the head_object response of an existing object, or None if it does not exist"""
+        try:
+            return s3_client.head_object(Bucket=bucket, Key=key)
+        except botocore_exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    @staticmethod
+    def _get_remote_etag(s3_client, bucket: str, key: str) -> str:
+        """Return the ETag of an existing object, or None if it does not exist"""
+        response = S3Uploader._head_object(s3_client, bucket, key)
+        return response["ETag"].strip('"') if response else None
+
+    @staticmethod
+    def get_remote_metadata(
+        file_path: str, output_location: str, boto3_session=None
+    ) -> Dict[str, str]:
+        """User metadata of the stored copy of a file, or None if it was never uploaded"""
+        s3_client = (boto3_session or boto3).client("s3")
+        bucket, key = S3Uploader._build_destination(file_path, output_location)
+        response = S3Uploader._head_object(s3_client, bucket, key)
+        return response.get("Metadata", {}) if response else None
+
+    @staticmethod
+    def _upload_if_changed(
+        s3_client, file_path: str, output_location: str, metadata: Dict[str, str] = None
+    ) -> str:
+        bucket, key = S3Uploader._build_destination(file_path, output_location)
+        response = S3Uploader._head_object(s3_client, bucket, key)
+        remote_etag = response["ETag"].strip('"') if response else None
+        if remote_etag == S3Uploader.compute_etag(file_path):
+            remote_metadata = response.get("Metadata", {})
+            if not metadata or all(remote_metadata.get(k) == v for k, v in metadata.items()):
+                print(f"Skipping unchanged report s3://{bucket}/{key}")
+                return SKIPPED
+            # A single-request copy stores a plain MD5 ETag, which only matches the
+            # ETag computed locally for files uploaded in one part. Larger files are
+            # uploaded again so that their multipart ETag keeps matching.
+            if os.path.getsize(file_path) < MULTIPART_THRESHOLD:
+                # Same content, new metadata: rewrite the metadata without uploading
+                s3_client.copy_object(
+                    Bucket=bucket,
+                    Key=key,
+                    CopySource={"Bucket": bucket, "Key": key},
+                    Metadata=metadata,
+                    MetadataDirective="REPLACE",
+                )
+                print(f"Updated metadata of unchanged report s3://{bucket}/{key}")
+                return SKIPPED
+
+        extra_args = {"ExtraArgs": {"Metadata": metadata}} if metadata else {}
+        s3_client.upload_file(
+            file_path, bucket, key, Config=S3Uploader._transfer_config(), **extra_args
+        )
+        print(f"Report uploaded successfully to s3://{bucket}/{key}")
+        return UPLOADED
+
+    @staticmethod
+    def upload_files(
+        file_paths: List[str],
+        output_location: str,
+        max_workers: int = MAX_UPLOAD_WORKERS,
+        boto3_session=None,
+        metadata: Dict[str, str] = None,
+    ) -> Dict[str, str]:
+        """Upload several reports concurrently, skipping objects whose ETag already matches
+
+        The optional metadata is stored as S3 user metadata on every file. Returns a
+        mapping of each file path to either "uploaded" or "skipped".
+        """
+        try:
+            s3_client = (boto3_session or boto3).client("s3")
+            workers = max(1, min(max_workers, len(file_paths)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(
+                    lambda path: S3Uploader._upload_if_changed(
+                        s3_client, path, output_location, metadata
+                    ),
+                    file_paths,
+                )
+                return dict(zip(file_paths, results))
+        except Exception as e:
+            print(f"Error uploading to S3: {str(e)}")
+            raise
+
+    @staticmethod
+    def upload_stream(
+        blocks: Iterable[bytes],
+        file_name: str,
+        output_location: str,
+        boto3_session=None,
+        metadata: Dict[str, str] = None,
+        part_size: int = MULTIPART_CHUNKSIZE,
+    ) -> int:
+        """Upload a stream of byte blocks as one object with a multipart upload
+
+        Parts are sent as soon as part_size bytes have been buffered, so the report
+        never has to exist as a whole on disk or in memory. The upload is aborted when
+        the stream or a part fails. Returns the number of bytes uploaded.
+        """
+        s3_client = (boto3_session or boto3).client("s3")
+        bucket, key = S3Uploader._build_destination(file_name, output_location)
+        extra_args = {"Metadata": metadata} if metadata else {}
+        upload_id = s3_client.create_multipart_upload(Bucket=bucket, Key=key, **extra_args)[
+            "UploadId"
+        ]
+        parts = []
+        size = 0
+
+        def upload_part(body: bytes) -> None:
+            part_number = len(parts) + 1
+            response = s3_client.upload_part(
+                Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=body
+            )
+            parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+
+        try:
+            buffer = bytearray()
+            for block in blocks:
+                buffer += block
+                size += len(block)
+                if len(buffer) >= part_size:
+                    upload_part(bytes(buffer))
+                    buffer.clear()
+            # Only the last part may be smaller than the minimum part size, and a
+            # multipart upload needs at least one part even for an empty report
+            if buffer or not parts:
+                upload_part(bytes(buffer))
+            s3_client.complete_multipart_upload(
+                Bucket=bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+            )
+        except BaseException as e:
+            s3_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+            print(f"Error uploading to S3: {str(e)}")
+            raise
+        print(f"Report uploaded successfully to s3://{bucket}/{key}")
+        return size
@@ -0,0 +1,162 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, List, Tuple
+
+from .lazy_import import LazyModule
+from .query_builder import QueryBuilder
+
+boto3 = LazyModule("boto3")
+
+# Athena on-demand pricing, charged per TB scanned with a 10 MB minimum per query
+PRICE_PER_TB_USD = 5.0
+MIN_BILLED_BYTES = 10 * 1024 * 1024
+BYTES_PER_TB = 1024 ** 4
+# Days per get_partitions call, keeping the expression under Glue's 2048 character limit
+DAYS_PER_EXPRESSION = 30
+MAX_LISTING_WORKERS = 16
+
+
+class ScanBudgetExceededError(Exception):
+    pass
+
+
+@dataclass
+class ScanEstimate:
+    table: str
+    bytes_scanned: int
+    # S3 locations of the partitions read; the table root when nothing is pruned
+    locations: List[str] = field(default_factory=list)
+    pruned: bool = True
+
+    @property
+    def cost_usd(self) -> float:
+        return max(self.bytes_scanned, MIN_BILLED_BYTES) / BYTES_PER_TB * PRICE_PER_TB_USD
+
+    def describe(self) -> List[str]:
+        """Human readable lines listing the partitions and the estimated cost"""
+        if self.pruned:
+            lines = [f"Partitions touched in {self.table}: {len(self.locations)}"]
+            lines.extend(f"  {location}" for location in self.locations)
+        else:
+            lines = [f"Partitions touched in {self.table}: all (no partition filter)"]
+        lines.append(
+            f"Estimated scan: {format_bytes(self.bytes_scanned)} (~${self.cost_usd:.4f})"
+        )
+        return lines
+
+
+def format_bytes(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TB"
+
+
+def _split_location(location: str) -> Tuple[str, str]:
+    parts = location.split("/", 3)
+    prefix = parts[3] if len(parts) > 3 else ""
+    if prefix and not prefix.endswith("/"):
+        prefix += "/"
+    return parts[2], prefix
+
+
+class ScanEstimator:
+    """Predicts the bytes an Athena query reads from Glue partition metadata and S3 sizes
+
+    Nothing is submitted to Athena: the partitions a query can prune to are looked up
+    in Glue and the objects under each partition location are summed.
+    """
+
+    def __init__(self, database_name: str, boto3_session: Any = None):
+        self.database_name = database_name
+        session = boto3_session or boto3.Session()
+        self.glue = session.client("glue")
+        self.s3 = session.client("s3")
+
+    @staticmethod
+    def _day_ranges(start_date: str, end_date: str) -> List[Tuple[str, str]]:
+        """Split a date range into chunks small enough for one Glue expression"""
+        day = datetime.strptime(start_date, "%Y-%m-%d")
+        last_day = datetime.strptime(end_date, "%Y-%m-%d")
+        ranges = []
+        while day <= last_day:
+            chunk_end = min(day + timedelta(days=DAYS_PER_EXPRESSION - 1), last_day)
+            ranges.append((f"{day:%Y-%m-%d}", f"{chunk_end:%Y-%m-%d}"))
+            day = chunk_end + timedelta(days=1)
+        return ranges
+
+    def _partition_locations(self, table: str, expression: str) -> List[str]:
+        paginator = self.glue.get_paginator("get_partitions")
+        locations = []
+        for page in paginator.paginate(
+            DatabaseName=self.database_name, TableName=table, Expression=expression
+        ):
+            locations.extend(
+                partition["StorageDescriptor"]["Location"] for partition in page["Partitions"]
+            )
+        return locations
+
+    def _table_location(self, table: str) -> str:
+        response = self.glue.get_table(DatabaseName=self.database_name, Name=table)
+        return response["Table"]["StorageDescriptor"]["Location"]
+
+    def list_objects(self, location: str) -> List[dict]:
+        """The list_objects_v2 entries of the objects stored under an S3 location"""
+        bucket, prefix = _split_location(location)
+        paginator = self.s3.get_paginator("list_objects_v2")
+        return [
+            obj
+            for page in paginator.paginate(Bucket=bucket, Prefix=prefix)
+            for obj in page.get("Contents", [])
+        ]
+
+    def _location_size(self, location: str) -> int:
+        """Total size of the objects stored under an S3 location"""
+        return sum(obj["Size"] for obj in self.list_objects(location))
+
+    def partition_locations(
+        self, table: str, start_date: str, end_date: str, cluster: str = None
+    ) -> List[str]:
+        """S3 locations of the partitions of table for the given days and cluster"""
+        cluster_clause = f" AND cluster = '{cluster}'" if cluster else ""
+        return [
+            location
+            for chunk_start, chunk_end in self._day_ranges(start_date, end_date)
+            for location in self._partition_locations(
+                table,
+                QueryBuilder.build_partition_predicate(chunk_start, chunk_end) + cluster_clause,
+            )
+        ]
+
+    def estimate(
+        self,
+        table: str,
+        start_date: str = None,
+        end_date: str = None,
+        cluster: str = None,
+    ) -> ScanEstimate:
+        """Estimate a scan of table, pruned to the given days and cluster when provided
+
+        Without a date range the query is assumed to read every partition (or every
+        partition of the cluster).
+        """
+        if start_date is None:
+            if cluster is None:
+                location = self._table_location(table)
+                return ScanEstimate(
+                    table, self._location_size(location), [location], pruned=False
+                )
+            locations = self._partition_locations(table, f"cluster = '{cluster}'")
+        else:
+            locations = self.partition_locations(table, start_date, end_date, cluster)
+        if not locations:
+            return ScanEstimate(table, 0, [])
+
+        with ThreadPoolExecutor(
+            max_workers=min(MAX_LISTING_WORKERS, len(locations))
+        ) as executor:
+            total = sum(executor.map(self._location_size, locations))
+        return ScanEstimate(table, total, locations)
@@ -0,0 +1,24 @@
+import threading
+
+from .lazy_import import LazyModule
+
+boto3 = LazyModule("boto3")
+
+
+class ThreadLocalSessions:
+    """Hands each thread its own boto3 session, created on first use
+
+    boto3 sessions are not thread-safe: creating clients from one session on several
+    threads at once can race while resolving credentials. Worker pools therefore keep
+    one session per thread instead of sharing one.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = boto3.Session()
+            self._local.session = session
+        return session
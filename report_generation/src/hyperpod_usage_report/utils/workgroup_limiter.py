@@ -0,0 +1,31 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+DEFAULT_WORKGROUP = "primary"
+
+
+class WorkgroupLimiter:
+    """Caps the number of Athena queries running concurrently in each workgroup"""
+
+    def __init__(self, default_limit: int, limits: Dict[str, int] = None):
+        if default_limit < 1:
+            raise ValueError("Workgroup query limit must be at least 1")
+        self.default_limit = default_limit
+        self.limits = dict(limits or {})
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, workgroup: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if workgroup not in self._semaphores:
+                limit = self.limits.get(workgroup, self.default_limit)
+                self._semaphores[workgroup] = threading.BoundedSemaphore(limit)
+            return self._semaphores[workgroup]
+
+    @contextmanager
+    def slot(self, workgroup: str = None):
+        """Hold one query slot in the workgroup for the duration of the block"""
+        semaphore = self._semaphore(workgroup or DEFAULT_WORKGROUP)
+        with semaphore:
+            yield
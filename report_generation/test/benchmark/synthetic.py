@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.hyperpod_usage_report.generators.base import BaseReportGenerator
+
+NAMESPACES = [f"namespace-{i}" for i in range(20)]
+TEAMS = [f"team-{i}" for i in range(10)]
+INSTANCE_TYPES = ["ml.p5.48xlarge", "ml.trn1.32xlarge", "ml.g5.12xlarge", "ml.c5.xlarge"]
+STATUSES = ["Running", "Succeeded", "Failed", "Pending"]
+
+
+def summary_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic summary_report rows spread over a year"""
+    rng = np.random.default_rng(seed)
+    report_dates = pd.Timestamp("2025-01-01") + pd.to_timedelta(
+        np.sort(rng.integers(0, 365, rows)), unit="D"
+    )
+    return pd.DataFrame(
+        {
+            "report_date": report_dates,
+            "namespace": rng.choice(NAMESPACES, rows),
+            "team": rng.choice(TEAMS, rows),
+            "instance_type": rng.choice(INSTANCE_TYPES, rows),
+            **{
+                column: rng.random(rows) * 24
+                for column in BaseReportGenerator.SUMMARY_TOTAL_COLUMNS
+            },
+        }
+    )
+
+
+def detailed_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic detailed_report rows spread over a year"""
+    rng = np.random.default_rng(seed)
+    report_dates = pd.Timestamp("2025-01-01") + pd.to_timedelta(
+        np.sort(rng.integers(0, 365, rows)), unit="D"
+    )
+    period_start = report_dates + pd.to_timedelta(rng.integers(0, 23, rows), unit="h")
+    return pd.DataFrame(
+        {
+            "report_date": report_dates,
+            "period_start": period_start,
+            "period_end": period_start + pd.Timedelta(hours=1),
+            "namespace": rng.choice(NAMESPACES, rows),
+            "team": rng.choice(TEAMS, rows),
+            "task_name": [f"task-{i}" for i in rng.integers(0, 5000, rows)],
+            "instance": [f"i-{i:012x}" for i in rng.integers(0, 2000, rows)],
+            "status": rng.choice(STATUSES, rows),
+            "utilized_neuron_core_hours": rng.random(rows),
+            "utilized_neuron_core_count": rng.integers(0, 32, rows),
+            "utilized_gpu_hours": rng.random(rows),
+            "utilized_gpu_count": rng.integers(0, 8, rows),
+            "utilized_vcpu_hours": rng.random(rows),
+            "utilized_vcpu_count": rng.integers(0, 192, rows),
+            "priority_class": rng.choice(["high", "low", ""], rows),
+            "labels": "",
+        }
+    )
+
+
+def heartdub_frame(days: int, clusters: int = 1, missing_ratio: float = 0.05, seed: int = 0) -> pd.DataFrame:
+    """Distinct heartbeat cluster/day/hour rows with a share of the hours missing"""
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 1, 1)
+    dates = [start + timedelta(days=day) for day in range(days)]
+    cluster, date, hour = np.meshgrid(
+        np.arange(clusters), np.arange(days), np.arange(24), indexing="ij"
+    )
+    keep = rng.random(cluster.size) >= missing_ratio
+    date = date.ravel()[keep]
+    return pd.DataFrame(
+        {
+            "cluster": [f"cluster-{i}" for i in cluster.ravel()[keep]],
+            "year": [dates[i].strftime("%Y") for i in date],
+            "month": [dates[i].strftime("%m") for i in date],
+            "day": [dates[i].strftime("%d") for i in date],
+            "hour": hour.ravel()[keep].astype(str),
+        }
+    )
@@ -0,0 +1,181 @@
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.hyperpod_usage_report.generators.csv_generator import CSVReportGenerator
+from src.hyperpod_usage_report.generators.pdf_generator import PDFReportGenerator
+from src.hyperpod_usage_report.report_generator import ReportGenerator
+from src.hyperpod_usage_report.utils.frames import normalize_report_frame
+
+from .synthetic import detailed_frame, heartdub_frame, summary_frame
+
+# Absolute figures depend on the machine, so these only run with -m benchmark
+pytestmark = pytest.mark.benchmark
+
+# "small" runs in seconds; "full" runs 10k to 5M rows and a year of heartbeats and
+# takes tens of minutes.
+SCALE = os.environ.get("HYPERPOD_BENCHMARK_SCALE", "small")
+# Set to 1 to rewrite baselines.json with the results of this run instead of checking them
+UPDATE_BASELINES = os.environ.get("HYPERPOD_BENCHMARK_UPDATE_BASELINES") == "1"
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+# A case fails when its throughput drops below this share of the baseline or its
+# peak memory grows beyond this multiple of the baseline.
+MIN_THROUGHPUT_RATIO = 0.5
+MAX_MEMORY_RATIO = 1.5
+# Fast cases are repeated until this much time has passed and the best run is kept
+MIN_TIMING_SECONDS = 0.2
+
+ROW_COUNTS = {
+    "small": {"csv": [10_000], "pdf": [2_000]},
+    "full": {
+        "csv": [10_000, 100_000, 1_000_000, 5_000_000],
+        # fpdf renders cell by cell, so larger PDFs are impractical
+        "pdf": [10_000, 100_000],
+    },
+}
+HEARTBEAT_DAYS = {"small": [1, 30], "full": [1, 30, 365]}
+GENERATORS = {"csv": CSVReportGenerator, "pdf": PDFReportGenerator}
+FRAMES = {"summary": summary_frame, "detailed": detailed_frame}
+
+RESULTS = {}
+
+
+def _load_baselines() -> dict:
+    if not os.path.exists(BASELINES_PATH):
+        return {}
+    with open(BASELINES_PATH) as f:
+        return json.load(f)
+
+
+BASELINES = _load_baselines()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def update_baselines():
+    yield
+    if UPDATE_BASELINES and RESULTS:
+        baselines = {**_load_baselines(), **RESULTS}
+        with open(BASELINES_PATH, "w") as f:
+            json.dump(dict(sorted(baselines.items())), f, indent=2)
+            f.write("\n")
+
+
+def _measure(fn, rows: int) -> dict:
+    """Throughput of the best timed run and peak traced memory of one more run"""
+    best = None
+    total = 0.0
+    while total < MIN_TIMING_SECONDS:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"rows_per_second": round(rows / best, 1), "peak_memory_bytes": peak}
+
+
+def _check_baseline(case: str, result: dict) -> None:
+    RESULTS[case] = result
+    print(f"{case}: {result}")
+    baseline = BASELINES.get(case)
+    if UPDATE_BASELINES:
+        return
+    if baseline is None:
+        # Cases without a committed baseline, such as the full scale ones, only report
+        print(f"{case}: no baseline recorded, not checked")
+        return
+    assert result["rows_per_second"] >= baseline["rows_per_second"] * MIN_THROUGHPUT_RATIO, (
+        f"{case} throughput regressed: {result['rows_per_second']} rows/s, "
+        f"baseline {baseline['rows_per_second']} rows/s"
+    )
+    assert result["peak_memory_bytes"] <= baseline["peak_memory_bytes"] * MAX_MEMORY_RATIO, (
+        f"{case} peak memory regressed: {result['peak_memory_bytes']} bytes, "
+        f"baseline {baseline['peak_memory_bytes']} bytes"
+    )
+
+
+def _header_info(report_type: str) -> dict:
+    return {
+        "cluster_name": "benchmark-cluster",
+        "report_date": "2025-12-31",
+        "report_type": report_type,
+        "start_date": "2025-01-01",
+        "end_date": "2025-12-31",
+        "days": "365",
+    }
+
+
+@pytest.mark.parametrize(
+    "report_format,report_type,rows",
+    [
+        (report_format, report_type, rows)
+        for report_format, counts in ROW_COUNTS[SCALE].items()
+        for report_type in FRAMES
+        for rows in counts
+    ],
+)
+def test_generator_throughput(report_format, report_type, rows, tmp_path):
+    # Arrange
+    df = FRAMES[report_type](rows)
+    generator = GENERATORS[report_format](str(tmp_path))
+    render = getattr(generator, f"generate_{report_type}_report")
+    header_info = _header_info(report_type)
+
+    # Act
+    result = _measure(lambda: render(df, header_info, []), rows)
+
+    # Assert
+    _check_baseline(f"{report_format}-{report_type}-{rows}", result)
+
+
+@pytest.mark.parametrize("days", HEARTBEAT_DAYS[SCALE])
+def test_find_missing_period_throughput(days):
+    # Arrange
+    heartdub = heartdub_frame(days)
+    end_date = datetime(2025, 1, 1) + timedelta(days=days - 1)
+    generator = ReportGenerator(
+        start_date="2025-01-01",
+        end_date=end_date.strftime("%Y-%m-%d"),
+        cluster_name="cluster-0",
+        database_name="benchmark-db",
+        report_type="summary",
+        output_location="s3://benchmark-bucket/reports",
+        database_workgroup_name="benchmark-workgroup",
+        format="csv",
+    )
+    generator._read_sql_query = lambda sql, *args, **kwargs: heartdub.copy()
+
+    # Act
+    result = _measure(generator._find_missing_period, len(heartdub))
+
+    # Assert
+    assert generator._find_missing_period()
+    _check_baseline(f"gap-detection-{days}-days", result)
+
+
+@pytest.mark.parametrize("rows", ROW_COUNTS[SCALE]["csv"])
+def test_normalized_detailed_frame_memory(rows):
+    # Arrange
+    df = detailed_frame(rows)
+    before = df.memory_usage(deep=True).sum()
+
+    # Act
+    result = _measure(lambda: normalize_report_frame(df.copy()), rows)
+    after = normalize_report_frame(df).memory_usage(deep=True).sum()
+
+    # Assert
+    print(f"normalize-detailed-{rows}: {before} -> {after} bytes")
+    assert after * 2 < before
+    _check_baseline(f"normalize-detailed-{rows}", result)
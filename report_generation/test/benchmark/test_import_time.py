@@ -0,0 +1,104 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPORT_GENERATION_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+HEAVY_MODULES = ["awswrangler", "pandas", "pyarrow", "boto3", "botocore", "fpdf"]
+
+# Total self import time allowed for `run.py --help`. Eagerly importing the
+# report dependencies costs around a second, the lazy path a few tens of ms.
+HELP_IMPORT_BUDGET_SECONDS = 0.3
+
+
+def _run_python(*args):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=REPORT_GENERATION_DIR,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+
+def _parse_importtime(stderr: str) -> dict:
+    """Map each imported module to its self import time in microseconds"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(self_us)
+    return modules
+
+
+def _imported_top_level(modules: dict) -> set:
+    return {name.split(".")[0] for name in modules}
+
+
+def test_help_does_not_import_heavy_modules():
+    # Act
+    result = _run_python("-X", "importtime", "run.py", "--help")
+
+    # Assert
+    assert result.returncode == 0
+    imported = _imported_top_level(_parse_importtime(result.stderr))
+    assert imported.isdisjoint(HEAVY_MODULES), imported & set(HEAVY_MODULES)
+
+
+def test_argument_error_does_not_import_heavy_modules():
+    # Act
+    result = _run_python(
+        "-X", "importtime", "run.py", "--start-date", "2025-13-01", "--end-date", "2025-03-25",
+        "--format", "csv", "--database-name", "db", "--database-workgroup-name", "wg",
+        "--type", "summary", "--output-report-location", "s3://bucket/reports",
+        "--cluster-name", "cluster",
+    )
+
+    # Assert
+    assert result.returncode == 2
+    assert "Invalid date" in result.stderr
+    imported = _imported_top_level(_parse_importtime(result.stderr))
+    assert imported.isdisjoint(HEAVY_MODULES), imported & set(HEAVY_MODULES)
+
+
+# Wall-clock budget, too noisy on loaded runners for the default run
+@pytest.mark.benchmark
+def test_help_cold_start_within_budget():
+    # Act
+    result = _run_python("-X", "importtime", "run.py", "--help")
+
+    # Assert
+    total_seconds = sum(_parse_importtime(result.stderr).values()) / 1_000_000
+    assert total_seconds < HELP_IMPORT_BUDGET_SECONDS
+
+
+@pytest.mark.parametrize(
+    "report_format,expected,unexpected",
+    [("csv", "pandas", "fpdf"), ("pdf", "fpdf", "awswrangler")],
+)
+def test_generator_stage_imports_only_its_renderer(report_format, expected, unexpected):
+    # Arrange
+    script = f"""
+import sys
+from src.hyperpod_usage_report.report_generator import ReportGenerator
+assert "awswrangler" not in sys.modules
+generator = ReportGenerator(
+    start_date="2025-03-25", end_date="2025-03-25", cluster_name="cluster",
+    database_name="db", report_type="summary", output_location="s3://bucket/reports",
+    database_workgroup_name="wg", format="{report_format}",
+)
+generator.generator
+print(" ".join(sorted(name for name in sys.modules if "." not in name)))
+"""
+
+    # Act
+    result = _run_python("-c", script)
+
+    # Assert
+    assert result.returncode == 0, result.stderr
+    loaded = set(result.stdout.split())
+    assert expected in loaded
+    assert unexpected not in loaded
@@ -0,0 +1,24 @@
+import importlib.util
+import os
+import sys
+from unittest.mock import patch
+
+LAMBDA_DIRECTORY = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "..", "cloudformation", "aggregation_lambda"
+)
+
+
+def lambda_namespace():
+    """Module namespace of the aggregation Lambda packaged by the CloudFormation template"""
+    spec = importlib.util.spec_from_file_location(
+        "aggregation_lambda", os.path.join(LAMBDA_DIRECTORY, "index.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    # The template passes the stack's database and bucket in the environment
+    environment = {"USAGE_REPORT_DATABASE": "usage", "USAGE_REPORT_BUCKET": "usage-report-bucket"}
+    # The Lambda imports its SQL module from the root of its package
+    with patch.dict(os.environ, environment):
+        with patch.object(sys, "path", [LAMBDA_DIRECTORY] + sys.path):
+            # Only the module level runs: imports, constants and class definitions
+            spec.loader.exec_module(module)
+    return vars(module)
@@ -0,0 +1,45 @@
+import pytest
+
+from src.hyperpod_usage_report.aggregation.dialect import athena_to_duckdb, split_insert
+
+
+def test_split_insert_returns_table_and_query():
+    # Act
+    table, query = split_insert(
+        'INSERT into "usage".summary_report\nWITH x AS (SELECT 1) SELECT * FROM x;\n'
+    )
+
+    # Assert
+    assert table == "summary_report"
+    assert query == "WITH x AS (SELECT 1) SELECT * FROM x"
+
+
+def test_split_insert_rejects_other_statements():
+    with pytest.raises(ValueError):
+        split_insert("SELECT 1")
+
+
+def test_date_add_becomes_interval_arithmetic_with_nested_calls():
+    # Act
+    sql = athena_to_duckdb("DATE_ADD('DAY', 1, DATE_TRUNC('DAY', timestamp))")
+
+    # Assert
+    assert sql == "(DATE_TRUNC('DAY', timestamp) + (1) * INTERVAL 1 DAY)"
+
+
+def test_date_diff_counts_elapsed_units():
+    # Act
+    sql = athena_to_duckdb("date_diff('second', period_start, period_end) / 3600.0")
+
+    # Assert
+    assert sql == (
+        "CAST(TRUNC((epoch_ms(period_end) - epoch_ms(period_start)) / 1000.0) AS BIGINT) / 3600.0"
+    )
+
+
+def test_date_becomes_cast_without_touching_other_date_functions():
+    # Act
+    sql = athena_to_duckdb("DATE(period_start), DATE_TRUNC('DAY', ts), 'DATE(x)'")
+
+    # Assert
+    assert sql == "CAST(period_start AS DATE), DATE_TRUNC('DAY', ts), 'DATE(x)'"
@@ -0,0 +1,295 @@
+import io
+import json
+import time
+from datetime import date
+from unittest.mock import Mock
+
+import pytest
+
+from .lambda_code import lambda_namespace
+
+# A raw pod partition and its compacted copy
+ORIGINAL_PREFIX = "raw/pod/year=2025/month=03/day=08/hour=05/cluster=a/"
+COMPACTED_PREFIX = "raw/pod/year=2025/month=03/day=08/compacted-1/part-0/cluster=a/"
+PARTITION_VALUES = ("2025", "03", "08", "05", "a")
+
+
+class FakeS3:
+    """The object calls of an S3 client, kept in memory"""
+
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self):
+        self.objects = {}
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self.exceptions.NoSuchKey(Key)
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+    def delete_objects(self, Bucket, Delete):
+        for obj in Delete["Objects"]:
+            self.objects.pop(obj["Key"], None)
+
+    def get_paginator(self, operation):
+        objects = self.objects
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                keys = sorted(key for key in objects if key.startswith(Prefix))
+                return [{"Contents": [{"Key": key} for key in keys]}]
+
+        return Paginator()
+
+
+@pytest.fixture
+def namespace():
+    namespace = lambda_namespace()
+    namespace["boto3"] = Mock()
+    return namespace
+
+
+@pytest.fixture
+def executor(namespace):
+    executor = namespace["AthenaQueryExecutor"](False)
+    executor.s3 = FakeS3()
+    executor.repair_tables = Mock(return_value=True)
+    executor.clear_day_partitions = Mock()
+    executor.clear_report_partitions = Mock()
+    executor.failing = set()
+    executor.executed = []
+
+    def execute_aggregations(query_types, day=None):
+        results = []
+        for query_type in query_types:
+            executor.executed.append((query_type.value, day))
+            status = "FAILED" if (query_type.value, day) in executor.failing else "SUCCESS"
+            results.append(
+                {
+                    "queryType": query_type.value,
+                    "status": status,
+                    "message": "",
+                    "queryExecutionId": f"{query_type.value}-{day}",
+                }
+            )
+        return results
+
+    executor.execute_aggregations = execute_aggregations
+    return executor
+
+
+def _put(executor, key, body=b""):
+    executor.s3.put_object(Bucket=executor.bucket, Key=key, Body=body)
+
+
+def _put_json(executor, key, value):
+    _put(executor, key, json.dumps(value).encode())
+
+
+def _checkpointed_days(executor):
+    return sorted({day for query, day in executor.executed if query == "pod_checkpoint"})
+
+
+def test_aggregate_days_builds_the_missing_checkpoint_of_the_day_before(executor):
+    # Act
+    day_results = executor.aggregate_days([date(2025, 3, 10), date(2025, 3, 11)])
+
+    # Assert
+    assert [day_result["status"] for day_result in day_results] == ["SUCCESS", "SUCCESS"]
+    assert _checkpointed_days(executor) == [date(2025, 3, 9), date(2025, 3, 10), date(2025, 3, 11)]
+    executor.repair_tables.assert_any_call(date(2025, 3, 9))
+    assert all(executor.has_checkpoint(date(2025, 3, day)) for day in (9, 10, 11))
+
+
+def test_aggregate_days_starts_from_an_existing_checkpoint(executor):
+    # Arrange
+    _put(executor, "state/checkpoints/2025-03-09.json", b"{}")
+
+    # Act
+    executor.aggregate_days([date(2025, 3, 10)])
+
+    # Assert
+    assert _checkpointed_days(executor) == [date(2025, 3, 10)]
+
+
+def test_aggregate_days_stops_when_the_missing_checkpoint_cannot_be_built(executor):
+    # Arrange
+    executor.failing.add(("pod_checkpoint", date(2025, 3, 9)))
+
+    # Act
+    day_results = executor.aggregate_days([date(2025, 3, 10), date(2025, 3, 11)])
+
+    # Assert
+    assert [day_result["status"] for day_result in day_results] == ["FAILED", "SKIPPED"]
+    assert "No checkpoint of 2025-03-09" in day_results[0]["message"]
+    assert not executor.has_checkpoint(date(2025, 3, 9))
+    assert _checkpointed_days(executor) == [date(2025, 3, 9)]
+
+
+def test_prepare_query_fills_the_stack_database(namespace, executor):
+    # Arrange
+    template = namespace["TEMPLATES"][namespace["CatalogType"].REPORT_CATALOG]
+
+    # Act
+    query = executor.prepare_query(template, date(2025, 3, 10))
+
+    # Assert
+    assert 'INSERT INTO "usage".report_catalog' in query
+    assert "{database}" not in query
+    assert executor.output_location == "s3://usage-report-bucket/athena-results"
+
+
+def test_aggregate_days_skips_days_being_compacted(executor):
+    # Arrange
+    _put_json(
+        executor,
+        "state/locks/2025-03-11/compaction-1.json",
+        {"activity": "compaction", "acquired_at": time.time()},
+    )
+
+    # Act
+    day_results = executor.aggregate_days([date(2025, 3, 10), date(2025, 3, 11), date(2025, 3, 12)])
+
+    # Assert
+    assert [day_result["status"] for day_result in day_results] == ["SUCCESS", "SKIPPED", "SKIPPED"]
+    assert "being compacted" in day_results[1]["message"]
+    assert [key for key in executor.s3.objects if key.startswith("state/locks/")] == [
+        "state/locks/2025-03-11/compaction-1.json"
+    ]
+
+
+def test_day_lock_ignores_locks_left_by_timed_out_runs(executor):
+    # Arrange
+    _put_json(
+        executor,
+        "state/locks/2025-03-11/aggregation-1.json",
+        {"activity": "aggregation", "acquired_at": time.time() - 1000},
+    )
+
+    # Act
+    lock = executor.acquire_day_lock(date(2025, 3, 11), "compaction")
+
+    # Assert
+    assert lock.startswith("state/locks/2025-03-11/compaction-")
+    assert executor.acquire_day_lock(date(2025, 3, 11), "aggregation") is None
+
+
+@pytest.fixture
+def compactor(namespace, executor):
+    compactor = namespace["RawPartitionCompactor"](executor)
+    compactor.glue.get_table.return_value = {"Table": {}}
+    compactor.repoint_partitions = Mock(return_value=set())
+    executor.get_partitions = Mock(
+        return_value=[
+            {
+                "Values": list(PARTITION_VALUES),
+                "StorageDescriptor": {"Location": f"s3://{executor.bucket}/{ORIGINAL_PREFIX}"},
+            }
+        ]
+    )
+    _put(executor, ORIGINAL_PREFIX + "part-0.parquet")
+    return compactor
+
+
+def _pending_record(executor, swapped_at, keys):
+    _put_json(
+        executor,
+        "state/compaction/pod/2025-03-08/1.json",
+        {
+            "table": "pod",
+            "day": "2025-03-08",
+            "swapped_at": swapped_at,
+            "partitions": [
+                {
+                    "values": list(PARTITION_VALUES),
+                    "original": ORIGINAL_PREFIX,
+                    "compacted": COMPACTED_PREFIX,
+                    "keys": keys,
+                }
+            ],
+        },
+    )
+    _put(executor, COMPACTED_PREFIX + "bucket-0")
+
+
+def test_compact_table_copies_again_when_files_arrive_during_the_copy(executor, compactor):
+    # Arrange
+    copies = []
+
+    def copy_partitions(table, day, partitions, table_info):
+        run_prefix = f"raw/pod/year=2025/month=03/day=08/compacted-{len(copies)}/"
+        copies.append(run_prefix)
+        _put(executor, run_prefix + "part-0/bucket-0")
+        if len(copies) == 1:
+            _put(executor, ORIGINAL_PREFIX + "late.parquet")
+        location = f"s3://{executor.bucket}/{run_prefix}part-0/cluster=a/"
+        return run_prefix, {PARTITION_VALUES: location}
+
+    compactor.copy_partitions = copy_partitions
+
+    # Act
+    compacted = compactor.compact_table("pod", date(2025, 3, 8))
+
+    # Assert
+    assert compacted
+    assert len(copies) == 2
+    assert not [key for key in executor.s3.objects if key.startswith(copies[0])]
+    record = json.loads(executor.s3.objects["state/compaction/pod/2025-03-08/compacted-1.json"])
+    assert record["partitions"][0]["keys"] == [
+        ORIGINAL_PREFIX + "late.parquet",
+        ORIGINAL_PREFIX + "part-0.parquet",
+    ]
+    # The originals outlive the swap
+    assert ORIGINAL_PREFIX + "part-0.parquet" in executor.s3.objects
+
+
+def test_delete_originals_waits_for_queries_planned_before_the_swap(executor, compactor):
+    # Arrange
+    _pending_record(executor, time.time(), [ORIGINAL_PREFIX + "part-0.parquet"])
+
+    # Act
+    recompact = compactor.delete_originals()
+
+    # Assert
+    assert recompact == set()
+    assert ORIGINAL_PREFIX + "part-0.parquet" in executor.s3.objects
+    assert "state/compaction/pod/2025-03-08/1.json" in executor.s3.objects
+
+
+def test_delete_originals_deletes_unchanged_originals(executor, compactor):
+    # Arrange
+    _pending_record(executor, time.time() - 7200, [ORIGINAL_PREFIX + "part-0.parquet"])
+
+    # Act
+    recompact = compactor.delete_originals()
+
+    # Assert
+    assert recompact == set()
+    assert sorted(executor.s3.objects) == [COMPACTED_PREFIX + "bucket-0"]
+    compactor.repoint_partitions.assert_not_called()
+
+
+def test_delete_originals_restores_partitions_with_late_files(executor, compactor):
+    # Arrange
+    _pending_record(executor, time.time() - 7200, [ORIGINAL_PREFIX + "part-0.parquet"])
+    _put(executor, ORIGINAL_PREFIX + "late.parquet")
+
+    # Act
+    recompact = compactor.delete_originals()
+
+    # Assert
+    assert recompact == {date(2025, 3, 8)}
+    assert sorted(executor.s3.objects) == [
+        ORIGINAL_PREFIX + "late.parquet",
+        ORIGINAL_PREFIX + "part-0.parquet",
+    ]
+    _, _, new_locations = compactor.repoint_partitions.call_args[0]
+    assert new_locations == {PARTITION_VALUES: f"s3://{executor.bucket}/{ORIGINAL_PREFIX}"}
@@ -0,0 +1,236 @@
+import os
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from src.hyperpod_usage_report.aggregation.templates import (
+    CheckpointType,
+    QueryType,
+    ReportTable,
+)
+
+pytest.importorskip("duckdb")
+
+from src.hyperpod_usage_report.aggregation.engines import (  # noqa: E402
+    AggregationEngine,
+    DuckDBEngine,
+)
+from src.hyperpod_usage_report.aggregation.runner import AggregationRunner  # noqa: E402
+
+
+def _write_raw(root, table, rows):
+    df = pd.DataFrame(rows)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df["year"] = df["timestamp"].dt.strftime("%Y")
+    df["month"] = df["timestamp"].dt.strftime("%m")
+    df["day"] = df["timestamp"].dt.strftime("%d")
+    df["hour"] = df["timestamp"].dt.strftime("%H")
+    df["cluster"] = "cluster-a"
+    keys = ["year", "month", "day", "hour", "cluster"]
+    for values, group in df.groupby(keys):
+        path = os.path.join(
+            root, "raw", table, *(f"{key}={value}" for key, value in zip(keys, values))
+        )
+        os.makedirs(path)
+        group.drop(columns=keys).to_parquet(os.path.join(path, "part-0.parquet"), index=False)
+
+
+def _queue_state(timestamp, resource_version, gpu_total):
+    return {
+        "instance_type": "ml.p5.48xlarge",
+        "timestamp": timestamp,
+        "namespace": "ns-a",
+        "resource_version": resource_version,
+        "team": "team-a",
+        "gpu_total": gpu_total,
+        "gpu_borrowed": 0.0,
+        "cpu_total": 0.0,
+        "cpu_borrowed": 0.0,
+        "neuron_core_total": 0.0,
+        "neuron_core_borrowed": 0.0,
+    }
+
+
+def _workload_state(timestamp, status, finished):
+    return {
+        "workload_name": "train-1",
+        "timestamp": timestamp,
+        "namespace": "ns-a",
+        "resource_version": "1",
+        "team": "team-a",
+        "status": status,
+        "task_priority_class": "high",
+        "instance_type": "ml.p5.48xlarge",
+        "CPU": 0.0,
+        "GPU": 2.0,
+        "neuron_core": 0.0,
+        "admitted": True,
+        "finished": finished,
+    }
+
+
+def _pod_state(timestamp, status):
+    return {
+        "pod": "job-1-worker-0",
+        "timestamp": timestamp,
+        "namespace": "ns-b",
+        "resource_version": "1",
+        "status": status,
+        "owner": "job-1",
+        "instance_type": "ml.p5.48xlarge",
+        "job_type": "pytorch",
+        "assigned_node": "node-1",
+        "CPU": 0.0,
+        "GPU": 1.0,
+        "neuron_core": 0.0,
+        "priority_class": "low",
+    }
+
+
+@pytest.fixture
+def runner(tmp_path):
+    _write_raw(
+        str(tmp_path),
+        "clusterqueue",
+        [
+            _queue_state("2025-03-09 23:00:00", "1", 16.0),
+            _queue_state("2025-03-10 00:00:00", "1", 8.0),
+            _queue_state("2025-03-10 12:00:00", "2", 4.0),
+            # Older version of the 12:00 state, dropped by the dedup window
+            _queue_state("2025-03-10 12:00:00", "1", 2.0),
+        ],
+    )
+    _write_raw(
+        str(tmp_path),
+        "workload",
+        [
+            _workload_state("2025-03-10 06:00:00", "QuotaReserved-True", False),
+            _workload_state("2025-03-10 09:00:00", "Finished-True", True),
+        ],
+    )
+    _write_raw(
+        str(tmp_path),
+        "pod",
+        [_pod_state("2025-03-10 02:00:00", "Running"), _pod_state("2025-03-10 05:00:00", "Succeeded")],
+    )
+    return AggregationRunner(DuckDBEngine(str(tmp_path)))
+
+
+def test_crescendo_summary_counts_hours_of_the_day(runner):
+    # Act
+    df = runner.run(QueryType.CRESCENDO_SUMMARY, date(2025, 3, 10))
+
+    # Assert
+    assert len(df) == 1
+    row = df.iloc[0]
+    # 8 GPUs from midnight to noon and 4 GPUs from noon to midnight
+    assert row["total_gpu_utilization_hours"] == pytest.approx(144.0)
+    assert (row["year"], row["month"], row["day"], row["cluster"]) == (
+        "2025",
+        "03",
+        "10",
+        "cluster-a",
+    )
+
+
+def test_crescendo_detailed_reports_the_running_period(runner):
+    # Act
+    df = runner.run(QueryType.CRESCENDO_DETAILED, date(2025, 3, 10))
+
+    # Assert
+    assert len(df) == 1
+    row = df.iloc[0]
+    assert row["task_name"] == "train-1"
+    assert row["utilized_gpu_hours"] == pytest.approx(6.0)
+    assert row["status"] == "Finished"
+
+
+def test_run_day_groups_rows_by_report_table_and_records_stages(runner):
+    # Act
+    tables = runner.run_day(date(2025, 3, 10))
+
+    # Assert
+    assert set(tables) == {"summary_report", "detailed_report"}
+    assert sorted(tables["summary_report"]["namespace"]) == ["ns-a", "ns-b"]
+    assert sorted(tables["detailed_report"]["task_name"]) == ["job-1", "train-1"]
+    checkpoints = [checkpoint_type.value for checkpoint_type in CheckpointType]
+    # The 9th was not run, so its checkpoint is built before the 10th is aggregated
+    assert [stage["query"] for stage in runner.metrics.stages] == checkpoints + [
+        report_table.value for report_table in ReportTable
+    ] + checkpoints
+    assert [stage["day"] for stage in runner.metrics.stages][: len(checkpoints)] == [
+        "2025-03-09"
+    ] * len(checkpoints)
+
+
+def test_run_range_carries_open_intervals_over_midnight(tmp_path):
+    # Arrange
+    _write_raw(str(tmp_path), "clusterqueue", [_queue_state("2025-03-09 18:00:00", "1", 8.0)])
+    _write_raw(
+        str(tmp_path),
+        "workload",
+        [_workload_state("2025-03-09 22:00:00", "QuotaReserved-True", False)],
+    )
+    _write_raw(
+        str(tmp_path),
+        "pod",
+        [_pod_state("2025-03-09 20:00:00", "Running"), _pod_state("2025-03-10 03:00:00", "Succeeded")],
+    )
+    runner = AggregationRunner(DuckDBEngine(str(tmp_path)))
+
+    # Act
+    tables = runner.run_range("2025-03-09", "2025-03-10")
+
+    # Assert
+    summary = tables["summary_report"].set_index(["namespace", "day"])
+    # The queue and pod states of the 9th still hold on the 10th
+    assert summary.loc[("ns-a", "09"), "total_gpu_utilization_hours"] == pytest.approx(48.0)
+    assert summary.loc[("ns-a", "10"), "total_gpu_utilization_hours"] == pytest.approx(192.0)
+    detailed = tables["detailed_report"].set_index(["task_name", "day"])
+    assert detailed.loc[("job-1", "09"), "utilized_gpu_hours"] == pytest.approx(4.0)
+    assert detailed.loc[("job-1", "10"), "utilized_gpu_hours"] == pytest.approx(3.0)
+    assert detailed.loc[("train-1", "10"), "utilized_gpu_hours"] == pytest.approx(48.0)
+
+
+def test_run_day_without_a_prior_checkpoint_counts_intervals_open_at_midnight(tmp_path):
+    # Arrange
+    _write_raw(str(tmp_path), "clusterqueue", [_queue_state("2025-03-09 18:00:00", "1", 8.0)])
+    _write_raw(
+        str(tmp_path),
+        "workload",
+        [_workload_state("2025-03-09 22:00:00", "QuotaReserved-True", False)],
+    )
+    _write_raw(
+        str(tmp_path),
+        "pod",
+        [_pod_state("2025-03-09 20:00:00", "Running"), _pod_state("2025-03-10 03:00:00", "Succeeded")],
+    )
+    runner = AggregationRunner(DuckDBEngine(str(tmp_path)))
+
+    # Act
+    tables = runner.run_day(date(2025, 3, 10))
+
+    # Assert
+    summary = tables["summary_report"].set_index("namespace")
+    assert summary.loc["ns-a", "total_gpu_utilization_hours"] == pytest.approx(192.0)
+    detailed = tables["detailed_report"].set_index("task_name")
+    assert detailed.loc["job-1", "utilized_gpu_hours"] == pytest.approx(3.0)
+    assert detailed.loc["train-1", "utilized_gpu_hours"] == pytest.approx(48.0)
+
+
+def test_checkpoint_is_skipped_for_engines_without_checkpoint_tables():
+    # Arrange
+    class ReadOnlyEngine(AggregationEngine):
+        database = "usage_report"
+
+        def query(self, sql):
+            raise AssertionError("no query expected")
+
+    runner = AggregationRunner(ReadOnlyEngine())
+
+    # Act
+    runner.checkpoint(date(2025, 3, 10))
+
+    # Assert
+    assert runner.metrics.stages == []
@@ -0,0 +1,49 @@
+from datetime import date
+
+from src.hyperpod_usage_report.aggregation.templates import (
+    DATABASE_PLACEHOLDER,
+    REPORT_AGGREGATIONS,
+    TEMPLATES,
+    QueryType,
+    ReportTable,
+    prepare_query,
+)
+
+from .lambda_code import lambda_namespace
+
+
+def test_templates_are_the_lambda_templates():
+    # Arrange
+    namespace = lambda_namespace()
+
+    # Assert
+    assert namespace["TEMPLATES"] is TEMPLATES
+    assert namespace["QueryType"] is QueryType
+    assert namespace["ReportTable"] is ReportTable
+
+
+def test_each_report_table_is_written_with_one_sorted_insert():
+    for report_table, (query_types, order_by) in REPORT_AGGREGATIONS.items():
+        # Act
+        sql = TEMPLATES[report_table]
+
+        # Assert
+        assert sql.upper().count("INSERT INTO") == 1
+        assert sql.startswith(f'INSERT INTO "{DATABASE_PLACEHOLDER}".{report_table.value}\n')
+        assert sql.count("\nUNION ALL\nSELECT * FROM (\n") == len(query_types) - 1
+        assert sql.endswith(f"ORDER BY {order_by}")
+        assert order_by.startswith("namespace")
+
+
+def test_prepare_query_fills_day_checkpoint_and_database():
+    # Act
+    sql = prepare_query(QueryType.CRESCENDO_SUMMARY, date(2025, 3, 1), "usage")
+
+    # Assert
+    assert DATABASE_PLACEHOLDER not in sql
+    assert 'INSERT into "usage".summary_report' in sql
+    assert '"usage".clusterqueue_checkpoint' in sql
+    assert "year = '2025' AND month = '02' AND day = '28'" in sql
+    assert "year = '2025' AND month = '03' AND day = '01'" in sql
+    assert "TIMESTAMP '2025-03-01 00:00:00'" in sql
+    assert "{" not in sql
@@ -459,3 +459,78 @@ def test_summary_report_filename_with_team_and_task(summary_df, header_info, emp
     # Assert
     assert output_file == expected_filename
     m.assert_called_once_with(expected_filename, "w")
+
+
+def test_fleet_report_content(summary_df, header_info):
+    # Arrange
+    generator = CSVReportGenerator()
+    fleet_df = pd.concat(
+        [summary_df.assign(cluster="cluster-a"), summary_df.assign(cluster="cluster-b")],
+        ignore_index=True,
+    )
+    header_info["cluster_name"] = "cluster-a, cluster-b"
+    header_info["clusters"] = ["cluster-a", "cluster-b"]
+    m = mock_open()
+
+    # Act
+    with patch("builtins.open", m) as mock_file:
+        output_file = generator.generate_fleet_report(
+            fleet_df, header_info, {"cluster-a": [], "cluster-b": []}
+        )
+
+    # Assert
+    assert output_file == "fleet-summary-report-2025-03-25.csv"
+    write_calls = [call.args[0] for call in mock_file().write.call_args_list]
+    assert "\nCluster: cluster-a\n" in write_calls
+    assert "\nCluster: cluster-b\n" in write_calls
+    assert any(call.startswith("Total,,,,1.00,0.50,0.50,2.00") for call in write_calls)
+    assert any(call.startswith("All clusters,,,,2.00,1.00,1.00,4.00") for call in write_calls)
+
+
+def test_fleet_report_cluster_without_rows(summary_df, header_info):
+    # Arrange
+    generator = CSVReportGenerator()
+    header_info["clusters"] = ["cluster-a", "cluster-b"]
+    missing = [{"start_time": "2025-03-25 00:00:00", "end_time": "2025-03-26 00:00:00"}]
+    m = mock_open()
+
+    # Act
+    with patch("builtins.open", m) as mock_file:
+        generator.generate_fleet_report(
+            summary_df.assign(cluster="cluster-a"), header_info, {"cluster-b": missing}
+        )
+
+    # Assert
+    write_calls = [call.args[0] for call in mock_file().write.call_args_list]
+    assert "No Results\n" in write_calls
+    assert "2025-03-25 00:00:00 to 2025-03-26 00:00:00\n" in write_calls
+
+
+def test_generate_summary_report_with_subtotals(tmp_path, summary_df, header_info):
+    # Arrange
+    generator = CSVReportGenerator(str(tmp_path))
+    hours = summary_df.iloc[0, 4:].to_dict()
+    df = pd.concat(
+        [
+            summary_df.assign(subtotal_level=0),
+            pd.DataFrame(
+                [
+                    {"namespace": "test-namespace", "team": "test-team", **hours, "subtotal_level": 1},
+                    {"namespace": "test-namespace", "team": None, **hours, "subtotal_level": 3},
+                    {"namespace": None, "team": None, **hours, "subtotal_level": 7},
+                ]
+            ),
+        ],
+        ignore_index=True,
+    )
+
+    # Act
+    output_file = generator.generate_summary_report(df, header_info, [])
+
+    # Assert
+    with open(output_file) as f:
+        lines = f.read().splitlines()
+    assert lines[-4].startswith("2025-03-25,test-namespace,test-team,t2.micro,1.00")
+    assert lines[-3] == "Team subtotal,test-namespace,test-team,,1.00,0.50,0.50,2.00,1.00,1.00,3.00,1.50,1.50"
+    assert lines[-2].startswith("Namespace subtotal,test-namespace,,,1.00")
+    assert lines[-1].startswith("Total,,,,1.00")
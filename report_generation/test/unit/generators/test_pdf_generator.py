@@ -322,3 +322,49 @@ def test_generate_report_with_multiple_teams(mock_fpdf, header_info, empty_missi
     mock_fpdf.return_value.add_page.assert_called()
     # Should be called 3 times total: 1 initial from _create_pdf + 2 for page breaks (namespaces 2 and 3)
     assert mock_fpdf.return_value.add_page.call_count == 3
+
+
+@patch("src.hyperpod_usage_report.generators.pdf_generator.FPDF")
+def test_generate_fleet_report(mock_fpdf, summary_df, header_info):
+    generator = PDFReportGenerator()
+    fleet_df = pd.concat(
+        [summary_df.assign(cluster="cluster-a"), summary_df.assign(cluster="cluster-b")],
+        ignore_index=True,
+    )
+    header_info["clusters"] = ["cluster-a", "cluster-b"]
+
+    output_file = generator.generate_fleet_report(
+        fleet_df, header_info, {"cluster-a": [], "cluster-b": []}
+    )
+
+    assert output_file == "fleet-summary-report-2025-03-25.pdf"
+    mock_fpdf.return_value.output.assert_called_once_with(output_file)
+    calls = [str(call) for call in mock_fpdf.return_value.cell.call_args_list]
+    assert any("cluster-b" in call for call in calls)
+    assert any("All clusters" in call for call in calls)
+
+
+@patch("src.hyperpod_usage_report.generators.pdf_generator.FPDF")
+def test_generate_summary_report_with_subtotals(mock_fpdf, summary_df, header_info):
+    generator = PDFReportGenerator()
+    hours = summary_df.iloc[0, 4:].to_dict()
+    df = pd.concat(
+        [
+            summary_df.assign(subtotal_level=0),
+            pd.DataFrame(
+                [
+                    {"namespace": "test-namespace", "team": "test-team", **hours, "subtotal_level": 1},
+                    {"namespace": None, "team": None, **hours, "subtotal_level": 7},
+                ]
+            ),
+        ],
+        ignore_index=True,
+    )
+
+    generator.generate_summary_report(df, header_info, [])
+
+    texts = [call.args[2] for call in mock_fpdf.return_value.cell.call_args_list if len(call.args) > 2]
+    assert "Team subtotal" in texts
+    assert texts.index("Total") > texts.index("Team subtotal")
+    # The grand total closes the namespace page instead of opening its own
+    mock_fpdf.return_value.add_page.assert_called_once()
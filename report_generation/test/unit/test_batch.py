@@ -0,0 +1,173 @@
+import json
+import threading
+import time
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+import pandas as pd
+import pytest
+
+from src.hyperpod_usage_report.batch import BatchManifest, BatchRunner
+
+
+DETAILED_COLUMNS = [
+    "report_date", "period_start", "period_end", "namespace", "team", "task_name",
+    "instance", "status", "utilized_neuron_core_hours", "utilized_neuron_core_count",
+    "utilized_gpu_hours", "utilized_gpu_count", "utilized_vcpu_hours",
+    "utilized_vcpu_count", "priority_class",
+]
+
+
+@pytest.fixture
+def manifest_dict():
+    return {
+        "defaults": {
+            "start_date": "2025-03-25",
+            "end_date": "2025-03-25",
+            "database_name": "test-database",
+            "database_workgroup_name": "test-workgroup",
+            "cluster_name": "test-cluster",
+            "output_report_location": "s3://test-bucket/reports",
+        },
+        "max_concurrent_reports": 4,
+        "max_concurrent_queries": 2,
+        "reports": [
+            {"type": "summary", "format": "csv", "namespace": "team-a"},
+            {"type": "summary", "format": "csv", "namespace": "team-a"},
+            {"type": "summary", "format": "csv", "namespace": "team-b"},
+            {"type": "detailed", "format": "csv"},
+        ],
+    }
+
+
+@pytest.fixture
+def summary_df():
+    return pd.DataFrame(
+        {
+            "report_date": [datetime.strptime("2025-03-25", "%Y-%m-%d")],
+            "namespace": ["team-a"],
+            "team": ["test-team"],
+            "instance_type": ["ml.p5.48xlarge"],
+            "total_neuron_core_utilization_hours": [1.0],
+            "allocated_neuron_core_utilization_hours": [0.5],
+            "borrowed_neuron_core_utilization_hours": [0.5],
+            "total_gpu_utilization_hours": [2.0],
+            "allocated_gpu_utilization_hours": [1.0],
+            "borrowed_gpu_utilization_hours": [1.0],
+            "total_vcpu_utilization_hours": [3.0],
+            "allocated_vcpu_utilization_hours": [1.5],
+            "borrowed_vcpu_utilization_hours": [1.5],
+        }
+    )
+
+
+def test_manifest_merges_defaults(manifest_dict):
+    # Act
+    manifest = BatchManifest.from_dict(manifest_dict)
+
+    # Assert
+    assert len(manifest.reports) == 4
+    assert manifest.reports[0].cluster_name == "test-cluster"
+    assert manifest.reports[2].namespace == "team-b"
+    assert manifest.max_concurrent_queries == 2
+
+
+def test_manifest_rejects_invalid_report(manifest_dict):
+    # Arrange
+    manifest_dict["reports"][1]["format"] = "xlsx"
+
+    # Act & Assert
+    with pytest.raises(ValueError) as exc_info:
+        BatchManifest.from_dict(manifest_dict)
+    assert "Report #1: Invalid format" in str(exc_info.value)
+
+
+def test_manifest_requires_output_location(manifest_dict):
+    # Arrange
+    del manifest_dict["defaults"]["output_report_location"]
+
+    # Act & Assert
+    with pytest.raises(ValueError) as exc_info:
+        BatchManifest.from_dict(manifest_dict)
+    assert "output_report_location is required" in str(exc_info.value)
+
+
+def test_manifest_rejects_unknown_fields(manifest_dict):
+    # Arrange
+    manifest_dict["retries"] = 3
+
+    # Act & Assert
+    with pytest.raises(ValueError):
+        BatchManifest.from_dict(manifest_dict)
+
+
+@pytest.mark.parametrize("suffix", [".json", ".yaml"])
+def test_manifest_load(manifest_dict, tmp_path, suffix):
+    # Arrange
+    path = tmp_path / f"manifest{suffix}"
+    path.write_text(json.dumps(manifest_dict))
+
+    # Act
+    manifest = BatchManifest.load(str(path))
+
+    # Assert
+    assert len(manifest.reports) == 4
+
+
+@patch("src.hyperpod_usage_report.report_generator.S3Uploader")
+@patch("src.hyperpod_usage_report.report_generator.wr")
+@patch("src.hyperpod_usage_report.utils.thread_sessions.boto3")
+def test_runner_deduplicates_identical_queries(
+    mock_boto3, mock_wr, mock_uploader, manifest_dict, summary_df
+):
+    # Arrange
+    lock = threading.Lock()
+    running = {}
+    peak = {}
+
+    def read_sql_query(sql, **kwargs):
+        # The heartbeat query runs in the default workgroup, which has its own slots
+        workgroup = kwargs.get("workgroup", "primary")
+        with lock:
+            running[workgroup] = running.get(workgroup, 0) + 1
+            peak[workgroup] = max(peak.get(workgroup, 0), running[workgroup])
+        time.sleep(0.05)
+        with lock:
+            running[workgroup] -= 1
+        if "detailed_report" in sql:
+            return pd.DataFrame(columns=DETAILED_COLUMNS)
+        return summary_df if "summary_report" in sql else pd.DataFrame()
+
+    mock_wr.athena.read_sql_query.side_effect = read_sql_query
+    mock_boto3.Session.side_effect = lambda: Mock()
+    manifest = BatchManifest.from_dict(manifest_dict)
+
+    # Act
+    results = BatchRunner(manifest).run()
+
+    # Assert
+    assert [result["status"] for result in results] == ["SUCCESS"] * 4
+    # team-a summary, team-b summary, detailed and one shared heartbeat query
+    assert mock_wr.athena.read_sql_query.call_count == 4
+    assert all(count <= 2 for count in peak.values())
+    assert mock_uploader.upload_files.call_count == 4
+    # One session per worker thread, never more than the pool size
+    sessions = {
+        id(call.kwargs["boto3_session"]) for call in mock_wr.athena.read_sql_query.call_args_list
+    }
+    assert len(sessions) <= mock_boto3.Session.call_count <= manifest.max_concurrent_reports
+
+
+@patch("src.hyperpod_usage_report.report_generator.wr")
+@patch("src.hyperpod_usage_report.utils.thread_sessions.boto3")
+def test_runner_reports_failures(mock_boto3, mock_wr, manifest_dict):
+    # Arrange
+    mock_wr.athena.read_sql_query.side_effect = Exception("Database error")
+    manifest = BatchManifest.from_dict(manifest_dict)
+
+    # Act
+    results = BatchRunner(manifest).run()
+
+    # Assert
+    assert all(result["status"] == "FAILED" for result in results)
+    assert "Database error" in results[0]["message"]
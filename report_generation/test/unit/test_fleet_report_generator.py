@@ -0,0 +1,110 @@
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.hyperpod_usage_report.fleet_report_generator import (
+    ClusterTarget,
+    FleetReportGenerator,
+)
+
+
+@pytest.fixture
+def fleet_generator():
+    return FleetReportGenerator(
+        start_date="2025-03-25",
+        end_date="2025-03-25",
+        clusters=[
+            ClusterTarget("cluster-a", "shared-db", "wg"),
+            ClusterTarget("cluster-b", "shared-db", "wg"),
+            ClusterTarget("cluster-c", "other-db", "wg"),
+        ],
+        report_type="summary",
+        output_location="s3://dummy-bucket/reports",
+        format="csv",
+    )
+
+
+def _heartdub(cluster):
+    return pd.DataFrame(
+        {
+            "cluster": [cluster] * 24,
+            "year": ["2025"] * 24,
+            "month": ["03"] * 24,
+            "day": ["25"] * 24,
+            "hour": [str(hour) for hour in range(24)],
+        }
+    )
+
+
+def test_init_rejects_duplicate_clusters():
+    # Act & Assert
+    with pytest.raises(ValueError) as exc_info:
+        FleetReportGenerator(
+            start_date="2025-03-25",
+            end_date="2025-03-25",
+            clusters=[ClusterTarget("a", "db", "wg"), ClusterTarget("a", "db", "wg")],
+            report_type="summary",
+            output_location="s3://dummy-bucket/reports",
+            format="csv",
+        )
+    assert "unique" in str(exc_info.value)
+
+
+def test_init_filters_clusters_sharing_a_database(fleet_generator):
+    # Assert
+    assert [g.cluster_filter for g in fleet_generator.cluster_generators] == [
+        True,
+        True,
+        False,
+    ]
+
+
+@patch("src.hyperpod_usage_report.report_generator.wr")
+def test_fetch_fleet_data_tags_and_merges_rows(mock_wr, fleet_generator):
+    # Arrange
+    def read_sql_query(sql, database, **kwargs):
+        cluster = "cluster-c" if database == "other-db" else sql.split("cluster = '")[1][:9]
+        if "FROM heartdub" in sql:
+            return _heartdub(cluster) if cluster != "cluster-b" else _heartdub(cluster)[:0]
+        if cluster == "cluster-a":
+            return pd.DataFrame({"namespace": []})
+        return pd.DataFrame({"namespace": [f"{cluster}-ns"]})
+
+    mock_wr.athena.read_sql_query.side_effect = read_sql_query
+
+    # Act
+    df, missing_periods = fleet_generator._fetch_fleet_data()
+
+    # Assert
+    assert list(df["cluster"]) == ["cluster-b", "cluster-c"]
+    assert list(df["namespace"]) == ["cluster-b-ns", "cluster-c-ns"]
+    assert missing_periods["cluster-a"] == []
+    assert len(missing_periods["cluster-b"]) == 1
+    assert missing_periods["cluster-c"] == []
+
+
+def test_prepare_header_info(fleet_generator):
+    # Act
+    header_info = fleet_generator._prepare_header_info()
+
+    # Assert
+    assert header_info["cluster_name"] == "cluster-a, cluster-b, cluster-c"
+    assert header_info["clusters"] == ["cluster-a", "cluster-b", "cluster-c"]
+
+
+@patch("src.hyperpod_usage_report.fleet_report_generator.S3Uploader")
+def test_generate_report_uploads_fleet_file(mock_uploader, fleet_generator, tmp_path):
+    # Arrange
+    output_file = tmp_path / "fleet-summary-report-2025-03-25.csv"
+    output_file.write_text("report")
+
+    # Act
+    with patch.object(fleet_generator, "render_report", return_value=str(output_file)):
+        fleet_generator.generate_report()
+
+    # Assert
+    mock_uploader.upload_files.assert_called_once_with(
+        [str(output_file)], "s3://dummy-bucket/reports", boto3_session=None, metadata=None
+    )
+    assert not output_file.exists()
@@ -1,10 +1,18 @@
+import gzip
+import os
+import warnings
 from datetime import datetime
 from unittest.mock import Mock, patch
 
 import pytest
 import pandas as pd
 
-from src.hyperpod_usage_report.report_generator import ReportGenerator
+from src.hyperpod_usage_report.report_generator import ReportGenerationError, ReportGenerator
+from src.hyperpod_usage_report.utils.report_catalog import NoMatchingDataError
+from src.hyperpod_usage_report.utils.scan_estimator import (
+    ScanBudgetExceededError,
+    ScanEstimate,
+)
 
 
 @pytest.fixture
@@ -336,3 +344,488 @@ def test_report_generator_init_with_task():
     # Assert
     assert generator.namespace == "ml-team"
     assert generator.task == "training-job-1"
+
+
+def _sharded_generator(shard_by, start_date="2025-03-25", end_date="2025-04-08"):
+    return ReportGenerator(
+        start_date=start_date,
+        end_date=end_date,
+        cluster_name="test-cluster",
+        database_name="test-database",
+        database_workgroup_name="test-workgroup",
+        report_type="summary",
+        output_location="s3://test-bucket/reports/",
+        format="csv",
+        shard_by=shard_by,
+    )
+
+
+def test_report_generator_init_invalid_shard_period():
+    # Act & Assert
+    with pytest.raises(ValueError) as exc_info:
+        _sharded_generator("month")
+    assert "Invalid shard period" in str(exc_info.value)
+
+
+def test_date_shards_by_week():
+    # Arrange
+    generator = _sharded_generator("week")
+
+    # Act
+    shards = generator._date_shards()
+
+    # Assert
+    assert [(s.strftime("%Y-%m-%d"), e.strftime("%Y-%m-%d")) for s, e in shards] == [
+        ("2025-03-25", "2025-03-31"),
+        ("2025-04-01", "2025-04-07"),
+        ("2025-04-08", "2025-04-08"),
+    ]
+
+
+@patch("src.hyperpod_usage_report.report_generator.wr")
+def test_fetch_data_sharded_keeps_shard_order(mock_wr):
+    # Arrange
+    generator = _sharded_generator("day", end_date="2025-03-27")
+
+    def read_sql_query(sql, **kwargs):
+        day = sql.split("day = '")[1][:2]
+        return pd.DataFrame({"day": [day]}) if day != "26" else pd.DataFrame({"day": []})
+
+    mock_wr.athena.read_sql_query.side_effect = read_sql_query
+
+    # Act
+    result = generator._fetch_data()
+
+    # Assert
+    assert mock_wr.athena.read_sql_query.call_count == 3
+    assert list(result["day"]) == ["25", "27"]
+    for call in mock_wr.athena.read_sql_query.call_args_list:
+        assert call.kwargs["workgroup"] == "test-workgroup"
+
+
+@patch("src.hyperpod_usage_report.report_generator.time")
+@patch("src.hyperpod_usage_report.report_generator.wr")
+def test_fetch_data_sharded_retries_failed_shard_only(mock_wr, mock_time):
+    # Arrange
+    generator = _sharded_generator("day", end_date="2025-03-26")
+    attempts = {}
+
+    def read_sql_query(sql, **kwargs):
+        day = sql.split("day = '")[1][:2]
+        attempts[day] = attempts.get(day, 0) + 1
+        if day == "26" and attempts[day] == 1:
+            raise Exception("Throttled")
+        return pd.DataFrame({"day": [day]})
+
+    mock_wr.athena.read_sql_query.side_effect = read_sql_query
+
+    # Act
+    result = generator._fetch_data()
+
+    # Assert
+    assert attempts == {"25": 1, "26": 2}
+    assert list(result["day"]) == ["25", "26"]
+
+
+@patch("src.hyperpod_usage_report.report_generator.time")
+@patch("src.hyperpod_usage_report.report_generator.wr")
+def test_fetch_data_sharded_gives_up_after_retries(mock_wr, mock_time):
+    # Arrange
+    generator = _sharded_generator("day", end_date="2025-03-25")
+    mock_wr.athena.read_sql_query.side_effect = Exception("Database error")
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        generator._fetch_data()
+    assert "Database error" in str(exc_info.value)
+    assert mock_wr.athena.read_sql_query.call_count == 3
+
+
+def _estimator(report_bytes, heartdub_bytes=0):
+    estimator = Mock()
+    estimator.estimate.side_effect = lambda table, *args, **kwargs: ScanEstimate(
+        table, heartdub_bytes if table == "heartdub" else report_bytes, ["s3://bucket/p"]
+    )
+    return estimator
+
+
+def test_estimate_scan_sharded_estimates_each_shard():
+    # Arrange
+    generator = _sharded_generator("day", end_date="2025-03-26")
+    estimator = _estimator(100, 10)
+
+    # Act
+    estimates = generator.estimate_scan(estimator)
+
+    # Assert
+    assert [estimate.table for _, estimate in estimates] == [
+        "summary_report",
+        "summary_report",
+        "heartdub",
+    ]
+    estimator.estimate.assert_any_call("summary_report", "2025-03-26", "2025-03-26", None)
+
+
+def test_explain_lists_sql_and_total(report_generator):
+    # Act
+    explanation = report_generator.explain(_estimator(1024, 1024))
+
+    # Assert
+    assert "FROM summary_report" in explanation
+    assert "FROM heartdub" in explanation
+    assert "Total estimated scan: 2.0 KB" in explanation
+
+
+@patch("src.hyperpod_usage_report.report_generator.wr")
+def test_render_report_refuses_scan_over_budget(mock_wr, report_generator):
+    # Arrange
+    report_generator.max_scan_bytes = 1000
+
+    # Act & Assert
+    with patch.object(report_generator, "estimate_scan", return_value=[
+        ("SELECT 1", ScanEstimate("summary_report", 5000))
+    ]):
+        with pytest.raises(ScanBudgetExceededError) as exc_info:
+            report_generator.render_report()
+    assert "over the budget" in str(exc_info.value)
+    mock_wr.athena.read_sql_query.assert_not_called()
+
+
+@patch("src.hyperpod_usage_report.report_generator.wr")
+def test_render_report_records_stage_metrics(mock_wr, report_generator):
+    # Arrange
+    report_df = pd.DataFrame({"namespace": ["a"]})
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=UserWarning)
+        report_df.query_metadata = {"Statistics": {"DataScannedInBytes": 512}}
+    mock_wr.athena.read_sql_query.side_effect = [report_df, pd.DataFrame()]
+
+    # Act
+    with patch.object(report_generator, "_generate_report_by_type", return_value="out.csv"):
+        report_generator.render_report()
+
+    # Assert
+    stages = [record["stage"] for record in report_generator.metrics.stages]
+    assert stages == ["fetch_data", "gap_detection", "render"]
+    queries = report_generator.metrics.queries
+    assert [query["query"] for query in queries] == ["report", "heartbeat"]
+    assert queries[0]["bytes_scanned"] == 512
+
+
+@patch("src.hyperpod_usage_report.report_generator.wr")
+def test_render_report_rejects_namespace_missing_from_catalog(mock_wr, report_generator):
+    # Arrange
+    report_generator.check_catalog = True
+    report_generator.namespace = "ml-taem-a"
+    mock_wr.athena.read_sql_query.return_value = pd.DataFrame(
+        {
+            "report_date": ["2025-03-25"],
+            "namespace": ["ml-team-a"],
+            "task_name": [None],
+            "report_type": ["summary"],
+            "row_count": [4],
+        }
+    )
+
+    # Act & Assert
+    with pytest.raises(NoMatchingDataError) as exc_info:
+        report_generator.render_report()
+    assert "Did you mean: ml-team-a" in str(exc_info.value)
+    # Only the catalog lookup ran, not the report or heartbeat queries
+    assert mock_wr.athena.read_sql_query.call_count == 1
+    assert "FROM report_catalog" in mock_wr.athena.read_sql_query.call_args.kwargs["sql"]
+
+
+@patch("src.hyperpod_usage_report.report_generator.wr")
+def test_render_report_runs_without_catalog_table(mock_wr, report_generator):
+    # Arrange
+    report_generator.check_catalog = True
+    mock_wr.athena.read_sql_query.side_effect = [
+        Exception("Table report_catalog does not exist"),
+        pd.DataFrame({"namespace": ["a"]}),
+        pd.DataFrame(),
+    ]
+
+    # Act
+    with patch.object(report_generator, "_generate_report_by_type", return_value="out.csv"):
+        output_file = report_generator.render_report()
+
+    # Assert
+    assert output_file == "out.csv"
+    stages = [record["stage"] for record in report_generator.metrics.stages]
+    assert stages == ["catalog_check", "fetch_data", "gap_detection", "render"]
+
+
+@patch("src.hyperpod_usage_report.report_generator.S3Uploader")
+def test_generate_report_skips_unchanged_inputs(mock_uploader, report_generator):
+    # Arrange
+    report_generator.skip_unchanged = True
+    mock_uploader.get_remote_metadata.return_value = {"input-fingerprint": "abc"}
+
+    # Act
+    with patch.object(report_generator, "input_fingerprint", return_value="abc"), patch.object(
+        report_generator, "render_reports"
+    ) as render_reports:
+        report_generator.generate_report()
+
+    # Assert
+    render_reports.assert_not_called()
+    mock_uploader.upload_files.assert_not_called()
+    assert mock_uploader.get_remote_metadata.call_args.args[0].endswith(
+        "summary-report-2025-03-25.csv"
+    )
+    stages = [record["stage"] for record in report_generator.metrics.stages]
+    assert stages == ["fingerprint"]
+
+
+@patch("src.hyperpod_usage_report.report_generator.S3Uploader")
+def test_generate_report_uploads_changed_inputs_with_fingerprint(
+    mock_uploader, report_generator, tmp_path
+):
+    # Arrange
+    report_generator.skip_unchanged = True
+    mock_uploader.get_remote_metadata.return_value = {"input-fingerprint": "old"}
+    output_file = tmp_path / "summary-report-2025-03-25.csv"
+    output_file.write_text("report")
+
+    # Act
+    with patch.object(report_generator, "input_fingerprint", return_value="new"), patch.object(
+        report_generator, "render_reports", return_value=[str(output_file)]
+    ):
+        report_generator.generate_report()
+
+    # Assert
+    assert mock_uploader.upload_files.call_args.kwargs["metadata"] == {
+        "input-fingerprint": "new"
+    }
+    assert not output_file.exists()
+
+
+@patch("src.hyperpod_usage_report.report_generator.wr")
+def test_render_reports_fetches_each_table_once_for_every_format(mock_wr):
+    # Arrange
+    generator = ReportGenerator(
+        start_date="2025-03-25",
+        end_date="2025-03-25",
+        cluster_name="dummy-cluster",
+        database_name="dummy-db",
+        database_workgroup_name="dummy-workgroup",
+        report_type=["summary", "detailed"],
+        output_location="s3://dummy-bucket/reports",
+        format=["pdf", "csv"],
+    )
+    mock_wr.athena.read_sql_query.side_effect = lambda sql, **kwargs: (
+        pd.DataFrame() if "FROM heartdub" in sql else pd.DataFrame({"namespace": ["a"]})
+    )
+
+    def generate(self, df, header_info, report_type, missing_periods):
+        return f"{header_info['report_type']}.{self.format}"
+
+    # Act
+    with patch.object(ReportGenerator, "_generate_report_by_type", generate):
+        output_files = generator.render_reports()
+
+    # Assert
+    assert output_files == ["summary.pdf", "summary.csv", "detailed.pdf", "detailed.csv"]
+    queries = [call.kwargs["sql"] for call in mock_wr.athena.read_sql_query.call_args_list]
+    assert len(queries) == 3
+    assert sum("FROM summary_report" in sql for sql in queries) == 1
+    assert sum("FROM detailed_report" in sql for sql in queries) == 1
+    render_stages = [
+        (record["report_type"], record["format"])
+        for record in generator.metrics.stages
+        if record["stage"] == "render"
+    ]
+    assert sorted(render_stages) == [
+        ("detailed", "csv"),
+        ("detailed", "pdf"),
+        ("summary", "csv"),
+        ("summary", "pdf"),
+    ]
+
+
+@patch("src.hyperpod_usage_report.report_generator.wr")
+def test_render_report_with_subtotals_and_no_rows(mock_wr, report_generator):
+    # Arrange
+    report_generator.subtotals = True
+    mock_wr.athena.read_sql_query.side_effect = [
+        # Grouping no rows still returns the grand total
+        pd.DataFrame({"namespace": [None], "total_gpu_utilization_hours": [None], "subtotal_level": [7]}),
+        pd.DataFrame(),
+    ]
+
+    # Act
+    with patch.object(report_generator, "_generate_report_by_type", return_value="out.csv") as generate:
+        report_generator.render_report()
+
+    # Assert
+    assert "GROUPING SETS" in mock_wr.athena.read_sql_query.call_args_list[0].kwargs["sql"]
+    assert generate.call_args.args[0].empty
+
+
+def test_subtotals_cannot_be_sharded():
+    # Act & Assert
+    with pytest.raises(ValueError):
+        ReportGenerator(
+            start_date="2025-03-25",
+            end_date="2025-03-26",
+            cluster_name="dummy-cluster",
+            database_name="dummy-db",
+            database_workgroup_name="dummy-workgroup",
+            report_type="summary",
+            output_location="s3://dummy-bucket/reports",
+            format="csv",
+            shard_by="day",
+            subtotals=True,
+        )
+
+
+def _pipeline_generator(**kwargs):
+    return ReportGenerator(
+        start_date="2025-03-25",
+        end_date="2025-03-26",
+        cluster_name="dummy-cluster",
+        database_name="dummy-db",
+        database_workgroup_name="dummy-workgroup",
+        report_type="summary",
+        output_location="s3://dummy-bucket/reports",
+        format="csv",
+        pipeline=True,
+        **kwargs,
+    )
+
+
+@patch("src.hyperpod_usage_report.report_generator.S3Uploader")
+@patch("src.hyperpod_usage_report.report_generator.wr")
+def test_generate_report_streams_compressed_chunks(mock_wr, mock_uploader, tmp_path):
+    # Arrange
+    from test.benchmark.synthetic import summary_frame
+
+    generator = _pipeline_generator(compress=True, output_dir=str(tmp_path))
+    df = summary_frame(300)
+    mock_wr.athena.read_sql_query.side_effect = lambda sql, **kwargs: (
+        iter([df.iloc[:100].copy(), df.iloc[100:].copy()])
+        if kwargs.get("chunksize")
+        else pd.DataFrame()
+    )
+    uploaded = {}
+
+    def upload_stream(blocks, file_name, output_location, **kwargs):
+        uploaded[file_name] = b"".join(blocks)
+        return len(uploaded[file_name])
+
+    mock_uploader.upload_stream.side_effect = upload_stream
+
+    # Act
+    generator.generate_report()
+
+    # Assert
+    expected_file = generator.generator.generate_summary_report(
+        df.copy(), generator._prepare_header_info(), generator._find_missing_period()
+    )
+    with open(expected_file, "rb") as f:
+        expected = f.read()
+    assert list(uploaded) == ["summary-report-2025-03-25-2025-03-26.csv.gz"]
+    assert gzip.decompress(uploaded["summary-report-2025-03-25-2025-03-26.csv.gz"]) == expected
+    assert list(tmp_path.iterdir()) == [tmp_path / os.path.basename(expected_file)]
+    stages = {record["stage"]: record for record in generator.metrics.stages}
+    assert stages["fetch_data"]["rows"] == 300
+    assert {"render", "compress", "upload"} <= set(stages)
+    report_queries = [query for query in generator.metrics.queries if query["query"] == "report"]
+    assert [query["rows"] for query in report_queries] == [300]
+
+
+@patch("src.hyperpod_usage_report.report_generator.S3Uploader")
+@patch("src.hyperpod_usage_report.report_generator.wr")
+def test_generate_report_streams_shards_in_order(mock_wr, mock_uploader):
+    # Arrange
+    generator = _pipeline_generator(shard_by="day")
+    chunks = []
+
+    def read_sql_query(sql, **kwargs):
+        if "FROM heartdub" in sql:
+            return pd.DataFrame()
+        return pd.DataFrame({"day": [sql.split("day = '")[1][:2]]})
+
+    mock_wr.athena.read_sql_query.side_effect = read_sql_query
+    mock_uploader.upload_stream.side_effect = lambda blocks, *args, **kwargs: list(blocks)
+
+    # Act
+    with patch.object(
+        generator.generator,
+        "stream_report",
+        side_effect=lambda frames, *args: (chunks.append(frame["day"][0]) or "" for frame in frames),
+    ):
+        generator.generate_report()
+
+    # Assert
+    assert chunks == ["25", "26"]
+    mock_uploader.upload_stream.assert_called_once()
+
+
+@patch("src.hyperpod_usage_report.report_generator.S3Uploader")
+@patch("src.hyperpod_usage_report.report_generator.wr")
+def test_generate_report_stops_the_pipeline_when_the_fetch_fails(mock_wr, mock_uploader):
+    # Arrange
+    generator = _pipeline_generator()
+
+    def chunks():
+        raise Exception("Athena error")
+        yield
+
+    mock_wr.athena.read_sql_query.side_effect = lambda sql, **kwargs: (
+        chunks() if kwargs.get("chunksize") else pd.DataFrame()
+    )
+    mock_uploader.upload_stream.side_effect = lambda blocks, *args, **kwargs: list(blocks)
+
+    # Act & Assert
+    with pytest.raises(ReportGenerationError, match="Athena error"):
+        generator.generate_report()
+
+
+def test_pipeline_only_streams_a_single_csv_report():
+    # Act & Assert
+    with pytest.raises(ValueError):
+        ReportGenerator(
+            start_date="2025-03-25",
+            end_date="2025-03-25",
+            cluster_name="dummy-cluster",
+            database_name="dummy-db",
+            database_workgroup_name="dummy-workgroup",
+            report_type="summary",
+            output_location="s3://dummy-bucket/reports",
+            format="pdf",
+            pipeline=True,
+        )
+    with pytest.raises(ValueError):
+        ReportGenerator(
+            start_date="2025-03-25",
+            end_date="2025-03-25",
+            cluster_name="dummy-cluster",
+            database_name="dummy-db",
+            database_workgroup_name="dummy-workgroup",
+            report_type="summary",
+            output_location="s3://dummy-bucket/reports",
+            format="csv",
+            compress=True,
+        )
+
+
+@patch("src.hyperpod_usage_report.report_generator.wr")
+def test_render_report_rejects_several_outputs(mock_wr):
+    # Arrange
+    generator = ReportGenerator(
+        start_date="2025-03-25",
+        end_date="2025-03-25",
+        cluster_name="dummy-cluster",
+        database_name="dummy-db",
+        database_workgroup_name="dummy-workgroup",
+        report_type="summary",
+        output_location="s3://dummy-bucket/reports",
+        format=["pdf", "csv"],
+    )
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="render_reports"):
+        generator.render_report()
+    mock_wr.athena.read_sql_query.assert_not_called()
@@ -0,0 +1,136 @@
+import pytest
+
+from src.hyperpod_usage_report.report_spec import ReportSpec
+
+
+@pytest.fixture
+def spec_dict():
+    return {
+        "start_date": "2025-03-25",
+        "end_date": "2025-03-26",
+        "format": "csv",
+        "type": "summary",
+        "database_name": "test-database",
+        "database_workgroup_name": "test-workgroup",
+        "cluster_name": "test-cluster",
+    }
+
+
+def test_from_dict_valid(spec_dict):
+    # Act
+    spec = ReportSpec.from_dict(spec_dict)
+
+    # Assert
+    assert spec.type == "summary"
+    assert spec.output_report_location is None
+    assert spec.to_dict() == spec_dict
+
+
+def test_from_dict_missing_field(spec_dict):
+    # Arrange
+    del spec_dict["cluster_name"]
+
+    # Act & Assert
+    with pytest.raises(ValueError) as exc_info:
+        ReportSpec.from_dict(spec_dict)
+    assert "cluster_name" in str(exc_info.value)
+
+
+def test_from_dict_unknown_field(spec_dict):
+    # Arrange
+    spec_dict["team"] = "ml-team"
+
+    # Act & Assert
+    with pytest.raises(ValueError) as exc_info:
+        ReportSpec.from_dict(spec_dict)
+    assert "Unknown report spec fields: team" in str(exc_info.value)
+
+
+@pytest.mark.parametrize(
+    "field,value,message",
+    [
+        ("start_date", "2025/03/25", "Invalid date"),
+        ("end_date", "2025-03-24", "end_date must not be earlier"),
+        ("format", "xlsx", "Invalid format"),
+        ("type", "hourly", "Invalid report type"),
+        ("output_report_location", "/tmp/reports", "must be an S3 location"),
+        ("start_date", 20250325, "start_date must be a string"),
+        ("namespace", ["a"], "namespace must be a string"),
+        ("max_scan_bytes", True, "max_scan_bytes must be a positive integer"),
+        ("pipeline", "yes", "pipeline must be true or false"),
+        ("compress", True, "compress requires pipeline"),
+    ],
+)
+def test_from_dict_invalid_values(spec_dict, field, value, message):
+    # Arrange
+    spec_dict[field] = value
+
+    # Act & Assert
+    with pytest.raises(ValueError) as exc_info:
+        ReportSpec.from_dict(spec_dict)
+    assert message in str(exc_info.value)
+
+
+def test_create_generator(spec_dict):
+    # Arrange
+    spec_dict["namespace"] = "ml-team"
+    spec = ReportSpec.from_dict(spec_dict)
+
+    # Act
+    generator = spec.create_generator(output_dir="/tmp/reports")
+
+    # Assert
+    assert generator.report_type == "summary"
+    assert generator.namespace == "ml-team"
+    assert generator.output_dir == "/tmp/reports"
+
+
+def test_create_generator_with_pipeline(spec_dict):
+    # Arrange
+    spec_dict.update(pipeline=True, compress=True)
+    spec = ReportSpec.from_dict(spec_dict)
+
+    # Act
+    generator = spec.create_generator()
+
+    # Assert
+    assert generator.pipeline is True
+    assert generator.compress is True
+
+
+def test_from_dict_pipeline_requires_csv(spec_dict):
+    # Arrange
+    spec_dict.update(pipeline=True, format="pdf")
+
+    # Act & Assert
+    with pytest.raises(ValueError) as exc_info:
+        ReportSpec.from_dict(spec_dict)
+    assert "pipeline only streams csv reports" in str(exc_info.value)
+
+
+def test_create_generator_with_clusters(spec_dict):
+    # Arrange
+    spec_dict["clusters"] = [
+        "cluster-b",
+        {"cluster_name": "cluster-c", "database_name": "other-db"},
+    ]
+    spec = ReportSpec.from_dict(spec_dict)
+
+    # Act
+    generator = spec.create_generator()
+
+    # Assert
+    assert generator.cluster_names == [spec.cluster_name, "cluster-b", "cluster-c"]
+    assert generator.cluster_generators[2].database_name == "other-db"
+    assert generator.cluster_generators[1].cluster_filter is True
+    assert generator.cluster_generators[2].cluster_filter is False
+
+
+def test_from_dict_invalid_cluster(spec_dict):
+    # Arrange
+    spec_dict["clusters"] = [{"database_name": "other-db"}]
+
+    # Act & Assert
+    with pytest.raises(ValueError) as exc_info:
+        ReportSpec.from_dict(spec_dict)
+    assert "Invalid cluster" in str(exc_info.value)
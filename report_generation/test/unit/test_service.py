@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+from unittest.mock import Mock, patch
+
+import pandas as pd
+import pytest
+
+from src.hyperpod_usage_report.report_spec import ReportSpec
+from src.hyperpod_usage_report.service import ReportService, make_request_handler
+
+
+@pytest.fixture
+def summary_df():
+    return pd.DataFrame(
+        {
+            "report_date": [datetime.strptime("2025-03-25", "%Y-%m-%d")],
+            "namespace": ["test-namespace"],
+            "team": ["test-team"],
+            "instance_type": ["ml.p5.48xlarge"],
+            "total_neuron_core_utilization_hours": [1.0],
+            "allocated_neuron_core_utilization_hours": [0.5],
+            "borrowed_neuron_core_utilization_hours": [0.5],
+            "total_gpu_utilization_hours": [2.0],
+            "allocated_gpu_utilization_hours": [1.0],
+            "borrowed_gpu_utilization_hours": [1.0],
+            "total_vcpu_utilization_hours": [3.0],
+            "allocated_vcpu_utilization_hours": [1.5],
+            "borrowed_vcpu_utilization_hours": [1.5],
+        }
+    )
+
+
+@pytest.fixture
+def spec_dict():
+    return {
+        "start_date": "2025-03-25",
+        "end_date": "2025-03-25",
+        "format": "csv",
+        "type": "summary",
+        "database_name": "test-database",
+        "database_workgroup_name": "test-workgroup",
+        "cluster_name": "test-cluster",
+    }
+
+
+@pytest.fixture
+def sessions():
+    created = []
+
+    def create_session():
+        created.append(Mock())
+        return created[-1]
+
+    with patch("src.hyperpod_usage_report.utils.thread_sessions.boto3") as mock_boto3:
+        mock_boto3.Session.side_effect = create_session
+        yield created
+
+
+@pytest.fixture
+def service(tmp_path, sessions):
+    service = ReportService(max_workers=2, work_dir=str(tmp_path))
+    yield service
+    service.executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def mock_wr(summary_df):
+    with patch("src.hyperpod_usage_report.report_generator.wr") as mock_wr:
+        mock_wr.athena.read_sql_query.side_effect = lambda sql, **kwargs: (
+            summary_df if "summary_report" in sql else pd.DataFrame()
+        )
+        yield mock_wr
+
+
+@pytest.fixture
+def server(service):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_request_handler(service))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _post(url, body):
+    request = urllib.request.Request(
+        url, data=json.dumps(body).encode("utf-8"), method="POST"
+    )
+    return urllib.request.urlopen(request)
+
+
+def test_render_reuses_cached_queries(service, sessions, mock_wr, spec_dict):
+    # Arrange
+    spec = ReportSpec.from_dict(spec_dict)
+
+    # Act
+    first = service.submit(spec).result()
+    service.release(first)
+    second = service.submit(spec).result()
+
+    # Assert
+    assert os.path.basename(second) == "summary-report-2025-03-25.csv"
+    assert os.path.exists(second)
+    assert mock_wr.athena.read_sql_query.call_count == 2
+    for call in mock_wr.athena.read_sql_query.call_args_list:
+        assert call.kwargs["boto3_session"] in sessions
+    service.release(second)
+    assert not os.path.exists(second)
+
+
+def test_warm_up_creates_a_session_per_worker(service, sessions):
+    # Act
+    service.warm_up()
+
+    # Assert
+    assert len(sessions) == 2
+    for session in sessions:
+        assert [call.args[0] for call in session.client.call_args_list] == ["athena", "s3"]
+
+
+@patch("src.hyperpod_usage_report.report_generator.S3Uploader")
+def test_submit_with_output_location_uploads(mock_uploader, service, mock_wr, spec_dict):
+    # Arrange
+    spec_dict["output_report_location"] = "s3://test-bucket/reports"
+    spec = ReportSpec.from_dict(spec_dict)
+
+    # Act
+    result = service.submit(spec).result()
+
+    # Assert
+    assert result == "s3://test-bucket/reports"
+    mock_uploader.upload_files.assert_called_once()
+    assert os.listdir(service.work_dir) == []
+
+
+def test_http_streams_report(server, mock_wr, spec_dict):
+    # Act
+    response = _post(f"{server}/reports", spec_dict)
+
+    # Assert
+    assert response.status == 200
+    assert response.headers["Content-Type"] == "text/csv"
+    assert "summary-report-2025-03-25.csv" in response.headers["Content-Disposition"]
+    assert "2025-03-25,test-namespace,test-team,ml.p5.48xlarge" in response.read().decode()
+
+
+def test_http_rejects_invalid_spec(server, spec_dict):
+    # Arrange
+    spec_dict["format"] = "xlsx"
+
+    # Act
+    with pytest.raises(urllib.error.HTTPError) as exc_info:
+        _post(f"{server}/reports", spec_dict)
+
+    # Assert
+    assert exc_info.value.code == 400
+    assert "Invalid format" in json.loads(exc_info.value.read())["error"]
+
+
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        ({"start_date": 20250325}, "start_date must be a string"),
+        (["not", "an", "object"], "must be a JSON object"),
+    ],
+)
+def test_http_rejects_malformed_body(server, spec_dict, body, message):
+    # Arrange
+    if isinstance(body, dict):
+        body = {**spec_dict, **body}
+
+    # Act
+    with pytest.raises(urllib.error.HTTPError) as exc_info:
+        _post(f"{server}/reports", body)
+
+    # Assert
+    assert exc_info.value.code == 400
+    assert message in json.loads(exc_info.value.read())["error"]
+
+
+def test_http_health(server):
+    # Act
+    response = urllib.request.urlopen(f"{server}/health")
+
+    # Assert
+    assert json.loads(response.read()) == {"status": "ok", "cached_queries": 0}
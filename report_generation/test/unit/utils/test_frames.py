@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from src.hyperpod_usage_report.utils.frames import normalize_report_frame
+
+
+def _detailed(rows):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "namespace": pd.array(rng.choice(["ns-a", "ns-b", "ns-c"], rows), dtype=object),
+            "status": pd.array(rng.choice(["Running", "Failed"], rows), dtype=object),
+            "task_name": pd.array([f"task-{i}" for i in range(rows)], dtype=object),
+            "utilized_gpu_count": rng.integers(0, 8, rows).astype("int64"),
+            "utilized_gpu_hours": rng.integers(0, 96, rows) / 4,
+            "utilized_vcpu_hours": rng.random(rows),
+        }
+    )
+
+
+def test_normalize_encodes_low_cardinality_strings():
+    # Act
+    df = normalize_report_frame(_detailed(1000))
+
+    # Assert
+    assert isinstance(df["namespace"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["status"].dtype, pd.CategoricalDtype)
+    # Every task name is distinct, so a dictionary would not help
+    assert not isinstance(df["task_name"].dtype, pd.CategoricalDtype)
+
+
+def test_normalize_downcasts_integers_and_keeps_hours_float64():
+    # Arrange
+    original = _detailed(1000)
+
+    # Act
+    df = normalize_report_frame(original.copy())
+
+    # Assert
+    assert df["utilized_gpu_count"].dtype == np.int8
+    assert df["utilized_gpu_hours"].dtype == np.float64
+    assert df["utilized_vcpu_hours"].dtype == np.float64
+
+
+def test_normalize_keeps_hour_sums_exact():
+    # Arrange: quarter hours are exact in float32, but their large sums are not
+    original = _detailed(300000)
+
+    # Act
+    df = normalize_report_frame(original.copy())
+
+    # Assert
+    assert df["utilized_gpu_hours"].sum() == original["utilized_gpu_hours"].sum()
+
+
+def test_normalize_shrinks_memory():
+    # Arrange
+    df = _detailed(10000).drop(columns=["task_name"])
+    before = df.memory_usage(deep=True).sum()
+
+    # Act
+    after = normalize_report_frame(df).memory_usage(deep=True).sum()
+
+    # Assert
+    assert after * 2 < before
+
+
+def test_normalize_empty_frame():
+    # Arrange
+    df = pd.DataFrame({"namespace": pd.Series([], dtype=object)})
+
+    # Act & Assert
+    assert normalize_report_frame(df) is df
@@ -0,0 +1,63 @@
+from datetime import datetime
+from unittest.mock import Mock
+
+from src.hyperpod_usage_report.utils.input_fingerprint import (
+    compute_fingerprint,
+    list_source_objects,
+)
+
+
+def _estimator(objects):
+    estimator = Mock()
+    estimator.partition_locations.side_effect = lambda table, start, end, cluster: [
+        f"s3://bucket/{table}/day={day}" for day in ("25", "26")
+    ]
+    estimator.list_objects.side_effect = lambda location: objects.get(location, [])
+    return estimator
+
+
+def test_list_source_objects_lists_every_partition():
+    # Arrange
+    modified = datetime(2025, 3, 27, 1, 0)
+    estimator = _estimator(
+        {
+            "s3://bucket/summary_report/day=26": [
+                {"Key": "summary/day=26/b", "ETag": '"2"', "LastModified": modified}
+            ],
+            "s3://bucket/heartdub/day=25": [
+                {"Key": "heartdub/day=25/a", "ETag": '"1"', "LastModified": modified}
+            ],
+        }
+    )
+
+    # Act
+    objects = list_source_objects(
+        estimator,
+        [
+            ("summary_report", "2025-03-25", "2025-03-26", "a"),
+            ("heartdub", "2025-03-25", "2025-03-26", None),
+        ],
+    )
+
+    # Assert
+    assert objects == [
+        ("heartdub/day=25/a", "1", str(modified)),
+        ("summary/day=26/b", "2", str(modified)),
+    ]
+    assert estimator.list_objects.call_count == 4
+
+
+def test_fingerprint_changes_with_parameters_and_sources():
+    # Arrange
+    parameters = {"report_type": "summary", "start_date": "2025-03-25"}
+    sources = [("summary/day=25/a", "1", "2025-03-26 01:00:00")]
+
+    # Act
+    fingerprint = compute_fingerprint(parameters, sources)
+
+    # Assert
+    assert fingerprint == compute_fingerprint(dict(parameters), list(sources))
+    assert fingerprint != compute_fingerprint({**parameters, "namespace": "a"}, sources)
+    assert fingerprint != compute_fingerprint(
+        parameters, [("summary/day=25/a", "2", "2025-03-27 01:00:00")]
+    )
@@ -0,0 +1,112 @@
+import json
+import warnings
+
+import pandas as pd
+import pytest
+
+from src.hyperpod_usage_report.utils.metrics import RunMetrics
+
+
+@pytest.fixture
+def query_df():
+    df = pd.DataFrame({"namespace": ["a", "b"]})
+    # awswrangler attaches the QueryExecution payload the same way
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=UserWarning)
+        df.query_metadata = {
+            "QueryExecutionId": "query-1",
+            "Statistics": {
+                "QueryQueueTimeInMillis": 1500,
+                "QueryPlanningTimeInMillis": 200,
+                "EngineExecutionTimeInMillis": 2000,
+                "ServiceProcessingTimeInMillis": 100,
+                "TotalExecutionTimeInMillis": 3800,
+                "DataScannedInBytes": 1024,
+            },
+        }
+    return df
+
+
+def test_stage_records_rows_and_throughput():
+    # Arrange
+    metrics = RunMetrics()
+
+    # Act
+    with metrics.stage("render", cluster="c") as stage:
+        stage["rows"] = 100
+
+    # Assert
+    [record] = metrics.stages
+    assert record["stage"] == "render"
+    assert record["cluster"] == "c"
+    assert record["rows_per_second"] > 0
+    assert record["peak_rss_bytes"] > 0
+
+
+def test_stage_recorded_when_it_fails():
+    # Arrange
+    metrics = RunMetrics()
+
+    # Act
+    with pytest.raises(RuntimeError):
+        with metrics.stage("upload"):
+            raise RuntimeError("boom")
+
+    # Assert
+    assert [record["stage"] for record in metrics.stages] == ["upload"]
+
+
+def test_record_query_reads_athena_statistics(query_df):
+    # Arrange
+    metrics = RunMetrics()
+
+    # Act
+    metrics.record_query("report", query_df, 5.0)
+
+    # Assert
+    [record] = metrics.queries
+    assert record["query_execution_id"] == "query-1"
+    assert record["queue_seconds"] == 1.5
+    assert record["engine_seconds"] == 2.0
+    assert record["bytes_scanned"] == 1024
+    assert record["client_seconds"] == pytest.approx(1.2)
+    assert record["rows"] == 2
+
+
+def test_write_json_run_record(query_df, tmp_path):
+    # Arrange
+    metrics = RunMetrics(run_id="run-1")
+    metrics.record_query("report", query_df, 5.0)
+    metrics.finish("success")
+    path = tmp_path / "run.json"
+
+    # Act
+    metrics.write_json(str(path))
+
+    # Assert
+    record = json.loads(path.read_text())
+    assert record["run_id"] == "run-1"
+    assert record["status"] == "success"
+    assert record["bytes_scanned"] == 1024
+
+
+def test_prometheus_sums_repeated_stages_and_queries(query_df, tmp_path):
+    # Arrange
+    metrics = RunMetrics()
+    for _ in range(2):
+        with metrics.stage("fetch_data", cluster="c") as stage:
+            stage["rows"] = 10
+        metrics.record_query("report", query_df, 5.0)
+    metrics.finish("success")
+    path = tmp_path / "usage_report.prom"
+
+    # Act
+    metrics.write_prometheus(str(path))
+
+    # Assert
+    text = path.read_text()
+    assert "hyperpod_usage_report_run_success 1" in text
+    assert 'hyperpod_usage_report_stage_rows{stage="fetch_data",cluster="c"} 20' in text
+    assert 'hyperpod_usage_report_queries{query="report"} 2' in text
+    assert 'hyperpod_usage_report_query_bytes_scanned{query="report"} 2048' in text
+    assert text.count("# TYPE hyperpod_usage_report_stage_duration_seconds gauge") == 1
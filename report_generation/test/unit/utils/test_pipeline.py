@@ -0,0 +1,99 @@
+import gzip
+import threading
+
+import pytest
+
+from src.hyperpod_usage_report.utils.pipeline import Pipeline, gzip_blocks
+
+
+def test_run_passes_items_through_the_stages_in_order():
+    # Arrange
+    def double(items):
+        for item in items:
+            yield item * 2
+
+    def add_one(items):
+        for item in items:
+            yield item + 1
+
+    # Act
+    result = Pipeline(queue_size=2).run(
+        ("source", iter(range(100))), [("double", double), ("add_one", add_one)], ("sink", list)
+    )
+
+    # Assert
+    assert result == [item * 2 + 1 for item in range(100)]
+
+
+def test_run_bounds_the_source_while_the_sink_is_blocked():
+    # Arrange
+    produced = []
+    seen = []
+
+    def source():
+        for item in range(20):
+            produced.append(item)
+            yield item
+
+    def sink(items):
+        seen.append(next(items))
+        threading.Event().wait(0.3)
+        seen.append(len(produced))
+        return list(items)
+
+    # Act
+    Pipeline(queue_size=2).run(("source", source()), [], ("sink", sink))
+
+    # Assert: one item taken, two queued and one blocked in put
+    assert seen[1] <= 4
+
+
+def test_run_raises_the_first_stage_error_and_stops_the_others():
+    # Arrange
+    consumed = []
+
+    def fail(items):
+        for item in items:
+            if item == 3:
+                raise ValueError("bad row")
+            yield item
+
+    def sink(items):
+        for item in items:
+            consumed.append(item)
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="bad row"):
+        Pipeline().run(("source", iter(range(1000))), [("fail", fail)], ("sink", sink))
+    # Items already passed on may or may not reach the sink before it is stopped
+    assert consumed == list(range(len(consumed))) and len(consumed) <= 3
+
+
+def test_run_stops_the_source_when_the_sink_fails():
+    # Arrange
+    produced = []
+
+    def source():
+        for item in range(1000):
+            produced.append(item)
+            yield item
+
+    def sink(items):
+        next(items)
+        raise RuntimeError("upload failed")
+
+    # Act & Assert
+    with pytest.raises(RuntimeError, match="upload failed"):
+        Pipeline(queue_size=2).run(("source", source()), [], ("sink", sink))
+    assert len(produced) < 1000
+
+
+def test_gzip_blocks_produce_one_gzip_stream():
+    # Arrange
+    blocks = [f"row {index}\n".encode() for index in range(1000)]
+
+    # Act
+    compressed = b"".join(gzip_blocks(iter(blocks)))
+
+    # Assert
+    assert gzip.decompress(compressed) == b"".join(blocks)
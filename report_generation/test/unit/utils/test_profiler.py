@@ -0,0 +1,80 @@
+import cProfile
+import os
+import pstats
+
+import pytest
+
+from src.hyperpod_usage_report.utils.metrics import RunMetrics
+from src.hyperpod_usage_report.utils.profiler import StageProfiler, folded_stacks
+
+
+def _work():
+    return sorted(str(i) for i in range(20000))
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    profiler = StageProfiler(str(tmp_path / "profiles"))
+    yield profiler
+    profiler.stop()
+
+
+def test_profile_writes_stage_files(profiler):
+    # Act
+    with profiler.profile("render", cluster="test-cluster"):
+        _work()
+
+    # Assert
+    names = sorted(os.path.basename(path) for path in profiler.files)
+    assert names == [
+        "render-test-cluster.allocations.txt",
+        "render-test-cluster.folded",
+        "render-test-cluster.prof",
+        "render-test-cluster.txt",
+    ]
+    assert all(os.path.exists(path) for path in profiler.files)
+    with open(os.path.join(profiler.output_dir, "render-test-cluster.allocations.txt")) as f:
+        assert "allocation sites" in f.read()
+
+
+def test_repeated_stage_gets_numbered_files(profiler):
+    # Act
+    for _ in range(2):
+        with profiler.profile("fetch_data"):
+            _work()
+
+    # Assert
+    assert os.path.join(profiler.output_dir, "fetch_data-2.prof") in profiler.files
+
+
+def test_folded_stacks_format():
+    # Arrange
+    profile = cProfile.Profile()
+    profile.enable()
+    _work()
+    profile.disable()
+
+    # Act
+    lines = folded_stacks(pstats.Stats(profile))
+
+    # Assert
+    assert lines
+    assert any("_work (test_profiler.py" in line for line in lines)
+    for line in lines:
+        stack, value = line.rsplit(" ", 1)
+        assert stack
+        assert int(value) > 0
+
+
+def test_metrics_stage_uses_profiler(profiler):
+    # Arrange
+    metrics = RunMetrics()
+    metrics.profiler = profiler
+
+    # Act
+    with metrics.stage("upload"):
+        _work()
+
+    # Assert
+    assert os.path.join(profiler.output_dir, "upload.prof") in profiler.files
+    assert [record["stage"] for record in metrics.stages] == ["upload"]
@@ -235,3 +235,93 @@ def test_build_query_with_team_and_task():
     assert "WHERE DATE(report_date) BETWEEN DATE('2025-03-25') AND DATE('2025-03-25')" in query
     assert "AND namespace = 'data-science'" in query
     assert "AND task_name = 'model-training'" in query
+
+
+def test_build_partition_predicate_single_day():
+    # Act
+    predicate = QueryBuilder.build_partition_predicate("2025-03-25", "2025-03-25")
+
+    # Assert
+    assert predicate == "((year = '2025' AND month = '03' AND day = '25'))"
+
+
+def test_build_partition_predicate_across_months():
+    # Act
+    predicate = QueryBuilder.build_partition_predicate("2025-03-31", "2025-04-01")
+
+    # Assert
+    assert predicate == (
+        "((year = '2025' AND month = '03' AND day = '31') OR "
+        "(year = '2025' AND month = '04' AND day = '01'))"
+    )
+
+
+def test_build_query_with_partition_filter():
+    # Act
+    query = QueryBuilder.build_fetch_report_data_query(
+        "detailed", "2025-03-25", "2025-03-26", "data-science", partition_filter=True
+    )
+
+    # Assert
+    assert "FROM detailed_report" in query
+    assert "(year = '2025' AND month = '03' AND day = '25')" in query
+    assert "(year = '2025' AND month = '03' AND day = '26')" in query
+    assert "AND namespace = 'data-science'" in query
+
+
+def test_build_query_without_partition_filter():
+    # Act
+    query = QueryBuilder.build_fetch_report_data_query(
+        "summary", "2025-03-25", "2025-03-25"
+    )
+
+    # Assert
+    assert "year = " not in query
+
+
+def test_build_query_with_cluster():
+    # Act
+    query = QueryBuilder.build_fetch_report_data_query(
+        "summary", "2025-03-25", "2025-03-25", cluster="cluster-a"
+    )
+
+    # Assert
+    assert "AND cluster = 'cluster-a'" in query
+
+
+def test_build_heartdub_query_with_cluster():
+    # Act
+    query = QueryBuilder.build_fetch_heartdub_query(
+        "2025-03-25", "2025-03-25", cluster="cluster-a"
+    )
+    unfiltered = QueryBuilder.build_fetch_heartdub_query("2025-03-25", "2025-03-25")
+
+    # Assert
+    assert "AND cluster = 'cluster-a'" in query
+    assert "cluster = " not in unfiltered
+
+
+def test_build_catalog_query_prunes_to_days_and_cluster():
+    # Act
+    query = QueryBuilder.build_fetch_catalog_query("2025-03-24", "2025-03-25", cluster="c1")
+
+    # Assert
+    assert "FROM report_catalog" in query
+    assert "(year = '2025' AND month = '03' AND day = '24')" in query
+    assert "(year = '2025' AND month = '03' AND day = '25')" in query
+    assert "AND cluster = 'c1'" in query
+
+
+def test_build_query_with_subtotals():
+    # Act
+    query = QueryBuilder.build_fetch_report_data_query(
+        "detailed", "2025-03-25", "2025-03-26", subtotals=True
+    )
+
+    # Assert
+    assert "FROM detailed_report" in query
+    assert "GROUP BY GROUPING SETS" in query
+    assert "(namespace, team), (namespace), ())" in query
+    assert "SUM(utilized_gpu_hours) AS utilized_gpu_hours" in query
+    assert "SUM(utilized_gpu_count)" not in query
+    assert "GROUPING(namespace, team, report_date) AS subtotal_level" in query
@@ -0,0 +1,69 @@
+from unittest.mock import Mock, patch
+
+from src.hyperpod_usage_report.utils.query_cache import QueryResultCache
+
+
+def test_get_missing_key_returns_none():
+    # Arrange
+    cache = QueryResultCache()
+
+    # Act & Assert
+    assert cache.get("missing") is None
+
+
+def test_put_and_get():
+    # Arrange
+    cache = QueryResultCache()
+
+    # Act
+    cache.put("query", "result")
+
+    # Assert
+    assert cache.get("query") == "result"
+    assert len(cache) == 1
+
+
+@patch("src.hyperpod_usage_report.utils.query_cache.time")
+def test_expired_entry_is_dropped(mock_time):
+    # Arrange
+    cache = QueryResultCache(ttl_seconds=10)
+    mock_time.monotonic.return_value = 100
+    cache.put("query", "result")
+
+    # Act
+    mock_time.monotonic.return_value = 111
+    result = cache.get("query")
+
+    # Assert
+    assert result is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    # Arrange
+    cache = QueryResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+
+    # Act
+    cache.put("c", 3)
+
+    # Assert
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_get_or_load_calls_loader_once():
+    # Arrange
+    cache = QueryResultCache()
+    loader = Mock(return_value="result")
+
+    # Act
+    first = cache.get_or_load("query", loader)
+    second = cache.get_or_load("query", loader)
+
+    # Assert
+    assert first == second == "result"
+    loader.assert_called_once()
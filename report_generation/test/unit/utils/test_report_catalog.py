@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from src.hyperpod_usage_report.utils.report_catalog import NoMatchingDataError, ReportCatalog
+
+
+def _catalog(days=("2025-03-24", "2025-03-25")):
+    rows = []
+    for day in days:
+        rows.extend(
+            [
+                {"report_date": day, "namespace": "ml-team-a", "task_name": None, "report_type": "summary", "row_count": 2},
+                {"report_date": day, "namespace": "ml-team-b", "task_name": None, "report_type": "summary", "row_count": 1},
+                {"report_date": day, "namespace": "ml-team-a", "task_name": "train-1", "report_type": "detailed", "row_count": 3},
+            ]
+        )
+    return ReportCatalog(pd.DataFrame(rows), datetime(2025, 3, 24), datetime(2025, 3, 25))
+
+
+def test_estimate_rows_applies_namespace_and_task_filters():
+    # Arrange
+    catalog = _catalog()
+
+    # Assert
+    assert catalog.covered
+    assert catalog.estimate_rows("summary") == 6
+    assert catalog.estimate_rows("summary", namespace="ml-team-a") == 4
+    assert catalog.estimate_rows("detailed", namespace="ml-team-a", task="train-1") == 6
+
+
+def test_check_rejects_unknown_namespace_with_suggestions():
+    # Arrange
+    catalog = _catalog()
+
+    # Act & Assert
+    with pytest.raises(NoMatchingDataError) as exc_info:
+        catalog.check("summary", namespace="ml-taem-a")
+    assert "No namespace 'ml-taem-a'" in str(exc_info.value)
+    assert "Did you mean: ml-team-a" in str(exc_info.value)
+
+
+def test_check_rejects_known_values_without_rows_for_the_report_type():
+    # Arrange
+    catalog = _catalog()
+
+    # Act & Assert
+    with pytest.raises(NoMatchingDataError) as exc_info:
+        catalog.check("detailed", namespace="ml-team-b")
+    assert "No detailed report rows match" in str(exc_info.value)
+
+
+def test_check_does_not_judge_days_missing_from_the_catalog():
+    # Arrange
+    catalog = _catalog(days=("2025-03-25",))
+
+    # Act
+    estimated_rows = catalog.check("summary", namespace="ml-taem-a")
+
+    # Assert
+    assert not catalog.covered
+    assert estimated_rows == 0
+
+
+def test_merge_is_covered_only_when_every_catalog_is():
+    # Arrange
+    covered = _catalog()
+    partial = _catalog(days=("2025-03-24",))
+
+    # Act
+    merged = ReportCatalog.merge([covered, partial])
+
+    # Assert
+    assert not merged.covered
+    assert merged.estimate_rows("summary") == 9
@@ -0,0 +1,249 @@
+import hashlib
+from unittest.mock import Mock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from src.hyperpod_usage_report.utils.s3_uploader import MULTIPART_THRESHOLD, S3Uploader
+
+
+@pytest.fixture
+def report_file(tmp_path):
+    path = tmp_path / "summary-report-2025-03-25.csv"
+    path.write_bytes(b"a" * 1000)
+    return str(path)
+
+
+def _not_found():
+    return ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+
+
+def test_build_destination_with_prefix():
+    # Act
+    bucket, key = S3Uploader._build_destination(
+        "/tmp/report.csv", "s3://test-bucket/reports/"
+    )
+
+    # Assert
+    assert bucket == "test-bucket"
+    assert key == "reports/report.csv"
+
+
+def test_build_destination_bucket_only():
+    # Act
+    bucket, key = S3Uploader._build_destination("/tmp/report.csv", "s3://test-bucket")
+
+    # Assert
+    assert bucket == "test-bucket"
+    assert key == "report.csv"
+
+
+def test_compute_etag_single_part(report_file):
+    # Act
+    etag = S3Uploader.compute_etag(report_file)
+
+    # Assert
+    assert etag == hashlib.md5(b"a" * 1000).hexdigest()
+
+
+def test_compute_etag_multipart(report_file):
+    # Arrange
+    part_digests = [
+        hashlib.md5(b"a" * 400).digest(),
+        hashlib.md5(b"a" * 400).digest(),
+        hashlib.md5(b"a" * 200).digest(),
+    ]
+    expected = f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-3"
+
+    # Act
+    etag = S3Uploader.compute_etag(report_file, threshold=500, chunk_size=400)
+
+    # Assert
+    assert etag == expected
+
+
+@patch("src.hyperpod_usage_report.utils.s3_uploader.boto3")
+def test_upload_files_skips_unchanged(mock_boto3, report_file):
+    # Arrange
+    s3_client = Mock()
+    mock_boto3.client.return_value = s3_client
+    s3_client.head_object.return_value = {
+        "ETag": f'"{hashlib.md5(b"a" * 1000).hexdigest()}"'
+    }
+
+    # Act
+    results = S3Uploader.upload_files([report_file], "s3://test-bucket/reports")
+
+    # Assert
+    assert results == {report_file: "skipped"}
+    s3_client.upload_file.assert_not_called()
+
+
+@patch("src.hyperpod_usage_report.utils.s3_uploader.boto3")
+def test_upload_files_uploads_changed_and_missing(mock_boto3, report_file, tmp_path):
+    # Arrange
+    new_file = tmp_path / "detailed-report-2025-03-25.csv"
+    new_file.write_bytes(b"b" * 10)
+    s3_client = Mock()
+    mock_boto3.client.return_value = s3_client
+
+    def head_object(Bucket, Key):
+        if Key.endswith("summary-report-2025-03-25.csv"):
+            return {"ETag": '"stale"'}
+        raise _not_found()
+
+    s3_client.head_object.side_effect = head_object
+
+    # Act
+    results = S3Uploader.upload_files(
+        [report_file, str(new_file)], "s3://test-bucket/reports"
+    )
+
+    # Assert
+    assert results == {report_file: "uploaded", str(new_file): "uploaded"}
+    uploaded_keys = sorted(call.args[2] for call in s3_client.upload_file.call_args_list)
+    assert uploaded_keys == [
+        "reports/detailed-report-2025-03-25.csv",
+        "reports/summary-report-2025-03-25.csv",
+    ]
+
+
+@patch("src.hyperpod_usage_report.utils.s3_uploader.boto3")
+def test_upload_files_propagates_head_errors(mock_boto3, report_file):
+    # Arrange
+    s3_client = Mock()
+    mock_boto3.client.return_value = s3_client
+    s3_client.head_object.side_effect = ClientError(
+        {"Error": {"Code": "403", "Message": "Forbidden"}}, "HeadObject"
+    )
+
+    # Act & Assert
+    with pytest.raises(ClientError):
+        S3Uploader.upload_files([report_file], "s3://test-bucket/reports")
+
+
+@patch("src.hyperpod_usage_report.utils.s3_uploader.boto3")
+def test_upload_files_stores_metadata(mock_boto3, report_file):
+    # Arrange
+    s3_client = Mock()
+    mock_boto3.client.return_value = s3_client
+    s3_client.head_object.side_effect = _not_found()
+
+    # Act
+    S3Uploader.upload_files(
+        [report_file], "s3://test-bucket/reports", metadata={"input-fingerprint": "abc"}
+    )
+
+    # Assert
+    assert s3_client.upload_file.call_args.kwargs["ExtraArgs"] == {
+        "Metadata": {"input-fingerprint": "abc"}
+    }
+
+
+@patch("src.hyperpod_usage_report.utils.s3_uploader.boto3")
+def test_upload_files_replaces_metadata_of_unchanged_file(mock_boto3, report_file):
+    # Arrange
+    s3_client = Mock()
+    mock_boto3.client.return_value = s3_client
+    s3_client.head_object.return_value = {
+        "ETag": f'"{hashlib.md5(b"a" * 1000).hexdigest()}"',
+        "Metadata": {"input-fingerprint": "old"},
+    }
+
+    # Act
+    results = S3Uploader.upload_files(
+        [report_file], "s3://test-bucket/reports", metadata={"input-fingerprint": "new"}
+    )
+
+    # Assert
+    assert results == {report_file: "skipped"}
+    s3_client.upload_file.assert_not_called()
+    s3_client.copy_object.assert_called_once_with(
+        Bucket="test-bucket",
+        Key="reports/summary-report-2025-03-25.csv",
+        CopySource={"Bucket": "test-bucket", "Key": "reports/summary-report-2025-03-25.csv"},
+        Metadata={"input-fingerprint": "new"},
+        MetadataDirective="REPLACE",
+    )
+
+
+@patch("src.hyperpod_usage_report.utils.s3_uploader.boto3")
+def test_upload_files_uploads_multipart_file_again_for_new_metadata(mock_boto3, tmp_path):
+    # Arrange
+    path = tmp_path / "detailed-report-2025-03-25.csv"
+    path.write_bytes(b"a" * (MULTIPART_THRESHOLD + 1))
+    s3_client = Mock()
+    mock_boto3.client.return_value = s3_client
+    s3_client.head_object.return_value = {
+        "ETag": f'"{S3Uploader.compute_etag(str(path))}"',
+        "Metadata": {"input-fingerprint": "old"},
+    }
+
+    # Act
+    results = S3Uploader.upload_files(
+        [str(path)], "s3://test-bucket/reports", metadata={"input-fingerprint": "new"}
+    )
+
+    # Assert: a copy would turn the multipart ETag into a plain MD5 that never matches again
+    assert results == {str(path): "uploaded"}
+    s3_client.copy_object.assert_not_called()
+    assert s3_client.upload_file.call_args.kwargs["ExtraArgs"] == {
+        "Metadata": {"input-fingerprint": "new"}
+    }
+
+
+@patch("src.hyperpod_usage_report.utils.s3_uploader.boto3")
+def test_upload_stream_sends_parts_of_part_size(mock_boto3):
+    # Arrange
+    s3_client = mock_boto3.client.return_value
+    s3_client.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+    s3_client.upload_part.side_effect = lambda **kwargs: {"ETag": f"etag-{kwargs['PartNumber']}"}
+
+    # Act
+    size = S3Uploader.upload_stream(
+        iter([b"a" * 6, b"b" * 6, b"c" * 3]),
+        "summary-report-2025-03-25.csv",
+        "s3://test-bucket/reports/",
+        metadata={"input-fingerprint": "abc"},
+        part_size=10,
+    )
+
+    # Assert
+    assert size == 15
+    s3_client.create_multipart_upload.assert_called_once_with(
+        Bucket="test-bucket",
+        Key="reports/summary-report-2025-03-25.csv",
+        Metadata={"input-fingerprint": "abc"},
+    )
+    bodies = [call.kwargs["Body"] for call in s3_client.upload_part.call_args_list]
+    assert bodies == [b"a" * 6 + b"b" * 6, b"c" * 3]
+    s3_client.complete_multipart_upload.assert_called_once_with(
+        Bucket="test-bucket",
+        Key="reports/summary-report-2025-03-25.csv",
+        UploadId="upload-1",
+        MultipartUpload={
+            "Parts": [{"ETag": "etag-1", "PartNumber": 1}, {"ETag": "etag-2", "PartNumber": 2}]
+        },
+    )
+    s3_client.abort_multipart_upload.assert_not_called()
+
+
+@patch("src.hyperpod_usage_report.utils.s3_uploader.boto3")
+def test_upload_stream_aborts_when_the_stream_fails(mock_boto3):
+    # Arrange
+    s3_client = mock_boto3.client.return_value
+    s3_client.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+
+    def blocks():
+        yield b"a" * 10
+        raise RuntimeError("fetch failed")
+
+    # Act
+    with pytest.raises(RuntimeError, match="fetch failed"):
+        S3Uploader.upload_stream(blocks(), "report.csv", "s3://test-bucket", part_size=5)
+
+    # Assert
+    s3_client.abort_multipart_upload.assert_called_once_with(
+        Bucket="test-bucket", Key="report.csv", UploadId="upload-1"
+    )
+    s3_client.complete_multipart_upload.assert_not_called()
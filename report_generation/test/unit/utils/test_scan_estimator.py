@@ -0,0 +1,101 @@
+from unittest.mock import Mock
+
+import pytest
+
+from src.hyperpod_usage_report.utils.scan_estimator import (
+    MIN_BILLED_BYTES,
+    ScanEstimate,
+    ScanEstimator,
+    format_bytes,
+)
+
+
+def _paginator(pages):
+    paginator = Mock()
+    paginator.paginate.side_effect = lambda **kwargs: pages(**kwargs)
+    return paginator
+
+
+@pytest.fixture
+def session():
+    glue = Mock()
+    s3 = Mock()
+    sizes = {
+        "reports/summary/year=2025/month=03/day=25/cluster=a/": [100, 200],
+        "reports/summary/year=2025/month=03/day=26/cluster=a/": [300],
+        "reports/summary/": [100, 200, 300, 400],
+    }
+    glue.get_paginator.return_value = _paginator(
+        lambda Expression, **kwargs: [
+            {
+                "Partitions": [
+                    {
+                        "StorageDescriptor": {
+                            "Location": f"s3://bucket/reports/summary/year=2025/month=03/day={day}/cluster=a"
+                        }
+                    }
+                    for day in ("25", "26")
+                    if f"day = '{day}'" in Expression
+                ]
+            }
+        ]
+    )
+    glue.get_table.return_value = {
+        "Table": {"StorageDescriptor": {"Location": "s3://bucket/reports/summary/"}}
+    }
+    s3.get_paginator.return_value = _paginator(
+        lambda Bucket, Prefix: [{"Contents": [{"Size": size} for size in sizes[Prefix]]}]
+    )
+    session = Mock()
+    session.client.side_effect = lambda name: {"glue": glue, "s3": s3}[name]
+    return session
+
+
+def test_estimate_prunes_to_partitions(session):
+    # Arrange
+    estimator = ScanEstimator("db", session)
+
+    # Act
+    estimate = estimator.estimate("summary_report", "2025-03-25", "2025-03-26", "a")
+
+    # Assert
+    assert estimate.bytes_scanned == 600
+    assert len(estimate.locations) == 2
+    expression = session.client("glue").get_paginator().paginate.call_args.kwargs["Expression"]
+    assert expression.endswith("AND cluster = 'a'")
+
+
+def test_estimate_without_range_reads_whole_table(session):
+    # Arrange
+    estimator = ScanEstimator("db", session)
+
+    # Act
+    estimate = estimator.estimate("summary_report")
+
+    # Assert
+    assert estimate.bytes_scanned == 1000
+    assert estimate.pruned is False
+    assert "all (no partition filter)" in estimate.describe()[0]
+
+
+def test_day_ranges_split_long_ranges():
+    # Act
+    ranges = ScanEstimator._day_ranges("2025-01-01", "2025-03-01")
+
+    # Assert
+    assert ranges == [
+        ("2025-01-01", "2025-01-30"),
+        ("2025-01-31", "2025-03-01"),
+    ]
+
+
+def test_cost_has_minimum_billed_bytes():
+    # Assert
+    assert ScanEstimate("t", 0).cost_usd == ScanEstimate("t", MIN_BILLED_BYTES).cost_usd
+    assert ScanEstimate("t", 1024 ** 4).cost_usd == pytest.approx(5.0)
+
+
+def test_format_bytes():
+    # Assert
+    assert format_bytes(512) == "512.0 B"
+    assert format_bytes(3 * 1024 ** 3) == "3.0 GB"
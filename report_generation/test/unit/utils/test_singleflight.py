@@ -0,0 +1,54 @@
+import threading
+import time
+
+import pytest
+
+from src.hyperpod_usage_report.utils.singleflight import SingleFlight
+
+
+def test_do_returns_result():
+    # Act & Assert
+    assert SingleFlight().do("key", lambda: 42) == 42
+
+
+def test_concurrent_calls_share_one_execution():
+    # Arrange
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+    results = []
+
+    def slow_query():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "result"
+
+    def follower():
+        started.wait()
+        results.append(flight.do("query", slow_query))
+
+    # Act
+    threads = [threading.Thread(target=follower) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    results.append(flight.do("query", slow_query))
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    assert len(calls) == 1
+    assert results == ["result"] * 5
+
+
+def test_error_is_shared_and_key_is_released():
+    # Arrange
+    flight = SingleFlight()
+
+    def failing_query():
+        raise RuntimeError("Athena error")
+
+    # Act & Assert
+    with pytest.raises(RuntimeError):
+        flight.do("query", failing_query)
+    assert flight.do("query", lambda: "retried") == "retried"
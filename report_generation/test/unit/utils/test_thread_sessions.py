@@ -0,0 +1,23 @@
+import threading
+from unittest.mock import Mock, patch
+
+from src.hyperpod_usage_report.utils.thread_sessions import ThreadLocalSessions
+
+
+@patch("src.hyperpod_usage_report.utils.thread_sessions.boto3")
+def test_get_returns_one_session_per_thread(mock_boto3):
+    # Arrange
+    mock_boto3.Session.side_effect = lambda: Mock()
+    sessions = ThreadLocalSessions()
+    other = []
+
+    # Act
+    first = sessions.get()
+    thread = threading.Thread(target=lambda: other.append(sessions.get()))
+    thread.start()
+    thread.join()
+
+    # Assert
+    assert sessions.get() is first
+    assert other[0] is not first
+    assert mock_boto3.Session.call_count == 2
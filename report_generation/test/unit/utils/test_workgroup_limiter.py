@@ -0,0 +1,49 @@
+import threading
+import time
+
+import pytest
+
+from src.hyperpod_usage_report.utils.workgroup_limiter import WorkgroupLimiter
+
+
+def _peak_concurrency(limiter, workgroup, workers):
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def query():
+        with limiter.slot(workgroup):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.05)
+            with lock:
+                state["running"] -= 1
+
+    threads = [threading.Thread(target=query) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return state["peak"]
+
+
+def test_default_limit_caps_concurrency():
+    # Arrange
+    limiter = WorkgroupLimiter(default_limit=2)
+
+    # Act & Assert
+    assert _peak_concurrency(limiter, "reports", 6) == 2
+
+
+def test_workgroup_specific_limit():
+    # Arrange
+    limiter = WorkgroupLimiter(default_limit=3, limits={"reports": 1})
+
+    # Act & Assert
+    assert _peak_concurrency(limiter, "reports", 4) == 1
+
+
+def test_invalid_limit():
+    # Act & Assert
+    with pytest.raises(ValueError):
+        WorkgroupLimiter(default_limit=0)